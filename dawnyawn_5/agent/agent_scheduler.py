@@ -1,8 +1,7 @@
 # dawnyawn/agent/agent_scheduler.py (Simplified Text Version)
 import re
 from typing import List
-from openai import APITimeoutError
-from config import get_llm_client, LLM_MODEL_NAME, LLM_REQUEST_TIMEOUT
+from config import get_llm_client, llm_timeout_error, LLM_MODEL_NAME, LLM_REQUEST_TIMEOUT
 from models.task_node import TaskNode
 
 
@@ -10,7 +9,7 @@ class AgentScheduler:
     """LLM Orchestrator. Creates the high-level strategic plan for user review."""
 
     def __init__(self):
-        self.client = get_llm_client()
+        self._client = None
         # --- THIS IS THE NEW, SIMPLIFIED TEXT PROMPT ---
         self.system_prompt = """
 You are an EXPERT PENTESTING strategist. Your job is to convert a user's goal into a simple, NUMBERED list of high-level steps.
@@ -28,6 +27,17 @@ Your Response:
 2. If a web server is found, retrieve the content of its homepage.
 """
 
+    @property
+    def client(self):
+        """The shared LLM client, created on first use so constructing this object stays cheap."""
+        if self._client is None:
+            self._client = get_llm_client()
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
     def _parse_plan_from_text(self, text_plan: str) -> List[str]:
         """Parses a numbered list from the LLM's text response."""
         # Find all lines that start with a number followed by a period.
@@ -59,6 +69,6 @@ Your Response:
             # Convert the list of strings into a list of TaskNode objects
             return [TaskNode(task_id=i + 1, description=desc) for i, desc in enumerate(task_descriptions)]
 
-        except APITimeoutError:
+        except llm_timeout_error():
             print("\n❌ Critical Error: The AI model timed out while creating the plan.")
             return []
\ No newline at end of file
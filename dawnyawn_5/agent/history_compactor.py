@@ -0,0 +1,85 @@
+# dawnyawn/agent/history_compactor.py
+import re
+import json
+from typing import Dict, List, Optional, Tuple
+
+from services.blob_store import BlobStore, step_observation
+
+# Lines that usually carry the findings of a security tool's output.
+_SALIENT_LINE = re.compile(
+    r"\b(open|found|status:|vulnerab|injectable|cve-|server:|title|login|password|error|failed|denied)\b|^\+ ",
+    re.IGNORECASE,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for prompt budgeting."""
+    return len(text) // 4 + 1
+
+
+def truncate_middle(text: str, max_chars: int) -> str:
+    """Keeps the head and tail of a long text, which is where tool banners and summaries live."""
+    if len(text) <= max_chars:
+        return text
+    marker = f"\n... [{len(text) - max_chars} chars truncated] ...\n"
+    keep = max(max_chars - len(marker), 0)
+    head = keep * 2 // 3
+    tail = keep - head
+    return text[:head] + marker + (text[-tail:] if tail else "")
+
+
+def fit_recent_lines(lines: List[str], max_chars: int) -> str:
+    """Joins the most recent lines that fit in max_chars, noting how many older ones were left out."""
+    if not lines:
+        return ""
+    kept, used = [], 0
+    for line in reversed(lines):
+        if used + len(line) + 1 > max_chars:
+            break
+        kept.append(line)
+        used += len(line) + 1
+    omitted = len(lines) - len(kept)
+    kept.reverse()
+    if omitted:
+        kept.insert(0, f"({omitted} earlier step(s) omitted to fit the prompt budget)")
+    return "\n".join(kept)
+
+
+class HistoryCompactor:
+    """
+    Renders mission history steps for prompts: a step verbatim within a token budget,
+    or condensed to one digest line. PromptLayout decides which steps get which.
+    """
+
+    def __init__(self, summary_input_chars: int, digest_line_chars: int = 300, digest_share: float = 0.3,
+                 blob_store: Optional[BlobStore] = None):
+        # Only this much of an observation is scanned when condensing it into a digest line.
+        self.summary_input_chars = summary_input_chars
+        self.digest_line_chars = digest_line_chars
+        # Share of the history budget the digest of condensed steps may take.
+        self.digest_share = digest_share
+        # Resolves observations that are kept by reference in the blob store.
+        self.blob_store = blob_store
+
+    def render_step(self, step: Dict, max_tokens: int) -> Tuple[str, bool]:
+        """
+        Renders a single step, truncating its observation in the middle to fit max_tokens.
+        Returns the rendered step and whether its observation was truncated.
+        """
+        # Only the command and observation go to the model; other keys are bookkeeping.
+        observation = step_observation(step, self.blob_store)
+        entry = {"command": step.get("command", "N/A"), "observation": ""}
+        overhead = len(json.dumps(entry, indent=2))
+        entry["observation"] = truncate_middle(observation, max(max_tokens * 4 - overhead, 200))
+        return json.dumps(entry, indent=2), entry["observation"] != observation
+
+    def digest_line(self, step_number: int, step: Dict) -> str:
+        """Condenses a step to one line: its command and the salient lines of its observation."""
+        observation = step_observation(step, self.blob_store, max_chars=self.summary_input_chars)
+        lines = [re.sub(r"\s+", " ", line).strip() for line in observation.splitlines()]
+        lines = [line for line in lines if line]
+        salient = [line for line in lines if _SALIENT_LINE.search(line)]
+        # Salient lines first; fall back to the opening lines for tools with unfamiliar output.
+        condensed = " | ".join(salient or lines[:3]) or "(no output)"
+        line = f"Step {step_number}: {step.get('command', 'N/A')} -> {condensed}"
+        return truncate_middle(line, self.digest_line_chars)
@@ -0,0 +1,47 @@
+# dawnyawn/agent/json_extractor.py
+from typing import List, Optional
+
+
+class IncrementalJsonExtractor:
+    """
+    Finds balanced top-level JSON objects in text that arrives in pieces. Braces
+    inside strings (including escaped quotes) are ignored, so an object is reported
+    complete as soon as its closing brace arrives, without waiting for whatever the
+    model generates after it. Text outside objects (Markdown fences, chatter) is skipped.
+    """
+
+    def __init__(self):
+        self._chars: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._pending = ""
+
+    def feed(self, text: str) -> Optional[str]:
+        """
+        Consumes the next piece of text and returns the first object completed by it, if any.
+        Text after that object is kept and scanned by the next call to feed().
+        """
+        text, self._pending = self._pending + text, ""
+        for index, char in enumerate(text):
+            if self._depth == 0 and char != "{":
+                continue
+            self._chars.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    obj, self._chars = "".join(self._chars), []
+                    self._pending = text[index + 1:]
+                    return obj
+        return None
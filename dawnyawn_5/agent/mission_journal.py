@@ -0,0 +1,124 @@
+# dawnyawn/agent/mission_journal.py
+import os
+import json
+import time
+import logging
+from typing import Dict, List, Optional
+
+
+class MissionJournal:
+    """
+    Persists mission state as an append-only JSONL journal of plan changes and step
+    records, compacted periodically into a snapshot. Saving a step costs O(step size)
+    instead of rewriting the whole mission; resuming replays the snapshot plus the
+    journal tail. Every record carries a sequence number, so records already folded
+    into a snapshot are skipped even if a crash left them in the journal.
+    """
+
+    FSYNC_POLICIES = ("always", "interval", "never")
+
+    def __init__(self, directory: str, name: str = "mission_session", fsync_policy: str = "always",
+                 fsync_interval: float = 5.0, snapshot_every: int = 50):
+        if fsync_policy not in self.FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync_policy}'. Use one of {self.FSYNC_POLICIES}.")
+        self.snapshot_path = os.path.join(directory, f"{name}.snapshot.json")
+        self.journal_path = os.path.join(directory, f"{name}.journal.jsonl")
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+        self._seq = 0
+        self._records_since_snapshot = 0
+        self._last_fsync = 0.0
+        self._handle = None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.snapshot_path)
+
+    def clear(self):
+        """Deletes the snapshot and journal."""
+        self._close()
+        for path in (self.snapshot_path, self.journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._seq = 0
+        self._records_since_snapshot = 0
+
+    def start(self, goal: str, plan: List[Dict], history: List[Dict]):
+        """Begins a new journal with an initial snapshot holding the goal."""
+        self.clear()
+        self.snapshot(goal, plan, history)
+
+    def append_plan(self, plan: List[Dict]):
+        self._append({"type": "plan", "plan": plan})
+
+    def append_step(self, step: Dict):
+        self._append({"type": "step", "step": step})
+
+    def maybe_snapshot(self, goal: str, plan: List[Dict], history: List[Dict]):
+        """Compacts the journal into a snapshot once enough records have accumulated."""
+        if self._records_since_snapshot >= self.snapshot_every:
+            self.snapshot(goal, plan, history)
+
+    def snapshot(self, goal: str, plan: List[Dict], history: List[Dict]):
+        """Atomically writes the full state, then truncates the journal it supersedes."""
+        state = {"goal": goal, "plan": plan, "mission_history": history, "seq": self._seq}
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        self._close()
+        open(self.journal_path, 'w').close()
+        self._records_since_snapshot = 0
+        logging.info("Mission state compacted into snapshot (%d steps).", len(history))
+
+    def load(self) -> Optional[Dict]:
+        """Rebuilds the state from the snapshot plus the journal tail. Returns None if there is none."""
+        if not self.exists():
+            return None
+        with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        self._seq = state.pop("seq", 0)
+        replayed = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'rb+') as f:
+                good_end = 0
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn write from a crash; cut it off so later appends start on a clean line.
+                        logging.warning("Ignoring a torn record at the end of the mission journal.")
+                        f.truncate(good_end)
+                        break
+                    good_end += len(line)
+                    if record["seq"] <= self._seq:
+                        continue
+                    if record["type"] == "plan":
+                        state["plan"] = record["plan"]
+                    elif record["type"] == "step":
+                        state["mission_history"].append(record["step"])
+                    self._seq = record["seq"]
+                    replayed += 1
+        self._records_since_snapshot = replayed
+        logging.info("Mission state restored from snapshot and %d journal record(s).", replayed)
+        return state
+
+    def _append(self, record: Dict):
+        self._seq += 1
+        record["seq"] = self._seq
+        if self._handle is None:
+            self._handle = open(self.journal_path, 'a', encoding='utf-8')
+        self._handle.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._handle.flush()
+        if self.fsync_policy == "always" or (
+                self.fsync_policy == "interval" and time.monotonic() - self._last_fsync >= self.fsync_interval):
+            os.fsync(self._handle.fileno())
+            self._last_fsync = time.monotonic()
+        self._records_since_snapshot += 1
+
+    def _close(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
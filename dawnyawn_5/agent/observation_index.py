@@ -0,0 +1,134 @@
+# dawnyawn/agent/observation_index.py
+import re
+import math
+from dataclasses import dataclass
+from typing import Collection, Dict, List, Optional, Tuple
+
+from agent.history_compactor import estimate_tokens, truncate_middle
+from services.blob_store import BlobStore, step_observation
+
+_WORD = re.compile(r"[a-z0-9]+")
+# Words too common in task descriptions and tool output to say anything about relevance.
+_STOP_WORDS = frozenset(
+    "a an and any are as at be by for from has have if in into is it its of on or that the this to was "
+    "were with all identify find check determine target".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in _WORD.findall(text.lower()) if word not in _STOP_WORDS]
+
+
+@dataclass
+class Chunk:
+    step: int  # 1-based step number
+    command: str
+    text: str
+    length: int  # Number of index terms
+
+
+class ObservationIndex:
+    """
+    An Okapi BM25 index over chunks of step observations (parsed findings, or raw output
+    for tools without a parser). Steps are indexed once, as they are added to the history,
+    and prompts retrieve only the chunks relevant to the tasks still pending.
+    """
+
+    def __init__(self, chunk_chars: int = 800, max_observation_chars: int = 50000,
+                 k1: float = 1.5, b: float = 0.75, blob_store: Optional[BlobStore] = None):
+        self.chunk_chars = chunk_chars
+        # Only this much of one observation is indexed; huge raw outputs are mostly repetition.
+        self.max_observation_chars = max_observation_chars
+        self.k1 = k1
+        self.b = b
+        self.blob_store = blob_store
+        self._chunks: List[Chunk] = []
+        # term -> [(chunk position, term frequency)]
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._total_length = 0
+        self._indexed_steps = 0
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def update(self, history: List[Dict]):
+        """Indexes the steps added to the history since the last call."""
+        if len(history) < self._indexed_steps:
+            # History was replaced (e.g. a new mission); rebuild the index from scratch.
+            self._chunks, self._postings, self._total_length, self._indexed_steps = [], {}, 0, 0
+        for index in range(self._indexed_steps, len(history)):
+            self._add_step(index + 1, history[index])
+        self._indexed_steps = len(history)
+
+    def _add_step(self, step_number: int, step: Dict):
+        command = step.get("command", "N/A")
+        observation = step_observation(step, self.blob_store, max_chars=self.max_observation_chars)
+        for text in self._split(observation):
+            frequencies: Dict[str, int] = {}
+            for term in tokenize(f"{command}\n{text}"):
+                frequencies[term] = frequencies.get(term, 0) + 1
+            if not frequencies:
+                continue
+            position = len(self._chunks)
+            length = sum(frequencies.values())
+            self._chunks.append(Chunk(step_number, command, text, length))
+            self._total_length += length
+            for term, frequency in frequencies.items():
+                self._postings.setdefault(term, []).append((position, frequency))
+
+    def _split(self, text: str) -> List[str]:
+        """Groups consecutive non-blank lines into chunks of at most chunk_chars."""
+        chunks, current, size = [], [], 0
+        for line in text.splitlines():
+            line = truncate_middle(line.strip(), self.chunk_chars)
+            if not line:
+                continue
+            if current and size + len(line) + 1 > self.chunk_chars:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            current.append(line)
+            size += len(line) + 1
+        if current:
+            chunks.append("\n".join(current))
+        return chunks
+
+    def search(self, query: str, top_k: int, steps: Optional[Collection[int]] = None) -> List[Tuple[float, Chunk]]:
+        """The top_k chunks by BM25 score for the query, optionally only from the given step numbers."""
+        return [(score, self._chunks[position]) for position, score in self._rank(query, top_k, steps)]
+
+    def _rank(self, query: str, top_k: int, steps: Optional[Collection[int]]) -> List[Tuple[int, float]]:
+        if not self._chunks:
+            return []
+        average_length = self._total_length / len(self._chunks)
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (len(self._chunks) - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, frequency in postings:
+                if steps is not None and self._chunks[position].step not in steps:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._chunks[position].length / average_length)
+                scores[position] = scores.get(position, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+
+    def render(self, query: str, top_k: int, token_budget: int, steps: Optional[Collection[int]] = None) -> str:
+        """
+        The best-scoring chunks that fit in token_budget, grouped by step in mission order,
+        or "" when nothing in the index matches the query.
+        """
+        selected, used = [], 0
+        for position, _score in self._rank(query, top_k, steps):
+            tokens = estimate_tokens(self._chunks[position].text)
+            if used + tokens > token_budget:
+                continue
+            selected.append(position)
+            used += tokens
+        lines, last_step = [], None
+        for chunk in (self._chunks[position] for position in sorted(selected)):
+            if chunk.step != last_step:
+                lines.append(f"Step {chunk.step}: {chunk.command}")
+                last_step = chunk.step
+            lines.extend(f"  {line}" for line in chunk.text.splitlines())
+        return "\n".join(lines)
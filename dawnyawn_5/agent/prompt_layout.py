@@ -0,0 +1,126 @@
+# dawnyawn/agent/prompt_layout.py
+from typing import Dict, List, Set
+
+from agent.history_compactor import HistoryCompactor, fit_recent_lines
+
+
+def shared_prefix_chars(a: str, b: str, block: int = 4096) -> int:
+    """Length of the longest common prefix of two strings."""
+    limit = min(len(a), len(b))
+    i = 0
+    # Compare whole blocks first; prompts usually share most of their length.
+    while i + block <= limit and a[i:i + block] == b[i:i + block]:
+        i += block
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _field(obj, name: str):
+    if obj is None:
+        return None
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+
+def prompt_cache_usage(usage, estimated_tokens: int) -> Dict:
+    """
+    Reads the server's view of a call's prompt from the response 'usage': tokens it
+    evaluated and, where it says so, tokens it served from its prompt (KV) cache.
+
+    OpenAI-compatible servers that report 'prompt_tokens_details.cached_tokens' (llama.cpp,
+    vLLM) count the whole prompt in 'prompt_tokens'. Ollama reports 'prompt_tokens' (its
+    'prompt_eval_count') as the tokens it actually had to evaluate, so there the reuse is
+    the part of the estimated prompt size that was not evaluated.
+    """
+    prompt_tokens = _field(usage, "prompt_tokens") or _field(usage, "prompt_eval_count")
+    if not prompt_tokens:
+        return {"evaluated_tokens": None, "cached_tokens": None, "cache_reuse": None}
+    cached = _field(_field(usage, "prompt_tokens_details"), "cached_tokens")
+    if cached is not None:
+        return {"evaluated_tokens": prompt_tokens - cached, "cached_tokens": cached,
+                "cache_reuse": cached / prompt_tokens}
+    return {"evaluated_tokens": prompt_tokens, "cached_tokens": None,
+            "cache_reuse": max(0.0, 1 - prompt_tokens / estimated_tokens) if estimated_tokens else None}
+
+
+class PromptLayout:
+    """
+    Lays out ThoughtEngine's chat messages so that consecutive calls share the longest
+    possible prefix, which Ollama and llama.cpp serve from their KV cache instead of
+    prefilling it again:
+
+      1. system: the static instructions and tool manifest, the same for every call;
+      2. user:   the goal, then the execution history in order, append-only;
+      3. user:   everything that changes between calls: plan status, retrieved
+                 excerpts and the request itself.
+
+    Each step is rendered once, capped at step_tokens, and reused byte for byte. When the
+    verbatim steps outgrow token_budget, the oldest ones are folded into the digest in one
+    go, until the rest fit in keep_share of the budget, so the prefix changes once per fold
+    rather than on every call. The digest is kept within the compactor's digest_share.
+    """
+
+    def __init__(self, compactor: HistoryCompactor, token_budget: int, step_tokens: int, keep_share: float = 0.5):
+        self.compactor = compactor
+        self.token_budget = token_budget
+        self.step_tokens = step_tokens
+        self.keep_share = keep_share
+        self._steps: List[str] = []
+        # Step numbers (1-based) whose observation was truncated to fit step_tokens.
+        self._truncated: Set[int] = set()
+        self._digest_lines: List[str] = []
+        self._digest = ""
+        self._folded = 0
+
+    @property
+    def folded_steps(self) -> int:
+        """Number of oldest steps no longer shown verbatim."""
+        return self._folded
+
+    @property
+    def abridged_steps(self) -> Set[int]:
+        """Step numbers (1-based) the history no longer shows in full: folded or truncated steps."""
+        return set(range(1, self._folded + 1)) | self._truncated
+
+    def messages(self, system_prompt: str, goal: str, history: List[Dict], request: str) -> List[Dict]:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"**Main Goal:** {goal}\n\n"
+                                        f"**Execution History (oldest first):**\n{self.history_block(history)}"},
+            {"role": "user", "content": request},
+        ]
+
+    def history_block(self, history: List[Dict]) -> str:
+        self.update(history)
+        parts = [f"Earlier steps (condensed):\n{self._digest}"] if self._folded else []
+        parts.extend(self._steps[self._folded:])
+        return "\n\n".join(parts) or "No actions yet."
+
+    def update(self, history: List[Dict]):
+        """Renders the steps added since the last call, folding the oldest ones if over budget."""
+        if len(history) < len(self._steps):
+            # History was replaced (e.g. a new mission); start over.
+            self.reset()
+        for index in range(len(self._steps), len(history)):
+            rendered, truncated = self.compactor.render_step(history[index], self.step_tokens)
+            self._steps.append(f"Step {index + 1}:\n{rendered}")
+            if truncated:
+                self._truncated.add(index + 1)
+        if sum(len(step) for step in self._steps[self._folded:]) > self.token_budget * 4 - len(self._digest):
+            self._fold(history)
+
+    def _fold(self, history: List[Dict]):
+        keep_chars = self.token_budget * 4 * self.keep_share
+        cutoff, kept = len(self._steps), 0
+        while cutoff > self._folded and kept + len(self._steps[cutoff - 1]) <= keep_chars:
+            cutoff -= 1
+            kept += len(self._steps[cutoff])
+        # The most recent step always stays verbatim; progress checks read it.
+        cutoff = min(cutoff, len(self._steps) - 1)
+        for index in range(self._folded, cutoff):
+            self._digest_lines.append(self.compactor.digest_line(index + 1, history[index]))
+        self._folded = max(self._folded, cutoff)
+        self._digest = fit_recent_lines(self._digest_lines, int(self.token_budget * 4 * self.compactor.digest_share))
+
+    def reset(self):
+        self._steps, self._truncated, self._digest_lines, self._digest, self._folded = [], set(), [], "", 0
@@ -0,0 +1,81 @@
+# dawnyawn/agent/side_tasks.py
+import time
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List
+
+
+class SideTasks:
+    """
+    Runs the agent loop's bookkeeping (journal writes, output blob compression) on
+    one background thread, so it overlaps with the LLM and tool calls instead of
+    adding to every step. Tasks run one at a time in the order they were submitted;
+    none of them produces anything a prompt reads. What is on disk therefore lags
+    the loop by whatever is still queued, at most a step or so of writes.
+
+    The time saved is what the tasks took to run minus what the main thread spent
+    waiting for them, including the final drain(); it is only complete once drain()
+    has returned. With enabled=False every task runs inline and nothing is saved.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="side-task") if enabled else None
+        self._pending: List[Future] = []
+        # Written by the worker thread only.
+        self.busy_seconds = 0.0
+        # Written by the submitting thread only.
+        self.waited_seconds = 0.0
+
+    @property
+    def saved_seconds(self) -> float:
+        return self.busy_seconds - self.waited_seconds
+
+    def submit(self, fn: Callable, *args):
+        """
+        Queues fn(*args). A task that failed since the last call is re-raised here, so
+        errors still reach the agent loop, one step later than they would have.
+        """
+        self._raise_failures()
+        if self._executor is None:
+            started = time.perf_counter()
+            try:
+                fn(*args)
+            finally:
+                elapsed = time.perf_counter() - started
+                self.busy_seconds += elapsed
+                self.waited_seconds += elapsed
+            return
+        self._pending.append(self._executor.submit(self._run, fn, *args))
+
+    def _run(self, fn: Callable, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.busy_seconds += time.perf_counter() - started
+
+    def _raise_failures(self):
+        for i, future in enumerate(self._pending):
+            if future.done() and future.exception() is not None:
+                del self._pending[i]
+                raise future.exception()
+        self._pending = [future for future in self._pending if not future.done()]
+
+    def drain(self):
+        """Waits for every queued task. Failures are logged, not raised: the mission is ending anyway."""
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        started = time.perf_counter()
+        for future in pending:
+            error = future.exception()
+            if error is not None:
+                logging.error("A background task of the agent loop failed: %s", error,
+                              exc_info=(type(error), error, error.__traceback__))
+        self.waited_seconds += time.perf_counter() - started
+
+    def close(self):
+        self.drain()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
@@ -1,47 +1,96 @@
 # dawnyawn/agent/task_manager.py (Final Version with ToolManager Integration)
 import os
 import json
+import time
+import uuid
 import logging
-from openai import APITimeoutError
+import threading
+from contextlib import nullcontext
+from typing import Dict, Optional
+from config import (service_config, llm_timeout_error, COMBINED_STEP_DECISION, MAX_MISSION_STEPS,
+                    MISSION_JOURNAL_FSYNC, MISSION_JOURNAL_FSYNC_INTERVAL, MISSION_JOURNAL_SNAPSHOT_EVERY,
+                    PIPELINED_AGENT_LOOP)
+from agent.mission_journal import MissionJournal
+from agent.side_tasks import SideTasks
 from models.task_node import TaskNode, TaskStatus
 from reporting.report_generator import create_report
+from services.blob_store import BlobStore
+from services.mcp_client import McpClient, is_partial, mission_session
+from services.transport import endpoint_metrics
 
 # --- Constants ---
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 PROJECTS_DIR = os.path.join(PROJECT_ROOT, "Projects")
-SESSION_FILE = os.path.join(PROJECTS_DIR, "mission_session.json")
+# "ask" prompts on the console before resuming a session or executing a plan; "auto"
+# resumes and approves without asking, for unattended (batch) runs.
+APPROVAL_POLICIES = ("ask", "auto")
 
 
 class TaskManager:
     """Orchestrates the agent's lifecycle with dynamic plan status updates."""
 
-    def __init__(self, goal: str):
+    def __init__(self, goal: str, projects_dir: str = PROJECTS_DIR, max_steps: int = MAX_MISSION_STEPS,
+                 approval_policy: str = "ask", time_budgets: Optional[Dict[str, float]] = None):
         from agent.agent_scheduler import AgentScheduler
         from agent.thought_engine import ThoughtEngine
         from tools.tool_manager import ToolManager
 
         self.goal = goal
+        # Where this mission's state, output blobs and reports are written.
+        self.projects_dir = projects_dir
+        self.max_steps = max_steps
+        if approval_policy not in APPROVAL_POLICIES:
+            raise ValueError(f"Unknown approval policy '{approval_policy}'. Use one of {APPROVAL_POLICIES}.")
+        self.approval_policy = approval_policy
+        # How the mission ended: finished, step_limit, plan_failed, plan_rejected or aborted.
+        self.status = "not_started"
+        # Wall-clock seconds of each executed step (action choice, execution and assessment).
+        self.step_durations: list[float] = []
+        # Seconds of bookkeeping that overlapped with LLM and tool calls instead of adding to them
+        # (see SideTasks.saved_seconds); set when the mission ends.
+        self.overlap_saved_seconds = 0.0
+        self.report_path = None
         self.plan: list[TaskNode] = []
         self.mission_history = []
+        # Identifies this run's persistent container on the execution server.
+        self.session_id = f"mission-{uuid.uuid4().hex[:12]}"
         self.scheduler = AgentScheduler()
         # --- FIX: Create and store the ToolManager instance ---
-        self.tool_manager = ToolManager()
-        self.thought_engine = ThoughtEngine(self.tool_manager)
-        os.makedirs(PROJECTS_DIR, exist_ok=True)
+        # time_budgets overrides tools' time budgets (seconds, by tool name) for this mission.
+        self.tool_manager = ToolManager(time_budgets=time_budgets)
+        os.makedirs(projects_dir, exist_ok=True)
+        # Raw tool outputs are stored once here; history entries only reference them.
+        self.blob_store = BlobStore(os.path.join(projects_dir, "blobs"))
+        self.thought_engine = ThoughtEngine(self.tool_manager, self.blob_store)
+        self.journal = MissionJournal(projects_dir, fsync_policy=MISSION_JOURNAL_FSYNC,
+                                      fsync_interval=MISSION_JOURNAL_FSYNC_INTERVAL,
+                                      snapshot_every=MISSION_JOURNAL_SNAPSHOT_EVERY)
+        # What the journal already holds, so each save appends only what changed.
+        self._journaled_plan = None
+        self._journaled_steps = 0
+        self.side_tasks = SideTasks(enabled=PIPELINED_AGENT_LOOP)
+
+    def _confirm(self, question: str) -> bool:
+        """Asks the user a yes/no question, or answers yes under the 'auto' approval policy."""
+        if self.approval_policy == "auto":
+            logging.info("%s -> yes (approval policy: auto)", question)
+            return True
+        return input(f"\n{question} (y/n): ").lower() == 'y'
 
     def initialize_mission(self):
         """Asks user whether to resume an old mission or start a new one."""
-        if os.path.exists(SESSION_FILE):
-            resume = input("\nAn existing session file was found. Do you want to resume? (y/n): ").lower()
-            if resume != 'y':
-                os.remove(SESSION_FILE)
+        if self.journal.exists():
+            if not self._confirm("An existing session file was found. Do you want to resume?"):
+                self.journal.clear()
                 logging.info("Previous session file deleted. Starting a fresh mission.")
 
     def _update_plan_status(self):
         """Gets completed task IDs from the AI and updates the plan state."""
         logging.info("📝 Assessing plan progress based on recent actions...")
         completed_ids = self.thought_engine.get_completed_task_ids(self.goal, self.plan, self.mission_history)
+        self._apply_completed_ids(completed_ids)
 
+    def _apply_completed_ids(self, completed_ids):
         if not completed_ids:
             logging.info("  - No new tasks were marked as completed.")
             return
@@ -51,30 +100,93 @@ class TaskManager:
                 task.status = TaskStatus.COMPLETED
                 logging.info("  - Status Updated: Task %d is now COMPLETED.", task.task_id)
 
+    def _assess_step(self):
+        """
+        Updates the plan after a step. In combined mode this also returns the next action
+        chosen in the same LLM call; otherwise (or on fallback) it returns None and the
+        next action is chosen separately.
+        """
+        if COMBINED_STEP_DECISION:
+            decision = self.thought_engine.decide_step(self.goal, self.plan, self.mission_history)
+            if decision is not None:
+                self._apply_completed_ids(decision.completed_task_ids)
+                # Once everything is complete, let choose_next_action write the final summary.
+                if self.plan and all(task.status == TaskStatus.COMPLETED for task in self.plan):
+                    return None
+                return decision.next_action
+        self._update_plan_status()
+        return None
+
     def _save_state(self):
-        state = {"goal": self.goal, "plan": [task.model_dump() for task in self.plan],
-                 "mission_history": self.mission_history}
-        with open(SESSION_FILE, 'w', encoding='utf-8') as f: json.dump(state, f, indent=4)
-        logging.info("Mission state saved to session file.")
+        """
+        Takes a copy of the plan and hands the journal writes to the side tasks. When they run
+        in the background, the journal is only durable up to the writes that have left the queue.
+        """
+        plan_state = [task.model_dump() for task in self.plan]
+        self.side_tasks.submit(self._write_state, plan_state, self._journaled_plan, self._journaled_steps,
+                               len(self.mission_history))
+        self._journaled_plan = plan_state
+        self._journaled_steps = len(self.mission_history)
+
+    def _write_state(self, plan_state: list, journaled_plan: Optional[list], journaled_steps: int, steps: int):
+        # Steps are only ever appended, so the first 'steps' entries are as they were when saved.
+        history = self.mission_history[:steps]
+        if journaled_plan is None:
+            self.journal.start(self.goal, plan_state, history)
+        else:
+            if plan_state != journaled_plan:
+                self.journal.append_plan(plan_state)
+            for step in history[journaled_steps:]:
+                self.journal.append_step(step)
+            self.journal.maybe_snapshot(self.goal, plan_state, history)
+        logging.info("Mission state saved to session journal.")
 
     def _load_state(self):
-        if not os.path.exists(SESSION_FILE): return False
         try:
-            with open(SESSION_FILE, 'r', encoding='utf-8') as f:
-                state = json.load(f)
+            state = self.journal.load()
+            if state is None: return False
             if state.get("goal") != self.goal:
                 logging.warning("Session file goal does not match. Starting fresh.")
-                os.remove(SESSION_FILE)
+                self.journal.clear()
                 return False
             self.plan = [TaskNode(**task_data) for task_data in state.get("plan", [])]
             self.mission_history = state.get("mission_history", [])
+            self._journaled_plan = state.get("plan", [])
+            self._journaled_steps = len(self.mission_history)
             logging.info("Successfully loaded and resumed mission.")
             return True
-        except (json.JSONDecodeError, TypeError) as e:
-            logging.error("Failed to load session file. Starting fresh.", e)
+        except (json.JSONDecodeError, TypeError, KeyError) as e:
+            logging.error("Failed to load session file. Starting fresh: %s", e)
+            self.journal.clear()
             return False
 
     def run(self):
+        """Executes the mission, binding all of its commands to one execution session."""
+        session = mission_session(self.session_id) if service_config.PERSISTENT_SESSIONS else nullcontext()
+        warm_up = None
+        try:
+            with session:
+                if service_config.PERSISTENT_SESSIONS and self.side_tasks.enabled:
+                    # Have the server start the mission's container while the plan is being made. This
+                    # gets its own thread: a slow container start must not hold up the journal writes.
+                    warm_up = threading.Thread(target=McpClient().open_session, args=(self.session_id,),
+                                               name="session-warm-up", daemon=True)
+                    warm_up.start()
+                try:
+                    self._run_mission()
+                finally:
+                    if warm_up is not None:
+                        warm_up.join()  # Before the session is closed.
+        finally:
+            self.side_tasks.close()
+            self.overlap_saved_seconds = self.side_tasks.saved_seconds
+            if self.step_durations:
+                logging.info("Background bookkeeping saved %.3fs per step (%.2fs in total).",
+                             self.overlap_saved_seconds / len(self.step_durations), self.overlap_saved_seconds)
+            logging.info("Network usage by endpoint:")
+            endpoint_metrics.log_summary()
+
+    def _run_mission(self):
         """Executes the main Plan -> Execute loop for the agent's mission."""
         if not self._load_state():
             # PLANNING PHASE
@@ -83,64 +195,118 @@ class TaskManager:
                 self.plan = self.scheduler.create_plan(self.goal)
                 if not self.plan:
                     logging.error("Mission aborted: Agent failed to generate a valid plan.");
+                    self.status = "plan_failed"
                     return
                 logging.info("High-Level Plan Created:")
                 for task in self.plan: logging.info("  %d. %s", task.task_id, task.description)
-                if input("\nProceed with this plan? (y/n): ").lower() != 'y':
+                if not self._confirm("Proceed with this plan?"):
                     logging.info("Mission aborted by user.");
+                    self.status = "plan_rejected"
                     return
                 self._save_state()
-            except (APITimeoutError, KeyboardInterrupt) as e:
+            except (llm_timeout_error(), KeyboardInterrupt) as e:
                 logging.error("Mission aborted during planning phase: %s", e);
+                self.status = "aborted"
                 return
 
         # EXECUTION LOOP
         try:
+            next_action = None
             while True:
-                action = self.thought_engine.choose_next_action(self.goal, self.plan, self.mission_history)
+                step_started = time.monotonic()
+                action = next_action or self.thought_engine.choose_next_action(self.goal, self.plan, self.mission_history)
+                next_action = None
 
                 # Use the tool name defined in the manager for consistency
                 if action.tool_name == self.tool_manager.finish_mission_tool_name:
                     logging.info("AI has decided the mission is complete.");
                     self.mission_history.append({"command": "finish_mission", "observation": action.tool_input});
+                    self.status = "finished"
                     break
 
                 # --- MAJOR FIX: Use the ToolManager to execute the chosen tool ---
                 tool_to_execute = self.tool_manager.get_tool(action.tool_name)
 
+                cache_hit, cache_age = False, 0.0
+                tool_started = time.monotonic()
                 if not tool_to_execute:
                     logging.error("AI selected a non-existent tool: '%s'", action.tool_name)
                     observation = f"Error: The tool '{action.tool_name}' is not valid."
                     filename = None
                 else:
                     try:
-                        # Execute the tool and get the results
-                        filename, observation = tool_to_execute.execute(action.tool_input)
+                        # Execute the tool (or reuse an identical recent run) and get the results
+                        filename, observation, cache_hit, cache_age = self.tool_manager.execute_tool(
+                            tool_to_execute, action.tool_input)
                     except Exception as e:
                         logging.error("An exception occurred during tool execution for '%s': %s", action.tool_name, e,
                                       exc_info=True)
                         filename, observation = None, f"Tool '{action.tool_name}' failed with error: {e}"
 
-                if filename:
-                    local_filepath = os.path.join(PROJECTS_DIR, filename)
-                    with open(local_filepath, 'w', encoding='utf-8') as f:
-                        f.write(observation)
-                    logging.info("Observation saved to '%s'", local_filepath)
+                tool_seconds = time.monotonic() - tool_started
 
                 # Use the original tool input for the history log
-                self.mission_history.append(
-                    {"command": f"[{action.tool_name}] {action.tool_input}", "observation": observation})
-                self._update_plan_status()
+                history_entry = {"command": f"[{action.tool_name}] {action.tool_input}"}
+                if filename:
+                    # The raw output is stored once (a cache hit resolves to the same blob); the
+                    # entry keeps only its reference, plus the compact findings if the tool has a parser.
+                    history_entry["output"] = self.blob_store.put(observation, submit=self.side_tasks.submit)
+                    history_entry.update(self._structure_observation(tool_to_execute, history_entry["output"], observation))
+                else:
+                    history_entry["observation"] = observation
+                if filename and is_partial(observation):
+                    history_entry["note"] = (
+                        f"[PARTIAL RESULT: '{action.tool_name}' ran out of its "
+                        f"{tool_to_execute.time_budget_seconds:.0f}s time budget and was stopped; the output "
+                        f"below is incomplete. Narrow the input or choose a faster tool rather than retrying as is.]")
+                    history_entry["partial"] = True
+                if cache_hit:
+                    history_entry["note"] = (
+                        f"[CACHED RESULT: this exact request already ran {cache_age:.0f}s ago; the command was NOT "
+                        f"re-executed and the output below is reused.]")
+                    history_entry["cached"] = True
+                self.mission_history.append(history_entry)
+                next_action = self._assess_step()
+                # Timings go into the history (and so the journal) for the report's timing table.
+                history_entry["tool_seconds"] = round(tool_seconds, 3)
+                history_entry["seconds"] = round(time.monotonic() - step_started, 3)
                 self._save_state()
+                self.step_durations.append(time.monotonic() - step_started)
 
-                if len(self.mission_history) >= 20: logging.warning("Max step limit (20) reached."); break
-        except (APITimeoutError, KeyboardInterrupt) as e:
+                if len(self.mission_history) >= self.max_steps:
+                    logging.warning("Max step limit (%d) reached.", self.max_steps)
+                    self.status = "step_limit"
+                    break
+        except (llm_timeout_error(), KeyboardInterrupt) as e:
             logging.error("Mission aborted during execution loop: %s", e)
+            self.status = "aborted"
         finally:
+            # The report reads the stored outputs, and the journal must be complete before it is removed.
+            self.side_tasks.drain()
             self._generate_final_report()
-            if os.path.exists(SESSION_FILE): os.remove(SESSION_FILE); logging.info("Session file cleaned up.")
+            if self.journal.exists(): self.journal.clear(); logging.info("Session file cleaned up.")
+
+    def _structure_observation(self, tool, output_ref: dict, raw_output: str) -> dict:
+        """
+        Replaces a verbose raw observation with the tool's compact parsed findings.
+        The raw output stays in the blob store and is referenced by hash.
+        """
+        try:
+            parsed = tool.parse_output(raw_output)
+        except Exception as e:
+            logging.warning("Could not parse output of '%s': %s", tool.name, e)
+            return {}
+        if parsed is None:
+            return {}
+        parsed.raw_output_ref = f"blob {output_ref['hash'][:12]}"
+        compact = parsed.to_prompt_text()
+        logging.info("Parsed %d finding(s) from '%s' (%d -> %d chars).",
+                     len(parsed.findings), tool.name, len(raw_output), len(compact))
+        return {"observation": compact,
+                "findings": [finding.model_dump() for finding in parsed.findings]}
 
     def _generate_final_report(self):
         logging.info("Generating final mission report...")
         if not self.mission_history: logging.warning("No actions were taken, cannot generate a report."); return
-        create_report(self.goal, self.mission_history)
\ No newline at end of file
+        self.report_path = create_report(self.goal, self.mission_history, self.blob_store,
+                                         reports_dir=os.path.join(self.projects_dir, "Reports"))
\ No newline at end of file
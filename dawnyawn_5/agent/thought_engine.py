@@ -1,13 +1,21 @@
 # dawnyawn/agent/thought_engine.py (Final Version with Enhanced Logging and Smart Task Completion)
 import re
 import json
+import time
 import logging
 from pydantic import BaseModel
 from pydantic_core import ValidationError
-from config import get_llm_client, LLM_MODEL_NAME, LLM_REQUEST_TIMEOUT
+from config import (get_llm_client, LLM_MODEL_NAME, LLM_REQUEST_TIMEOUT, MAX_SUMMARY_INPUT_LENGTH,
+                    HISTORY_VERBATIM_STEPS, PROMPT_HISTORY_TOKEN_BUDGET, LLM_STREAMING, PROMPT_RETRIEVAL_ENABLED,
+                    PROMPT_RETRIEVAL_TOP_K, PROMPT_RETRIEVAL_TOKEN_BUDGET)
+from agent.history_compactor import HistoryCompactor, estimate_tokens
+from agent.json_extractor import IncrementalJsonExtractor
+from agent.observation_index import ObservationIndex
+from agent.prompt_layout import PromptLayout, prompt_cache_usage, shared_prefix_chars
 from tools.tool_manager import ToolManager
+from services.blob_store import BlobStore
 from models.task_node import TaskNode, TaskStatus
-from typing import List, Dict
+from typing import List, Dict, Optional, Type
 
 
 class ToolSelection(BaseModel):
@@ -19,6 +27,20 @@ class PlanUpdate(BaseModel):
     completed_task_ids: List[int]
 
 
+class StepDecision(BaseModel):
+    """Combined response: plan progress from the last observation plus the next action."""
+    completed_task_ids: List[int]
+    next_action: ToolSelection
+
+
+# Part of the shared system prompt; applies to plan updates and step decisions.
+_COMPLETION_CRITERIA = (
+    "**CRITICAL INSTRUCTION:** The output from one command (like a port scan) might contain all the information needed to complete subsequent 'analysis' tasks. "
+    "For example, if Task 1 is 'Scan the target' and Task 2 is 'Identify the web server', the output of the `nmap` scan for Task 1 likely contains the web server name, completing Task 2 at the same time.\n\n"
+    "**BE STRICT:** Only mark a task as complete if the observation explicitly and fully provides the information required by the task description. If a task requires an Nmap scan, the observation MUST contain Nmap results.\n\n"
+)
+
+
 def _clean_json_response(response_str: str) -> str:
     """Finds and extracts a JSON object from a string that might be wrapped in Markdown."""
     match = re.search(r'\{.*\}', response_str, re.DOTALL)
@@ -30,31 +52,183 @@ def _clean_json_response(response_str: str) -> str:
 class ThoughtEngine:
     """AI Reasoning component. Decides the next action and assesses plan status."""
 
-    def __init__(self, tool_manager: ToolManager):
-        self.client = get_llm_client()
+    def __init__(self, tool_manager: ToolManager, blob_store: Optional[BlobStore] = None):
+        self._client = None
         self.tool_manager = tool_manager
-        self.system_prompt_template = f"""
-You are an expert penetration tester and command-line AI. Your SOLE function is to output a single, valid JSON object that represents the next best command to execute.
+        # One entry per LLM call: its name, prompt size, time to first token and total time.
+        self.call_timings: List[Dict] = []
+        self.history_compactor = HistoryCompactor(
+            summary_input_chars=MAX_SUMMARY_INPUT_LENGTH,
+            blob_store=blob_store,
+        )
+        # Relevance index over observations, so requests carry the older findings that matter
+        # to the pending tasks in full, not just as truncated or condensed in the history.
+        self.observation_index = ObservationIndex(blob_store=blob_store) if PROMPT_RETRIEVAL_ENABLED else None
+        # Every call shares one system prompt and an append-only history, so the LLM server
+        # can reuse its KV cache for everything but the plan status and the request.
+        self.prompt_layout = PromptLayout(
+            self.history_compactor,
+            token_budget=PROMPT_HISTORY_TOKEN_BUDGET,
+            step_tokens=PROMPT_HISTORY_TOKEN_BUDGET // HISTORY_VERBATIM_STEPS,
+        )
+        self._previous_prompt = ""
+        self.system_prompt = f"""
+You are an expert penetration tester and command-line AI working through a mission one step at a time. Each request ends with a **REQUEST** section naming one of the response types below. Your SOLE function is to output a single, valid JSON object of that type.
 
 I. RESPONSE FORMATTING RULES (MANDATORY)
 1.  **JSON ONLY:** Your entire response MUST be a single JSON object. Do not add explanations or any other text.
-2.  **CORRECT SCHEMA:** The JSON object MUST have exactly two keys: `"tool_name"` and `"tool_input"`.
+2.  **CORRECT SCHEMA:** The JSON object MUST have exactly the keys of the requested type:
+    - NEXT ACTION: `"tool_name"` and `"tool_input"`.
+    - PLAN UPDATE: `"completed_task_ids"` (a list of integers).
+    - STEP DECISION: `"completed_task_ids"` (a list of integers) and `"next_action"` (an object with exactly two keys, `"tool_name"` and `"tool_input"`).
 3.  **STRING INPUT:** The value for `"tool_input"` MUST be a single string.
 
-II. STRATEGIC ANALYSIS & COMMAND RULES (HOW TO THINK)
+II. DECIDING WHICH TASKS ARE COMPLETE
+{_COMPLETION_CRITERIA}{self._strategy_and_tools_prompt()}"""
+
+    @property
+    def client(self):
+        """The LLM client; fetched on the first call rather than at construction."""
+        if self._client is None:
+            self._client = get_llm_client()
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    def _strategy_and_tools_prompt(self) -> str:
+        return f"""III. STRATEGIC ANALYSIS & COMMAND RULES (HOW TO THINK)
 1.  **FOCUS ON PENDING TASKS:** Look at the strategic plan and focus only on tasks with a 'PENDING' status.
 2.  **DO NOT REPEAT YOURSELF:** If you have already used a tool and it did not complete the task, DO NOT use that same tool with the same input again. Choose a different tool to make progress.
 3.  **Learn from Failures:** If a tool fails or provides no useful information for the current task, choose a different tool.
 4.  **Goal Completion:** Once all tasks in the plan are 'COMPLETED', you MUST use the `finish_mission` tool.
 
-III. AVAILABLE TOOLS:
+IV. AVAILABLE TOOLS:
 {self.tool_manager.get_tool_manifest()}
 """
 
+    def _chat(self, call_name: str, messages: List[Dict], schema: Optional[Type[BaseModel]] = None, **kwargs) -> str:
+        """
+        Sends a chat completion and logs the prompt size, prompt-cache reuse and latency of
+        the call. In streaming mode, 'schema' lets generation stop at the first complete JSON
+        object that validates.
+        """
+        if LLM_STREAMING:
+            return self._chat_streamed(call_name, messages, schema, **kwargs)
+        started = time.monotonic()
+        response = self.client.chat.completions.create(
+            model=LLM_MODEL_NAME,
+            messages=messages,
+            timeout=LLM_REQUEST_TIMEOUT,
+            **kwargs
+        )
+        total = time.monotonic() - started
+        self._record_call(call_name, messages, getattr(response, "usage", None), None, total)
+        return response.choices[0].message.content
+
+    def _chat_streamed(self, call_name: str, messages: List[Dict], schema: Optional[Type[BaseModel]], **kwargs) -> str:
+        """
+        Streams a chat completion, scanning the tokens for a balanced JSON object. Once one
+        validates against 'schema' (or, without a schema, parses as JSON), the stream is closed,
+        which aborts the rest of the generation on the server.
+        """
+        started = time.monotonic()
+        first_token_at = None
+        extractor = IncrementalJsonExtractor()
+        parts, result, usage = [], None, None
+        stream = self.client.chat.completions.create(
+            model=LLM_MODEL_NAME,
+            messages=messages,
+            timeout=LLM_REQUEST_TIMEOUT,
+            stream=True,
+            # Usage arrives in a final chunk, i.e. only for streams that are read to the end.
+            stream_options={"include_usage": True},
+            **kwargs
+        )
+        try:
+            for chunk in stream:
+                usage = getattr(chunk, "usage", None) or usage
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.monotonic()
+                parts.append(delta)
+                candidate = extractor.feed(delta)
+                while candidate is not None:
+                    try:
+                        schema.model_validate_json(candidate) if schema else json.loads(candidate)
+                        result = candidate
+                        break
+                    except (ValidationError, json.JSONDecodeError):
+                        candidate = extractor.feed("")  # Not the answer; look for a later object.
+                if result is not None:
+                    break
+        finally:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+        total = time.monotonic() - started
+        ttft = (first_token_at - started) if first_token_at is not None else total
+        self._record_call(call_name, messages, usage, ttft, total,
+                          ", stopped after complete JSON" if result is not None else "")
+        return result if result is not None else "".join(parts)
+
+    def _record_call(self, call_name: str, messages: List[Dict], usage, ttft: Optional[float], total: float,
+                     note: str = ""):
+        """
+        Logs and records one LLM call. 'shared_prefix' is the share of the prompt identical to
+        the previous call's, i.e. what a prefix-caching server could reuse; the usage figures
+        are what the server reports it evaluated (see prompt_cache_usage).
+        """
+        prompt = "\n".join(m["content"] for m in messages)
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        shared_prefix = shared_prefix_chars(prompt, self._previous_prompt) / len(prompt) if prompt else 0.0
+        self._previous_prompt = prompt
+        cache = prompt_cache_usage(usage, prompt_tokens)
+        self.call_timings.append({"call": call_name, "prompt_tokens": prompt_tokens, "shared_prefix": shared_prefix,
+                                  **cache, "ttft": ttft, "total": total})
+        server = ""
+        if cache["evaluated_tokens"] is not None:
+            server = f", server evaluated {cache['evaluated_tokens']} tokens"
+            if cache["cache_reuse"] is not None:
+                server += f" ({cache['cache_reuse']:.0%} cache reuse)"
+        timing = f"first token {ttft:.2f}s, total {total:.2f}s" if ttft is not None else f"latency {total:.2f}s"
+        logging.info("LLM call '%s': prompt %d chars (~%d tokens), %.0f%% shared prefix%s, %s%s",
+                     call_name, len(prompt), prompt_tokens, shared_prefix * 100, server, timing, note)
+
     def _format_plan(self, plan: List[TaskNode]) -> str:
         if not plan: return "No plan provided."
         return "\n".join([f"  - Task {task.task_id} [{task.status}]: {task.description}" for task in plan])
 
+    def _request(self, plan: List[TaskNode], history: List[Dict], title: str, instructions: str) -> str:
+        """
+        The volatile last message of a prompt: plan status, excerpts of the steps the history
+        no longer shows in full that match the PENDING tasks' descriptions (within their token
+        budget), then the request itself.
+        """
+        sections = [f"**Strategic Plan (current status):**\n{self._format_plan(plan)}"]
+        if self.observation_index is not None:
+            # Steps shown in full in the history would only be repeated.
+            self.prompt_layout.update(history)
+            abridged = self.prompt_layout.abridged_steps
+            query = " ".join(task.description for task in plan
+                             if task.status in (TaskStatus.PENDING, TaskStatus.RUNNING))
+            if abridged and query:
+                self.observation_index.update(history)
+                relevant = self.observation_index.render(query, PROMPT_RETRIEVAL_TOP_K, PROMPT_RETRIEVAL_TOKEN_BUDGET,
+                                                         steps=abridged)
+                if relevant:
+                    sections.append(f"**Earlier Steps (excerpts relevant to the pending tasks):**\n{relevant}")
+        sections.append(f"**REQUEST: {title}**\n{instructions}")
+        return "\n\n".join(sections)
+
+    def _messages(self, goal: str, plan: List[TaskNode], history: List[Dict], title: str,
+                  instructions: str) -> List[Dict]:
+        return self.prompt_layout.messages(self.system_prompt, goal, history,
+                                           self._request(plan, history, title, instructions))
+
     def _log_plan_status(self, plan: List[TaskNode]):
         """Logs the current status of all tasks for user visibility."""
         logging.info("--- Current Mission Status ---")
@@ -80,31 +254,25 @@ III. AVAILABLE TOOLS:
 
         if all_tasks_completed and plan:
             logging.info("✅ All plan tasks are complete. Forcing finish_mission.")
-            user_prompt = (
+            instructions = (
                 "CRITICAL: All tasks in the strategic plan are now marked as 'COMPLETED'.\n"
                 "You MUST now use the `finish_mission` tool.\n"
                 "Review the full execution history and provide a detailed, final summary of your findings as the `tool_input`.\n"
-                "Your response MUST be the required JSON object.\n\n"
-                f"**Main Goal:** {goal}\n\n"
-                f"**Execution History:**\n{json.dumps(history, indent=2)}"
+                "Your response MUST be the required JSON object."
             )
         else:
-            user_prompt = (
-                f"Based on the goal, plan, and history below, decide the single best tool to use next to progress on a PENDING task. Respond with a single, valid JSON object.\n\n"
-                f"**Main Goal:** {goal}\n\n"
-                f"**Strategic Plan:**\n{self._format_plan(plan)}\n\n"
-                f"**Execution History (most recent last):\n{json.dumps(history, indent=2)}"
+            instructions = (
+                "Based on the goal, plan, and history, decide the single best tool to use next to progress on a PENDING task. "
+                "Respond with a single, valid JSON object."
             )
         try:
-            response = self.client.chat.completions.create(
-                model=LLM_MODEL_NAME,
-                messages=[{"role": "system", "content": self.system_prompt_template},
-                          {"role": "user", "content": user_prompt}],
-                timeout=LLM_REQUEST_TIMEOUT,
+            raw_response = self._chat(
+                "choose_next_action",
+                self._messages(goal, plan, history, "NEXT ACTION", instructions),
+                schema=ToolSelection,
                 response_format={"type": "json_object"},
                 temperature=0.2
             )
-            raw_response = response.choices[0].message.content
             selection = ToolSelection.model_validate_json(_clean_json_response(raw_response))
 
             if all_tasks_completed and plan:
@@ -122,28 +290,21 @@ III. AVAILABLE TOOLS:
     def get_completed_task_ids(self, goal: str, plan: List[TaskNode], history: List[Dict]) -> List[int]:
         """Asks the AI to identify which tasks are complete based on the latest action."""
         # --- THE FIX: This prompt is now much stricter about analysis tasks ---
-        plan_update_prompt = (
-            "You are an expert project manager AI. Your job is to determine which tasks are now complete. "
-            "Review the strategic plan and the observation from the MOST RECENT command.\n\n"
-            "**CRITICAL INSTRUCTION:** The output from one command (like a port scan) might contain all the information needed to complete subsequent 'analysis' tasks. "
-            "For example, if Task 1 is 'Scan the target' and Task 2 is 'Identify the web server', the output of the `nmap` scan for Task 1 likely contains the web server name, completing Task 2 at the same time.\n\n"
-            "**BE STRICT:** Only mark a task as complete if the observation explicitly and fully provides the information required by the task description. If a task requires an Nmap scan, the observation MUST contain Nmap results.\n\n"
+        instructions = (
+            f"Determine which tasks are now complete, following the criteria in section II. Review the strategic plan "
+            f"and the observation from the MOST RECENT command (Step {len(history)} in the history).\n"
             "Identify ALL task IDs that are now fully completed by the last action's observation. "
             "Your response MUST be a single JSON object with one key: `\"completed_task_ids\"`, which is a list of integers. "
-            "Example: `{\"completed_task_ids\": [1, 2]}`. If no tasks were completed, return an empty list.\n\n"
-            f"**Strategic Plan:**\n{self._format_plan(plan)}\n\n"
-            f"**Most Recent Action & Observation:**\n{json.dumps(history[-1], indent=2) if history else 'No actions yet.'}"
+            "Example: `{\"completed_task_ids\": [1, 2]}`. If no tasks were completed, return an empty list."
         )
         try:
-            response = self.client.chat.completions.create(
-                model=LLM_MODEL_NAME,
-                messages=[{"role": "system", "content": "You are a JSON-only plan updating assistant."},
-                          {"role": "user", "content": plan_update_prompt}],
-                timeout=LLM_REQUEST_TIMEOUT,
+            raw_response = self._chat(
+                "get_completed_task_ids",
+                self._messages(goal, plan, history, "PLAN UPDATE", instructions),
+                schema=PlanUpdate,
                 response_format={"type": "json_object"},
                 temperature=0.0
             )
-            raw_response = response.choices[0].message.content
             update = PlanUpdate.model_validate_json(_clean_json_response(raw_response))
             # Log which tasks the AI has marked as complete
             if update.completed_task_ids:
@@ -153,4 +314,47 @@ III. AVAILABLE TOOLS:
             return update.completed_task_ids
         except (ValidationError, json.JSONDecodeError) as e:
             logging.error("AI failed to identify completed tasks with valid JSON: %s", e)
-            return []  # Return an empty list on failure
\ No newline at end of file
+            return []  # Return an empty list on failure
+
+    def decide_step(self, goal: str, plan: List[TaskNode], history: List[Dict]) -> Optional[StepDecision]:
+        """
+        Assesses plan progress from the most recent observation and chooses the next action
+        in a single LLM call. Returns None if the response fails validation, so the caller
+        can fall back to get_completed_task_ids + choose_next_action.
+        """
+        logging.info("🤔 Assessing progress and choosing the next step in one call...")
+        self._log_plan_status(plan)
+        instructions = (
+            "Do two things, in order, and respond with a single, valid JSON object.\n"
+            f"1. Determine which PENDING tasks in the strategic plan are now fully completed by the MOST RECENT action's "
+            f"observation (Step {len(history)} in the history), following the criteria in section II.\n"
+            "2. Treating those tasks as COMPLETED, decide the single best tool to use next to progress on a remaining PENDING task. "
+            "If no PENDING tasks would remain, use `finish_mission` with a detailed, final summary of your findings as the `tool_input`.\n\n"
+            'Example: `{"completed_task_ids": [1], "next_action": {"tool_name": "whatweb_scan", "tool_input": "http://example.com"}}`'
+        )
+        try:
+            raw_response = self._chat(
+                "decide_step",
+                self._messages(goal, plan, history, "STEP DECISION", instructions),
+                schema=StepDecision,
+                response_format={"type": "json_object"},
+                temperature=0.2
+            )
+            decision = StepDecision.model_validate_json(_clean_json_response(raw_response))
+        except (ValidationError, json.JSONDecodeError) as e:
+            logging.warning("Combined step decision failed validation (%s). Falling back to two calls.", type(e).__name__)
+            return None
+
+        tool_name = decision.next_action.tool_name
+        if tool_name != self.tool_manager.finish_mission_tool_name and not self.tool_manager.get_tool(tool_name):
+            logging.warning("Combined step decision chose unknown tool '%s'. Falling back to two calls.", tool_name)
+            return None
+        known_ids = {task.task_id for task in plan}
+        unknown_ids = [task_id for task_id in decision.completed_task_ids if task_id not in known_ids]
+        if unknown_ids:
+            logging.warning("Ignoring unknown task IDs in step decision: %s", unknown_ids)
+            decision.completed_task_ids = [task_id for task_id in decision.completed_task_ids if task_id in known_ids]
+
+        logging.info("AI assessment: The last action completed Task IDs: %s", decision.completed_task_ids or "none")
+        logging.info(f"AI's Next Action: Using tool '{tool_name}' with input '{decision.next_action.tool_input}'")
+        return decision
@@ -0,0 +1,174 @@
+# dawnyawn/batch.py
+"""
+Runs many missions concurrently, one per goal, without console prompts.
+
+Every mission gets its own execution session and its own directory under
+Projects/batch_<time>/, so journals, output blobs and reports never collide.
+At the end a summary with per-mission results and aggregate throughput and
+latency is logged and written to the batch directory as summary.json.
+
+Usage:
+    python batch.py goals.txt --parallelism 4
+    python batch.py --targets hosts.txt --goal-template "Enumerate web services on {target}"
+"""
+import os
+import re
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from agent.task_manager import TaskManager, PROJECTS_DIR, APPROVAL_POLICIES
+from main import add_time_budget_argument, llm_configured, parse_time_budgets, setup_logging
+
+
+def read_lines(path: str) -> List[str]:
+    """Reads one entry per line, skipping blank lines and '#' comments."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def build_goals(goals_file: str = None, targets_file: str = None, goal_template: str = None) -> List[str]:
+    """Returns the goals listed in goals_file, or goal_template filled in with each target."""
+    if goals_file:
+        return read_lines(goals_file)
+    if "{target}" not in goal_template:
+        raise ValueError("The goal template must contain a '{target}' placeholder.")
+    return [goal_template.replace("{target}", target) for target in read_lines(targets_file)]
+
+
+def _slug(goal: str, max_length: int = 40) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", goal.lower()).strip("_")[:max_length] or "mission"
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def run_one(index: int, goal: str, mission_dir: str, approval_policy: str,
+            time_budgets: Optional[Dict[str, float]] = None) -> Dict:
+    """Runs a single mission to completion and returns its result row."""
+    logging.info("Mission %d starting: %s", index, goal)
+    started = time.monotonic()
+    result = {"index": index, "goal": goal, "directory": mission_dir}
+    try:
+        task_manager = TaskManager(goal=goal, projects_dir=mission_dir, approval_policy=approval_policy,
+                                   time_budgets=time_budgets)
+        task_manager.initialize_mission()
+        task_manager.run()
+        result.update(status=task_manager.status, steps=len(task_manager.step_durations),
+                      step_seconds=task_manager.step_durations, report=task_manager.report_path)
+    except Exception as e:
+        logging.error("Mission %d failed: %s", index, e, exc_info=True)
+        result.update(status="error", error=str(e), steps=0, step_seconds=[], report=None)
+    result["duration"] = time.monotonic() - started
+    logging.info("Mission %d %s after %d steps in %.1fs.", index, result["status"], result["steps"],
+                 result["duration"])
+    return result
+
+
+def run_batch(goals: List[str], batch_dir: str, parallelism: int, approval_policy: str = "auto",
+              time_budgets: Optional[Dict[str, float]] = None) -> Dict:
+    """Runs all goals with at most 'parallelism' missions at a time and summarizes the results."""
+    started = time.monotonic()
+    results = []
+    with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="mission") as executor:
+        futures = [executor.submit(run_one, i, goal, os.path.join(batch_dir, f"{i:03d}_{_slug(goal)}"),
+                                   approval_policy, time_budgets)
+                   for i, goal in enumerate(goals, start=1)]
+        try:
+            for future in as_completed(futures):
+                results.append(future.result())
+        except KeyboardInterrupt:
+            logging.warning("Interrupted: cancelling queued missions and waiting for running ones.")
+            executor.shutdown(wait=True, cancel_futures=True)
+            results = [f.result() for f in futures if f.done() and not f.cancelled()]
+    return summarize(sorted(results, key=lambda r: r["index"]), time.monotonic() - started, parallelism)
+
+
+def summarize(results: List[Dict], wall_seconds: float, parallelism: int) -> Dict:
+    """Aggregates mission results into throughput and latency figures."""
+    durations = [r["duration"] for r in results]
+    step_seconds = [s for r in results for s in r["step_seconds"]]
+    statuses: Dict[str, int] = {}
+    for r in results:
+        statuses[r["status"]] = statuses.get(r["status"], 0) + 1
+    return {
+        "parallelism": parallelism,
+        "missions": len(results),
+        "statuses": statuses,
+        "wall_seconds": round(wall_seconds, 2),
+        "missions_per_hour": round(len(results) / wall_seconds * 3600, 2) if wall_seconds else None,
+        "steps": len(step_seconds),
+        "steps_per_second": round(len(step_seconds) / wall_seconds, 3) if wall_seconds else None,
+        "mission_seconds": {
+            "mean": round(sum(durations) / len(durations), 2),
+            "p50": round(_percentile(durations, 0.5), 2),
+            "p95": round(_percentile(durations, 0.95), 2),
+        } if durations else None,
+        "mean_step_seconds": round(sum(step_seconds) / len(step_seconds), 3) if step_seconds else None,
+        "results": [{k: v for k, v in r.items() if k != "step_seconds"} for r in results],
+    }
+
+
+def log_summary(summary: Dict):
+    logging.info("--- Batch Summary ---")
+    for r in summary["results"]:
+        logging.info("  %03d %-13s %3d steps %8.1fs  %s", r["index"], r["status"], r["steps"], r["duration"],
+                     r["report"] or r["directory"])
+    latency = summary["mission_seconds"] or {}
+    logging.info("%d missions in %.1fs (parallelism %d): %s missions/hour, %s steps/s; "
+                 "mission time mean %ss, p50 %ss, p95 %ss; mean step %ss.",
+                 summary["missions"], summary["wall_seconds"], summary["parallelism"], summary["missions_per_hour"],
+                 summary["steps_per_second"], latency.get("mean"), latency.get("p50"), latency.get("p95"),
+                 summary["mean_step_seconds"])
+
+
+def main():
+    setup_logging('batch_run.log', "%(asctime)s [%(levelname)s] [%(threadName)s] [%(name)s] - %(message)s")
+    load_dotenv()
+    if not llm_configured():
+        return
+
+    parser = argparse.ArgumentParser(description="Run several DawnYawn missions concurrently.")
+    parser.add_argument("goals_file", nargs="?", help="File with one goal per line ('#' starts a comment).")
+    parser.add_argument("--targets", help="File with one target per line, used with --goal-template.")
+    parser.add_argument("--goal-template", help="Goal text with a '{target}' placeholder.")
+    parser.add_argument("--parallelism", type=int, default=2, help="Missions to run at the same time.")
+    parser.add_argument("--approval-policy", choices=APPROVAL_POLICIES, default="auto",
+                        help="'auto' approves plans without asking; 'ask' prompts on the console.")
+    add_time_budget_argument(parser)
+    args = parser.parse_args()
+    if bool(args.goals_file) == bool(args.targets) or bool(args.targets) != bool(args.goal_template):
+        parser.error("give either a goals file, or --targets together with --goal-template")
+    if args.parallelism < 1:
+        parser.error("--parallelism must be at least 1")
+    try:
+        time_budgets = parse_time_budgets(args.time_budget)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    goals = build_goals(args.goals_file, args.targets, args.goal_template)
+    if not goals:
+        logging.critical("No goals to run.")
+        return
+    batch_dir = os.path.join(PROJECTS_DIR, f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    logging.info("--- DawnYawn Batch: %d missions, parallelism %d, directory %s ---",
+                 len(goals), args.parallelism, batch_dir)
+    logging.warning("SECURITY WARNING: This agent executes AI-generated commands on a remote server.")
+
+    summary = run_batch(goals, batch_dir, args.parallelism, args.approval_policy, time_budgets)
+    os.makedirs(batch_dir, exist_ok=True)
+    with open(os.path.join(batch_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    log_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# dawnyawn/benchmarks/agent_loop.py
+"""
+Offline end-to-end benchmark of the agent loop (TaskManager.run): planning, prompt
+construction, tool execution bookkeeping, state saving and report generation, with
+a scripted local LLM server and an in-process fake McpClient. Reports throughput,
+per-phase time, agent overhead per step and memory for missions of several lengths,
+and writes the results as JSON so runs can be compared across commits.
+
+Usage, from the dawnyawn_5 directory:
+    python -m benchmarks.agent_loop
+    python -m benchmarks.agent_loop --steps 20 200 --output-chars 20000 --llm-latency 0.05
+    python -m benchmarks.agent_loop --sequential   # bookkeeping on the critical path, for comparison
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from contextlib import ExitStack, redirect_stdout
+from datetime import datetime
+from typing import Dict, List, Optional
+from unittest import mock
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+# Benchmarks talk to the scripted server only, never to a real LLM or a recorded cassette.
+os.environ.setdefault("OLLAMA_API_KEY", "benchmark")
+os.environ.setdefault("LLM_MODEL", "benchmark-model")
+os.environ["LLM_CASSETTE_MODE"] = "off"
+
+from openai import OpenAI
+from agent import task_manager as task_manager_module
+from agent.task_manager import TaskManager
+from config import service_config
+from services.transport import InstrumentedLLMClient
+from benchmarks.fake_llm_server import ScriptedLLMServer
+from benchmarks.fake_mcp_client import FakeMcpClient
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+RESULTS_DIR = os.path.join(PROJECT_ROOT, "benchmarks", "results")
+GOAL = "Benchmark: enumerate services and web content on the 10.0.0.0/16 lab network"
+
+
+class PhaseTimer:
+    """Accumulates wall time spent in wrapped methods, per phase name."""
+
+    def __init__(self):
+        self.totals: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+
+    def wrap(self, obj, method_name: str, phase: str = None):
+        phase = phase or method_name
+        original = getattr(obj, method_name)
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.totals[phase] = self.totals.get(phase, 0.0) + time.perf_counter() - started
+                self.calls[phase] = self.calls.get(phase, 0) + 1
+
+        setattr(obj, method_name, timed)
+
+    def report(self) -> Dict[str, Dict]:
+        return {phase: {"total_seconds": round(total, 4), "calls": self.calls[phase],
+                        "avg_ms": round(total / self.calls[phase] * 1000, 3)}
+                for phase, total in self.totals.items()}
+
+
+def _directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def run_mission(steps: int, server: ScriptedLLMServer, output_chars: int = 4000, tool_latency: float = 0.0,
+                workdir: str = None, trace_memory: bool = True, pipelined: bool = True) -> Dict:
+    """
+    Runs one mission of 'steps' steps against the scripted server and returns its measurements.
+    pipelined=False runs the loop's bookkeeping inline, as part of each step.
+    """
+    workdir = workdir or tempfile.mkdtemp(prefix="dawnyawn_bench_")
+    client = InstrumentedLLMClient(OpenAI(base_url=server.base_url, api_key="benchmark"))
+    fake_client = FakeMcpClient(output_chars=output_chars, latency=tool_latency)
+    timer = PhaseTimer()
+    requests_before, prompt_chars_before = server.requests, server.prompt_chars
+
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.object(service_config, "PERSISTENT_SESSIONS", False))
+        stack.enter_context(mock.patch.object(task_manager_module, "PIPELINED_AGENT_LOOP", pipelined))
+        stack.enter_context(redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+
+        task_manager = TaskManager(GOAL, projects_dir=workdir, max_steps=steps, approval_policy="auto")
+        task_manager.scheduler.client = task_manager.thought_engine.client = client
+        for tool in task_manager.tool_manager.tools.values():
+            tool.mcp_client = fake_client
+        timer.wrap(task_manager.thought_engine, "choose_next_action")
+        timer.wrap(task_manager, "_assess_step", "assess_step")
+        timer.wrap(task_manager.tool_manager, "execute_tool", "tool_execution")
+        timer.wrap(task_manager, "_save_state", "save_state")
+        timer.wrap(task_manager, "_generate_final_report", "final_report")
+        setup_seconds = time.perf_counter() - started
+
+        task_manager.run()
+        wall_seconds = time.perf_counter() - started
+        peak_traced = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+
+    executed = len(task_manager.mission_history)
+    llm_calls = task_manager.thought_engine.call_timings
+    llm_seconds = sum(call["total"] for call in llm_calls)
+    tool_seconds = timer.totals.get("tool_execution", 0.0)
+    requests = server.requests - requests_before
+    return {
+        "steps_requested": steps,
+        "pipelined": pipelined,
+        "steps_executed": executed,
+        "wall_seconds": round(wall_seconds, 4),
+        "steps_per_second": round(executed / wall_seconds, 3) if wall_seconds else None,
+        "setup_seconds": round(setup_seconds, 4),
+        "phases": timer.report(),
+        "llm": {
+            "requests": requests,
+            "seconds": round(llm_seconds, 4),
+            "avg_prompt_chars": round((server.prompt_chars - prompt_chars_before) / requests) if requests else 0,
+            "max_prompt_tokens_estimate": max((call["prompt_tokens"] for call in llm_calls), default=0),
+            # Share of each prompt identical to the previous one, and what the server reported as cached.
+            "mean_shared_prefix": _mean(call["shared_prefix"] for call in llm_calls),
+            "mean_cache_reuse": _mean(call["cache_reuse"] for call in llm_calls if call["cache_reuse"] is not None),
+        },
+        # Time the agent itself spends per step, excluding LLM calls and the fake tool's latency.
+        "agent_overhead_ms_per_step": round((wall_seconds - llm_seconds - tool_seconds) / executed * 1000, 3)
+        if executed else None,
+        # Bookkeeping time per step taken off the critical path by running it in the background.
+        "overlap_saved_ms_per_step": round(task_manager.overlap_saved_seconds / executed * 1000, 3)
+        if executed else None,
+        "peak_traced_memory_mb": round(peak_traced / 2 ** 20, 2) if peak_traced is not None else None,
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1) if resource else None,
+        "disk_bytes": _directory_size(workdir),
+    }
+
+
+def _mean(values) -> Optional[float]:
+    values = list(values)
+    return round(sum(values) / len(values), 3) if values else None
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_suite(step_counts: List[int], output_chars: int, tool_latency: float, llm_latency: float,
+              trace_memory: bool = True, pipelined: bool = True) -> Dict:
+    runs = []
+    with ScriptedLLMServer(latency=llm_latency) as server:
+        for steps in step_counts:
+            workdir = tempfile.mkdtemp(prefix="dawnyawn_bench_")
+            try:
+                runs.append(run_mission(steps, server, output_chars, tool_latency, workdir, trace_memory, pipelined))
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "benchmark": "agent_loop",
+        "git_commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {"output_chars": output_chars, "tool_latency": tool_latency, "llm_latency": llm_latency,
+                       "trace_memory": trace_memory, "pipelined": pipelined},
+        "runs": runs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the DawnYawn agent loop.")
+    parser.add_argument("--steps", type=int, nargs="+", default=[20, 200, 2000], help="Mission lengths to run.")
+    parser.add_argument("--output-chars", type=int, default=4000, help="Size of each fake tool output.")
+    parser.add_argument("--tool-latency", type=float, default=0.0, help="Seconds each fake tool call takes.")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds each scripted LLM answer takes.")
+    parser.add_argument("--no-trace-memory", action="store_true",
+                        help="Skip tracemalloc (it slows Python code down noticeably).")
+    parser.add_argument("--sequential", action="store_true",
+                        help="Run the loop's bookkeeping inline instead of in the background.")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/agent_loop_<time>_<commit>.json).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] - %(message)s")
+    results = run_suite(args.steps, args.output_chars, args.tool_latency, args.llm_latency,
+                        trace_memory=not args.no_trace_memory, pipelined=not args.sequential)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"agent_loop_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{results['git_commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{'steps':>6} {'wall s':>9} {'steps/s':>9} {'overhead ms/step':>17} {'avg prompt chars':>17} "
+          f"{'cache reuse':>12} {'saved ms/step':>14} {'peak MB':>8}")
+    for run in results["runs"]:
+        reuse = run["llm"]["mean_cache_reuse"]
+        saved = run["overlap_saved_ms_per_step"]
+        print(f"{run['steps_executed']:>6} {run['wall_seconds']:>9.2f} {run['steps_per_second']:>9.1f} "
+              f"{run['agent_overhead_ms_per_step']:>17.2f} {run['llm']['avg_prompt_chars']:>17} "
+              f"{f'{reuse:.0%}' if reuse is not None else '-':>12} "
+              f"{f'{saved:.2f}' if saved is not None else '-':>14} "
+              f"{run['peak_traced_memory_mb'] if run['peak_traced_memory_mb'] is not None else '-':>8}")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
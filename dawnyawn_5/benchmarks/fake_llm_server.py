@@ -0,0 +1,151 @@
+# dawnyawn/benchmarks/fake_llm_server.py
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+from agent.prompt_layout import shared_prefix_chars
+
+# (tool_name, input template) pairs the scripted model cycles through; {n} makes every input unique,
+# so the tool result cache does not short-circuit the benchmark.
+DEFAULT_SCRIPT: List[Tuple[str, str]] = [
+    ("nmap_scan", "10.0.{a}.{b}"),
+    ("fetch_web_content", "http://host{n}.bench.local/"),
+    ("gobuster_web_scan", "http://host{n}.bench.local"),
+    ("whatweb_scan", "http://host{n}.bench.local"),
+    ("dns_lookup", "host{n}.bench.local"),
+    ("nikto_web_vuln_scan", "http://host{n}.bench.local"),
+]
+
+PLAN_TEXT = ("1. Scan the target network for open ports and services.\n"
+             "2. Enumerate web content on every discovered web server.\n"
+             "3. Identify vulnerabilities in the discovered services.\n")
+
+
+class ScriptedLLMServer:
+    """
+    A local OpenAI-compatible chat completions endpoint with scripted answers, so the
+    agent loop can be benchmarked offline. It returns a plan for planning requests, an
+    empty plan update for progress checks, and cycles through DEFAULT_SCRIPT for action
+    requests; it never finishes the mission, so missions run to their step limit.
+    Supports streamed responses and an artificial per-request latency. Usage reports
+    mimic a server with a single-slot prompt cache: the prompt prefix shared with the
+    previous request is reported as cached tokens (~4 characters per token).
+    """
+
+    def __init__(self, latency: float = 0.0, script: List[Tuple[str, str]] = None, record_prompts: bool = False):
+        self.latency = latency
+        self.script = script or DEFAULT_SCRIPT
+        self.requests = 0
+        self.prompt_chars = 0
+        # Every request's full prompt, in order, if record_prompts is set (off by default: long
+        # benchmark runs would otherwise hold every prompt in memory).
+        self.record_prompts = record_prompts
+        self.prompts: List[str] = []
+        self._actions = 0
+        self._previous_prompt = ""
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}/v1"
+
+    def start(self) -> "ScriptedLLMServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def answer(self, body: Dict) -> Tuple[str, Dict]:
+        """Returns the scripted content for a request and its usage report."""
+        messages = body.get("messages", [])
+        request = messages[-1]["content"] if messages else ""
+        prompt = "\n".join(m["content"] for m in messages)
+        with self._lock:
+            self.requests += 1
+            self.prompt_chars += len(prompt)
+            if self.record_prompts:
+                self.prompts.append(prompt)
+            cached = shared_prefix_chars(prompt, self._previous_prompt)
+            self._previous_prompt = prompt
+            usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": 0, "total_tokens": len(prompt) // 4,
+                     "prompt_tokens_details": {"cached_tokens": cached // 4}}
+            if "response_format" not in body:
+                return PLAN_TEXT, usage
+            if '"completed_task_ids"' in request and '"next_action"' not in request:  # A progress check.
+                return json.dumps({"completed_task_ids": []}), usage
+            n = self._actions
+            self._actions += 1
+        tool_name, template = self.script[n % len(self.script)]
+        action = {"tool_name": tool_name, "tool_input": template.format(n=n, a=n // 250 % 250, b=n % 250)}
+        if '"next_action"' in request:  # The combined step-decision prompt.
+            return json.dumps({"completed_task_ids": [], "next_action": action}), usage
+        return json.dumps(action), usage
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; don't let Nagle delay the body.
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                content, usage = server.answer(body)
+                if server.latency:
+                    time.sleep(server.latency)
+                if body.get("stream"):
+                    self._send_stream(content, usage if (body.get("stream_options") or {}).get("include_usage") else None)
+                else:
+                    self._send_json({
+                        "id": f"bench-{server.requests}", "object": "chat.completion", "created": 0,
+                        "model": body.get("model") or "bench",
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": content}}],
+                        "usage": usage,
+                    })
+
+            def _send_json(self, payload: Dict):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, content: str, usage: Dict = None, chunk_chars: int = 8):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                pieces = [content[i:i + chunk_chars] for i in range(0, len(content), chunk_chars)]
+                try:
+                    for piece in pieces:
+                        chunk = {"id": "bench", "object": "chat.completion.chunk", "created": 0, "model": "bench",
+                                 "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    if usage:
+                        chunk = {"id": "bench", "object": "chat.completion.chunk", "created": 0, "model": "bench",
+                                 "choices": [], "usage": usage}
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.write(b"data: [DONE]\n\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client closed the stream early, as the streaming mode does.
+                self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
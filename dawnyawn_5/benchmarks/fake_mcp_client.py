@@ -0,0 +1,59 @@
+# dawnyawn/benchmarks/fake_mcp_client.py
+import time
+import uuid
+import zlib
+from typing import Optional, Tuple
+
+
+class FakeMcpClient:
+    """
+    An in-process stand-in for McpClient that returns synthetic tool output of a
+    configurable size after a configurable latency, without an execution server.
+    Output is deterministic per command and shaped like the real tool's output
+    (Nmap XML, result lines), so the tool parsers do realistic work.
+    """
+
+    def __init__(self, output_chars: int = 4000, latency: float = 0.0):
+        self.output_chars = output_chars
+        self.latency = latency
+        self.commands = 0
+
+    def execute_command(self, command: str, timeout: Optional[float] = None) -> Tuple[str, str]:
+        self.commands += 1
+        if self.latency:
+            time.sleep(self.latency)
+        filename = f"{command.split()[0]}_{uuid.uuid4().hex[:6]}.txt"
+        return filename, self._output_for(command)
+
+    def open_session(self, session_id: str) -> bool:
+        return True
+
+    def close_session(self, session_id: str) -> bool:
+        return True
+
+    def _output_for(self, command: str) -> str:
+        seed = zlib.crc32(command.encode("utf-8"))
+        if command.startswith("nmap"):
+            return self._nmap_xml(command.split()[-1], seed)
+        lines, size, i = [], 0, 0
+        while size < self.output_chars:
+            line = (f"/path{(seed + i) % 9973} (Status: {200 if i % 3 else 301}) [Size: {(seed * (i + 1)) % 50000}] "
+                    f"+ OSVDB-{(seed + i) % 7919}: entry {i} of {command[:60]}")
+            lines.append(line)
+            size += len(line) + 1
+            i += 1
+        return "\n".join(lines)[:self.output_chars]
+
+    def _nmap_xml(self, host: str, seed: int) -> str:
+        ports, size = [], 0
+        port = 20
+        # Roughly one <port> element per 200 characters of requested output.
+        while size < self.output_chars:
+            port += 1 + (seed + port) % 97
+            element = (f'<port protocol="tcp" portid="{port}"><state state="open"/>'
+                       f'<service name="svc{port % 50}" product="Product {port % 13}" version="{port % 7}.{port % 10}"/>'
+                       f'</port>')
+            ports.append(element)
+            size += len(element) + 40
+        return ('<?xml version="1.0"?><nmaprun><host><status state="up"/>'
+                f'<address addr="{host}" addrtype="ipv4"/><ports>{"".join(ports)}</ports></host></nmaprun>')
@@ -0,0 +1,129 @@
+# dawnyawn/benchmarks/startup.py
+"""
+Startup benchmark: runs short scenarios in fresh interpreters with '-X importtime' and
+reports each one's wall time, total import time, the slowest imports, and whether
+openai and the tool modules were imported. Scenarios that build a TaskManager run
+with a cold and then a warm tool manifest cache.
+
+Usage, from the dawnyawn_5 directory:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --repeat 5 --top 15
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Dict, List
+
+from benchmarks.agent_loop import PROJECT_ROOT, RESULTS_DIR, _git_commit
+
+# name -> code run in a fresh interpreter
+SCENARIOS: Dict[str, str] = {
+    "import_config": "import config",
+    "import_task_manager": "import agent.task_manager",
+    "create_task_manager": ("import tempfile\n"
+                            "from agent.task_manager import TaskManager\n"
+                            "TaskManager('startup benchmark', projects_dir=tempfile.mkdtemp())"),
+    "first_tool_lookup": ("import tempfile\n"
+                          "from agent.task_manager import TaskManager\n"
+                          "TaskManager('startup benchmark', projects_dir=tempfile.mkdtemp())"
+                          ".tool_manager.get_tool('nmap_scan')"),
+}
+# Modules whose presence after a scenario shows whether a deferred import happened anyway.
+WATCHED_MODULES = ("openai", "tools.nmap_tool", "tools.metasploit_tool")
+
+# "import time: self [us] | cumulative | imported package"
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Top-level imports and all imports, with self and cumulative microseconds."""
+    imports = []
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            imports.append({"module": match.group(4), "self_us": int(match.group(1)),
+                            "cumulative_us": int(match.group(2)), "depth": (len(match.group(3)) - 1) // 2})
+    return imports
+
+
+def run_scenario(code: str, manifest_cache: str) -> Dict:
+    probe = f"{code}\nimport sys\nprint('WATCHED=' + ','.join(m for m in {WATCHED_MODULES!r} if m in sys.modules))"
+    env = dict(os.environ, TOOL_MANIFEST_CACHE=manifest_cache, OLLAMA_API_KEY=os.getenv("OLLAMA_API_KEY", "x"))
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], cwd=PROJECT_ROOT, env=env,
+                               capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - started
+    imports = parse_importtime(completed.stderr)
+    watched = completed.stdout.rsplit("WATCHED=", 1)[-1].strip()
+    return {
+        "wall_ms": wall * 1000,
+        "import_ms": sum(i["cumulative_us"] for i in imports if i["depth"] == 0) / 1000,
+        "imports": imports,
+        "loaded": [m for m in watched.split(",") if m],
+    }
+
+
+def benchmark(repeat: int, top: int) -> Dict:
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="dawnyawn_startup_") as cache_dir:
+        for name, code in SCENARIOS.items():
+            variants = {"": None}
+            if "TaskManager(" in code:
+                variants = {"_cold_cache": "cold", "_warm_cache": "warm"}
+            for suffix, cache_state in variants.items():
+                runs = []
+                for i in range(repeat):
+                    cache = os.path.join(cache_dir, f"{name}.json")
+                    if cache_state == "cold" and os.path.exists(cache):
+                        os.remove(cache)
+                    if cache_state == "warm" and i == 0 and not os.path.exists(cache):
+                        run_scenario(code, cache)  # Populate the cache before timing.
+                    runs.append(run_scenario(code, cache))
+                slowest = sorted(runs[-1]["imports"], key=lambda i: i["self_us"], reverse=True)[:top]
+                results[name + suffix] = {
+                    "wall_ms": round(statistics.median(r["wall_ms"] for r in runs), 1),
+                    "import_ms": round(statistics.median(r["import_ms"] for r in runs), 1),
+                    "loaded": runs[-1]["loaded"],
+                    "slowest_imports": [{"module": i["module"], "self_ms": round(i["self_us"] / 1000, 2)}
+                                        for i in slowest],
+                }
+    return {
+        "benchmark": "startup",
+        "git_commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "repeat": repeat,
+        "scenarios": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup and import-time benchmark for DawnYawn.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario; medians are reported.")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports listed per scenario.")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/startup_<time>_<commit>.json).")
+    args = parser.parse_args()
+
+    results = benchmark(args.repeat, args.top)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"startup_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{results['git_commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{'scenario':<32} {'wall ms':>9} {'import ms':>10}  loaded")
+    for name, scenario in results["scenarios"].items():
+        print(f"{name:<32} {scenario['wall_ms']:>9.1f} {scenario['import_ms']:>10.1f}  "
+              f"{', '.join(scenario['loaded']) or '-'}")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
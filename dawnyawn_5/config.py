@@ -1,19 +1,81 @@
 # dawnyawn/config.py
 import os
-from openai import OpenAI
+import threading
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
 
+if TYPE_CHECKING:
+    from openai import OpenAI
+
 load_dotenv()
 
+# --- LLM Record/Replay ---
+# "off" (default), "record" (store every LLM response) or "replay" (serve stored responses offline)
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off").lower()
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                "Projects", "llm_cassette.jsonl"))
+# In replay mode, sleep for the recorded latency multiplied by this factor (0 = no delay)
+LLM_CASSETTE_LATENCY_SCALE = float(os.getenv("LLM_CASSETTE_LATENCY_SCALE", "0"))
+
+
+# --- Shared HTTP Transport (see services/transport.py) ---
+# Keep-alive connections kept per host
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+# Retries for transient failures (LLM calls and idempotent execution-server calls)
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+# Jittered exponential backoff: random delay up to min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2^attempt)
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "8"))
+
+
 # --- Centralized LLM Client Configuration ---
-def get_llm_client() -> OpenAI:
+_llm_client = None
+_llm_client_lock = threading.Lock()
+
+
+def get_llm_client() -> "OpenAI":
+    """
+    Returns the process-wide LLM client. It is created once and shared by every caller,
+    so they all reuse one connection pool; calls are recorded in the shared endpoint metrics.
     """
-    Initializes and returns an OpenAI client configured for a local LLM server.
+    global _llm_client
+    with _llm_client_lock:
+        if _llm_client is None:
+            from services.transport import InstrumentedLLMClient
+            _llm_client = InstrumentedLLMClient(_create_llm_client())
+        return _llm_client
+
+
+def _create_llm_client():
     """
-    return OpenAI(
+    Initializes an OpenAI client configured for a local LLM server.
+    When LLM_CASSETTE_MODE is set, the client records or replays responses instead.
+    """
+    if LLM_CASSETTE_MODE == "replay":
+        from services.llm_cassette import CassetteLLMClient, get_cassette
+        return CassetteLLMClient(get_cassette(LLM_CASSETTE_PATH), "replay",
+                                 latency_scale=LLM_CASSETTE_LATENCY_SCALE)
+
+    # openai takes longer to import than the rest of the agent together; only pay for it here.
+    from openai import OpenAI
+    client = OpenAI(
         base_url=os.getenv("OLLAMA_BASE_URL"),
         api_key=os.getenv("OLLAMA_API_KEY"),
+        max_retries=HTTP_MAX_RETRIES,
     )
+    if LLM_CASSETTE_MODE == "record":
+        from services.llm_cassette import CassetteLLMClient, get_cassette
+        return CassetteLLMClient(get_cassette(LLM_CASSETTE_PATH), "record", inner_client=client)
+    return client
+
+
+def llm_timeout_error() -> type:
+    """
+    openai.APITimeoutError, imported on demand. Use it as 'except llm_timeout_error():'
+    (the expression is only evaluated when an exception is being matched).
+    """
+    from openai import APITimeoutError
+    return APITimeoutError
 
 LLM_MODEL_NAME = os.getenv("LLM_MODEL")
 
@@ -21,11 +83,90 @@ LLM_MODEL_NAME = os.getenv("LLM_MODEL")
 # Timeout for all LLM requests in seconds
 LLM_REQUEST_TIMEOUT = 600.0
 
-# Maximum summary
+# Stream LLM responses: stop generation as soon as a complete, valid JSON object has
+# arrived, and log time-to-first-token per call
+LLM_STREAMING = os.getenv("LLM_STREAMING", "false").lower() == "true"
+
+# Maximum summary: characters of one observation scanned when folding it into the history digest
 MAX_SUMMARY_INPUT_LENGTH = 5000
 
+# Each step is shown in the history with at most 1/HISTORY_VERBATIM_STEPS of the history
+# budget; longer observations are truncated in the middle
+HISTORY_VERBATIM_STEPS = 3
+
+# Approximate token budget for the execution history block of each prompt
+PROMPT_HISTORY_TOKEN_BUDGET = 6000
+
+# Add the parts of steps the history no longer shows in full (truncated, or condensed into
+# its digest) most relevant to the PENDING tasks (BM25 retrieval over indexed observations)
+# to every request
+PROMPT_RETRIEVAL_ENABLED = os.getenv("PROMPT_RETRIEVAL_ENABLED", "true").lower() == "true"
+
+# Retrieved chunks per prompt, and the approximate token budget they share
+PROMPT_RETRIEVAL_TOP_K = int(os.getenv("PROMPT_RETRIEVAL_TOP_K", "8"))
+PROMPT_RETRIEVAL_TOKEN_BUDGET = int(os.getenv("PROMPT_RETRIEVAL_TOKEN_BUDGET", "1500"))
+
+# Tool names and descriptions are cached here so startup does not import every tool
+# module to build the prompt's tool manifest. Empty disables the cache file.
+TOOL_MANIFEST_CACHE = os.getenv("TOOL_MANIFEST_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                     ".cache", "tool_manifest.json"))
+
+# Formats of the final mission report, any of: txt, md, json, html
+REPORT_FORMATS = [fmt.strip() for fmt in os.getenv("REPORT_FORMATS", "txt,md,json,html").split(",") if fmt.strip()]
+
+# Reuse results of identical tool runs within a mission (see BaseTool.cache_ttl_seconds)
+TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE_ENABLED", "true").lower() == "true"
+
+# Per-tool cache TTL overrides in seconds, e.g. TOOL_CACHE_TTLS="nmap_scan=600,ping_check=0"
+TOOL_CACHE_TTL_OVERRIDES = {
+    name.strip(): int(ttl)
+    for name, ttl in (item.split("=", 1) for item in os.getenv("TOOL_CACHE_TTLS", "").split(",") if "=" in item)
+}
+
+# Nmap scans of several hosts, a CIDR range or a port range are split into this many
+# shards that run in parallel containers (1 disables sharding)
+NMAP_SHARDS = int(os.getenv("NMAP_SHARDS", "4"))
+
+# Gobuster wordlist runs are split over up to this many parallel containers; the count
+# is chosen from measured throughput so each shard takes about GOBUSTER_TARGET_SHARD_SECONDS
+GOBUSTER_MAX_SHARDS = int(os.getenv("GOBUSTER_MAX_SHARDS", "4"))
+GOBUSTER_TARGET_SHARD_SECONDS = float(os.getenv("GOBUSTER_TARGET_SHARD_SECONDS", "60"))
+
+# Per-tool time budget overrides in seconds, e.g. TOOL_TIME_BUDGETS="nikto_web_vuln_scan=300,hydra_bruteforce=600"
+# (see BaseTool.time_budget_seconds). A command that runs out of budget is stopped and its partial output kept.
+TOOL_TIME_BUDGET_OVERRIDES = {
+    name.strip(): float(seconds)
+    for name, seconds in (item.split("=", 1) for item in os.getenv("TOOL_TIME_BUDGETS", "").split(",") if "=" in item)
+}
+
+# A mission stops after this many executed steps
+MAX_MISSION_STEPS = int(os.getenv("MAX_MISSION_STEPS", "20"))
+
+# Assess plan progress and choose the next action in one LLM call per step instead of two
+COMBINED_STEP_DECISION = os.getenv("COMBINED_STEP_DECISION", "false").lower() == "true"
+
+# Run the agent loop's bookkeeping (journal writes, output compression) on a background
+# thread, overlapped with LLM and tool calls, and start the execution session's container
+# while the plan is made. The journal on disk then lags the loop by whatever writes are
+# still queued, whatever MISSION_JOURNAL_FSYNC says.
+PIPELINED_AGENT_LOOP = os.getenv("PIPELINED_AGENT_LOOP", "true").lower() == "true"
+
+# Mission state journal: "always" fsyncs every record, "interval" at most every
+# MISSION_JOURNAL_FSYNC_INTERVAL seconds, "never" leaves flushing to the OS.
+MISSION_JOURNAL_FSYNC = os.getenv("MISSION_JOURNAL_FSYNC", "always").lower()
+MISSION_JOURNAL_FSYNC_INTERVAL = float(os.getenv("MISSION_JOURNAL_FSYNC_INTERVAL", "5"))
+# Journal records written before they are compacted into a snapshot
+MISSION_JOURNAL_SNAPSHOT_EVERY = int(os.getenv("MISSION_JOURNAL_SNAPSHOT_EVERY", "50"))
+
 # --- Service Configuration ---
 class ServiceConfig:
     KALI_DRIVER_URL: str = "http://127.0.0.1:1611"
+    # Run all of a mission's commands in one persistent container on the execution server.
+    PERSISTENT_SESSIONS: bool = os.getenv("KALI_PERSISTENT_SESSIONS", "true").lower() == "true"
+    # How McpClient.execute_command talks to the server: "sync" (one request, full output),
+    # "stream" (output is read incrementally while the command runs) or "jobs" (submit, then poll).
+    EXECUTION_MODE: str = os.getenv("KALI_EXECUTION_MODE", "sync").lower()
+    # Seconds between status polls in "jobs" mode.
+    JOB_POLL_INTERVAL: float = float(os.getenv("KALI_JOB_POLL_INTERVAL", "2"))
 
 service_config = ServiceConfig()
\ No newline at end of file
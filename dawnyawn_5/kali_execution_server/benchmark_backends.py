@@ -0,0 +1,79 @@
+# kali_execution_server/benchmark_backends.py
+"""
+Compares the execution backends (SSH and Docker exec) on a live Docker host with the
+'dawnyawn-kali-agent' image built. For each backend it measures the cold start (create,
+start and connect a container) and the per-command latency of short commands run the
+way the server runs them (start_command + iter_output).
+
+Usage, from the kali_execution_server directory:
+    python benchmark_backends.py
+    python benchmark_backends.py --commands 50 --command "nmap --version" --output results.json
+"""
+import json
+import time
+import argparse
+import statistics
+from typing import Dict, List
+
+from kali_driver.driver import EXECUTION_BACKENDS, KaliManager
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+        "min_ms": round(ordered[0] * 1000, 2),
+    }
+
+
+def benchmark_backend(backend: str, commands: int, command: str, cold_starts: int) -> Dict:
+    manager = KaliManager(backend=backend)
+    cold = []
+    for _ in range(cold_starts):
+        started = time.perf_counter()
+        container = manager.create_container(connect=True)
+        cold.append(time.perf_counter() - started)
+        container.destroy()
+
+    container = manager.create_container(connect=True)
+    latencies = []
+    try:
+        for _ in range(commands):
+            started = time.perf_counter()
+            process = container.start_command(command, timeout=60)
+            for _stream, _text in process.iter_output():
+                pass
+            latencies.append(time.perf_counter() - started)
+            if process.exit_status != 0:
+                raise RuntimeError(f"'{command}' exited with status {process.exit_status} on {backend}")
+    finally:
+        container.destroy()
+    return {"backend": backend, "cold_start": _summary(cold) if cold else None, "command": _summary(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-command latency of the SSH and Docker exec backends.")
+    parser.add_argument("--backends", nargs="+", choices=sorted(EXECUTION_BACKENDS), default=sorted(EXECUTION_BACKENDS))
+    parser.add_argument("--commands", type=int, default=20, help="Commands timed per backend.")
+    parser.add_argument("--command", default="echo ok", help="The command to time.")
+    parser.add_argument("--cold-starts", type=int, default=3, help="Containers created per backend.")
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = [benchmark_backend(backend, args.commands, args.command, args.cold_starts) for backend in args.backends]
+
+    print(f"\n{'backend':<12} {'cold start ms':>14} {'cmd mean ms':>12} {'cmd p50 ms':>11} {'cmd p95 ms':>11}")
+    for result in results:
+        cold_ms = f"{result['cold_start']['mean_ms']:.1f}" if result["cold_start"] else "-"
+        print(f"{result['backend']:<12} {cold_ms:>14} {result['command']['mean_ms']:>12.1f} "
+              f"{result['command']['p50_ms']:>11.1f} {result['command']['p95_ms']:>11.1f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"command": args.command, "results": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
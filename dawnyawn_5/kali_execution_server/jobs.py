@@ -0,0 +1,164 @@
+# kali_execution_server/jobs.py
+import time
+import uuid
+import asyncio
+import threading
+from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+
+class JobStatus(str, Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+
+FINISHED_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class Job:
+    """A submitted command and everything known about its progress."""
+
+    def __init__(self, command: str, session_id: Optional[str], filename: str, timeout: Optional[float] = None):
+        self.job_id = uuid.uuid4().hex
+        self.command = command
+        self.session_id = session_id
+        self.filename = filename
+        # The command's time budget in seconds; None means the server default.
+        self.timeout = timeout
+        self.status = JobStatus.QUEUED
+        self.exit_status: Optional[int] = None
+        self.error: Optional[str] = None
+        # Set when the time budget expired and the output is what was produced until then.
+        self.partial = False
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_requested = False
+        self.process = None
+        self._chunks: List[str] = []
+        self._output_chars = 0
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def attach_process(self, process):
+        """Called by the runner once the remote command has started."""
+        self.process = process
+        if self.cancel_requested:
+            process.kill()
+
+    def append_output(self, text: str):
+        with self._lock:
+            self._chunks.append(text)
+            self._output_chars += len(text)
+
+    def output_since(self, offset: int) -> str:
+        with self._lock:
+            if offset >= self._output_chars:
+                return ""
+            # Collapse the chunk list so repeated polls stay cheap.
+            output = "".join(self._chunks)
+            self._chunks = [output]
+        return output[offset:]
+
+    def to_dict(self, offset: int = 0) -> Dict:
+        output = self.output_since(offset)
+        return {
+            "job_id": self.job_id,
+            "status": self.status.value,
+            "command": self.command,
+            "filename": self.filename,
+            "exit_status": self.exit_status,
+            "error": self.error,
+            "partial": self.partial,
+            "output": output,
+            "next_offset": offset + len(output),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobScheduler:
+    """
+    Runs submitted jobs on the event loop with a bounded number executing at once.
+    The blocking work (container lease + SSH channel reads) runs on a dedicated
+    thread pool sized to the concurrency limit, so jobs never starve the API.
+    """
+
+    def __init__(self, runner: Callable[[Job], None], max_concurrent: int, retention_seconds: float):
+        self._runner = runner
+        self.max_concurrent = max_concurrent
+        self.retention_seconds = retention_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="kali-job")
+        self._jobs: Dict[str, Job] = {}
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == JobStatus.QUEUED)
+
+    @property
+    def running_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == JobStatus.RUNNING)
+
+    def submit(self, command: str, session_id: Optional[str], filename: str, timeout: Optional[float] = None) -> Job:
+        """Queues a job. Must be called from the running event loop."""
+        self.prune()
+        job = Job(command, session_id, filename, timeout)
+        self._jobs[job.job_id] = job
+        job._task = asyncio.get_running_loop().create_task(self._run(job))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancels a queued job, or kills the remote process of a running one."""
+        job = self._jobs.get(job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return job
+        job.cancel_requested = True
+        if job.status == JobStatus.QUEUED:
+            job._task.cancel()
+            self._finish(job, JobStatus.CANCELLED)
+        elif job.process is not None:
+            loop = asyncio.get_running_loop()
+            # Killing needs a round trip to the container; keep it off the event loop.
+            await loop.run_in_executor(None, job.process.kill)
+        return job
+
+    def prune(self):
+        """Forgets finished jobs older than the retention window."""
+        cutoff = time.time() - self.retention_seconds
+        for job_id in [j.job_id for j in self._jobs.values()
+                       if j.status in FINISHED_STATUSES and j.finished_at and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        for job in self._jobs.values():
+            if job.status == JobStatus.RUNNING and job.process is not None:
+                job.process.kill()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, job: Job):
+        async with self._semaphore:
+            if job.cancel_requested:
+                return
+            job.status = JobStatus.RUNNING
+            job.started_at = time.time()
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(self._executor, self._runner, job)
+                self._finish(job, JobStatus.CANCELLED if job.cancel_requested else JobStatus.COMPLETED)
+            except Exception as e:
+                job.error = str(e)
+                self._finish(job, JobStatus.CANCELLED if job.cancel_requested else JobStatus.FAILED)
+
+    @staticmethod
+    def _finish(job: Job, status: JobStatus):
+        job.status = status
+        job.finished_at = time.time()
@@ -1,46 +1,233 @@
 # kali_execution_server/kali_driver/driver.py (Final Logic Fix)
 import os
 import time
+import uuid
+import shlex
+import codecs
 import docker
-import paramiko
-import tarfile
-from io import BytesIO
+import threading
+from typing import Callable, Dict, Iterator, Optional, Tuple
 
+try:
+    import paramiko
+except ImportError:  # Only the SSH backend needs it.
+    paramiko = None
 
-class KaliContainer:
-    def __init__(self, owner):
-        self._owner = owner
-        self._ssh_client = None
+from kali_driver.metrics import live_containers, observe_phase, ssh_connect_retries, timed
 
-        print("  [+] Creating Kali container from 'dawnyawn-kali-agent' image...")
-        self._container = owner._docker_client.containers.create(
-            image="dawnyawn-kali-agent",
-            command="/usr/sbin/sshd -D",
-            ports={"22/tcp": None},
-            detach=True
-        )
 
-        self.id = self._container.id
-        self.short_id = self._container.short_id
+def _wrap_in_process_group(command: str, pid_file: str) -> str:
+    """
+    Runs the command as the leader of a new process group and records the group ID
+    in pid_file, so the whole process tree can be signalled later. 'setsid -w' keeps
+    the channel open until the command exits and passes its exit status through.
+    """
+    script = f'echo $$ > {pid_file}; bash -c "$1"; status=$?; rm -f {pid_file}; exit $status'
+    return f"setsid -w sh -c {shlex.quote(script)} _ {shlex.quote(command)}"
 
-        self._ensure_started()
-        print(f"  [+] Container '{self.short_id}' created and running.")
 
-    def _ensure_started(self):
-        self._container.reload()
-        if self._container.status != "running":
-            self._container.start()
-            time.sleep(2) # A brief, initial sleep can still be helpful
-        self._container.reload()
+class RemoteProcess:
+    """
+    A command running in a container whose stdout/stderr are read incrementally as it runs.
+    The two streams are read separately, so their relative order is kept only to the
+    granularity of one poll: output that arrives on both within one poll interval is
+    yielded stdout first (unlike the old `2>&1` output file, which interleaved them exactly).
+    'timeout' is the command's time budget: when it expires the process group gets SIGTERM
+    (then SIGKILL after 'grace_period'), the output produced so far is kept, and
+    'timed_out' marks the result as partial.
+    """
 
-    def _ensure_connected(self):
+    def __init__(self, channel, command: str, timeout: float, signal_group: Callable[[str], None] = None,
+                 grace_period: float = 5.0):
+        self._channel = channel
+        self._signal_group = signal_group
+        self.command = command
+        self.timeout = timeout
+        self.grace_period = grace_period
+        self.exit_status: Optional[int] = None
+        self.killed = False
+        self.timed_out = False
+        self._started_at = time.perf_counter()
+        # Incremental decoders keep multi-byte characters intact across chunk boundaries.
+        self._decoders = {
+            "stdout": codecs.getincrementaldecoder("utf-8")(errors="ignore"),
+            "stderr": codecs.getincrementaldecoder("utf-8")(errors="ignore"),
+        }
+
+    def iter_output(self, chunk_size: int = 32768, poll_interval: float = 0.05) -> Iterator[Tuple[str, str]]:
+        """Yields (stream_name, text) pairs until the command exits, then records its exit status."""
+        try:
+            yield from self._read_until_exit(chunk_size, poll_interval)
+        finally:
+            observe_phase("command", time.perf_counter() - self._started_at)
+
+    def _read_until_exit(self, chunk_size: int, poll_interval: float) -> Iterator[Tuple[str, str]]:
+        channel = self._channel
+        deadline = time.monotonic() + self.timeout
+        forced = False
+        while True:
+            received = False
+            if channel.recv_ready():
+                yield from self._decode("stdout", channel.recv(chunk_size))
+                received = True
+            if channel.recv_stderr_ready():
+                yield from self._decode("stderr", channel.recv_stderr(chunk_size))
+                received = True
+            exited = channel.exit_status_ready()
+            # Checked even while output keeps coming, or a chatty command would never be stopped.
+            if not exited and time.monotonic() > deadline:
+                if self.timed_out or not self._signal_group:
+                    # The grace period is over too (or the process can't be signalled): stop reading.
+                    self._signal("KILL")
+                    channel.close()
+                    forced = True
+                    break
+                self.timed_out = True
+                print(f"  [!] Time budget of {self.timeout}s expired; stopping '{self.command}' "
+                      f"and keeping its output so far.")
+                # Keep reading while the command shuts down; many tools flush results on SIGTERM.
+                self._signal("TERM")
+                deadline = time.monotonic() + self.grace_period
+                continue
+            if received:
+                continue
+            if exited and not channel.recv_ready() and not channel.recv_stderr_ready():
+                break
+            time.sleep(poll_interval)
+
+        for stream, decoder in self._decoders.items():
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield stream, tail
+        if forced:
+            print("  [!] Command did not exit after SIGTERM and was killed.")
+            return
+        self.exit_status = channel.recv_exit_status()
+        print(f"  [+] Command finished with exit status: {self.exit_status}")
+
+    def _signal(self, signal_name: str):
+        if not self._signal_group:
+            return
+        try:
+            self._signal_group(signal_name)
+        except Exception as e:
+            print(f"  [!] Failed to signal remote process group: {e}")
+
+    def kill(self, grace_period: float = 5.0):
+        """Sends SIGTERM to the command's process group, escalating to SIGKILL after the grace period."""
+        if self.killed:
+            return
+        self.killed = True
+        print(f"  [!] Terminating command: '{self.command}'")
+        if self._signal_group:
+            try:
+                self._signal_group("TERM")
+                deadline = time.monotonic() + grace_period
+                while not self._channel.exit_status_ready() and time.monotonic() < deadline:
+                    time.sleep(0.1)
+                if not self._channel.exit_status_ready():
+                    self._signal_group("KILL")
+            except Exception as e:
+                print(f"  [!] Failed to signal remote process group: {e}")
+        self._channel.close()
+
+    def _decode(self, stream: str, data: bytes) -> Iterator[Tuple[str, str]]:
+        text = self._decoders[stream].decode(data)
+        if text:
+            yield stream, text
+
+
+class DockerExecChannel:
+    """
+    Presents a Docker exec instance through the subset of the paramiko Channel interface
+    that RemoteProcess uses. A background thread drains the demultiplexed output stream
+    into per-stream buffers, so reads never block.
+    """
+
+    def __init__(self, api, container_id: str, command: str):
+        self._api = api
+        self._exec_id = api.exec_create(container_id, ["sh", "-c", command], stdout=True, stderr=True,
+                                        stdin=False, tty=False)["Id"]
+        self._buffers = {"stdout": bytearray(), "stderr": bytearray()}
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._exit_status: Optional[int] = None
+        stream = api.exec_start(self._exec_id, stream=True, demux=True)
+        self._reader = threading.Thread(target=self._drain, args=(stream,), daemon=True)
+        self._reader.start()
+
+    def _drain(self, stream):
+        try:
+            for stdout, stderr in stream:
+                with self._lock:
+                    if stdout:
+                        self._buffers["stdout"].extend(stdout)
+                    if stderr:
+                        self._buffers["stderr"].extend(stderr)
+        finally:
+            self._finished.set()
+
+    def _take(self, stream: str, size: int) -> bytes:
+        with self._lock:
+            data = bytes(self._buffers[stream][:size])
+            del self._buffers[stream][:size]
+            return data
+
+    def recv_ready(self) -> bool:
+        return bool(self._buffers["stdout"])
+
+    def recv_stderr_ready(self) -> bool:
+        return bool(self._buffers["stderr"])
+
+    def recv(self, size: int) -> bytes:
+        return self._take("stdout", size)
+
+    def recv_stderr(self, size: int) -> bytes:
+        return self._take("stderr", size)
+
+    def exit_status_ready(self) -> bool:
+        # The output stream ends when the process exits.
+        return self._finished.is_set()
+
+    def recv_exit_status(self) -> int:
+        if self._exit_status is None:
+            self._finished.wait()
+            info = self._api.exec_inspect(self._exec_id)
+            while info.get("Running"):
+                time.sleep(0.05)
+                info = self._api.exec_inspect(self._exec_id)
+            self._exit_status = info.get("ExitCode")
+        return self._exit_status
+
+    def close(self):
+        # The exec has no handle of its own to close; the process is stopped by signalling its group.
+        pass
+
+
+class SshBackend:
+    """Runs commands over SSH: the container runs sshd, and paramiko connects to its mapped port."""
+
+    name = "ssh"
+    container_command = "/usr/sbin/sshd -D"
+    container_ports = {"22/tcp": None}
+    # A brief, initial sleep gives sshd time to start listening.
+    startup_delay = 2
+
+    def __init__(self, container: "KaliContainer"):
+        if paramiko is None:
+            raise ImportError("The SSH execution backend requires paramiko.")
+        self._container = container
+        self._ssh_client = None
+
+    def connect(self):
         if self._ssh_client and self._ssh_client.get_transport().is_active():
             return
 
-        self._container.reload()
-        port_data = self._container.ports.get('22/tcp')
+        docker_container = self._container._container
+        docker_container.reload()
+        port_data = docker_container.ports.get('22/tcp')
         if not port_data or 'HostPort' not in port_data[0]:
-            raise Exception(f"Failed to find mapped SSH port for container {self.id}")
+            raise Exception(f"Failed to find mapped SSH port for container {self._container.id}")
 
         public_port = int(port_data[0]['HostPort'])
         key_path = os.path.expanduser('~/.ssh/id_ecdsa')
@@ -50,6 +237,10 @@ class KaliContainer:
         self._ssh_client = paramiko.SSHClient()
         self._ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
 
+        with timed("ssh_connect"):
+            self._connect_with_retries(public_port, key_path)
+
+    def _connect_with_retries(self, public_port: int, key_path: str):
         # --- THE FIX: Implement a retry loop for the SSH connection ---
         max_retries = 5
         retry_delay = 2  # in seconds
@@ -60,10 +251,11 @@ class KaliContainer:
                     key_filename=key_path, timeout=10 # Use a shorter timeout for the connection attempt
                 )
                 # If connection is successful, break the loop
-                print(f"  [+] SSH connection established to container '{self.short_id}' on attempt {attempt + 1}.")
+                print(f"  [+] SSH connection established to container '{self._container.short_id}' on attempt {attempt + 1}.")
                 return
             except (paramiko.ssh_exception.SSHException, ConnectionResetError, TimeoutError) as e:
                 if attempt < max_retries - 1:
+                    ssh_connect_retries.inc()
                     print(f"  [!] SSH connection failed with '{type(e).__name__}'. Retrying in {retry_delay}s...")
                     time.sleep(retry_delay)
                 else:
@@ -71,62 +263,150 @@ class KaliContainer:
                     # Re-raise the last exception to let the caller handle the final failure
                     raise e
 
-    # --- THE FIX: This method NO LONGER returns output. It just executes. ---
-    def send_command_and_get_output(self, command: str, timeout: int = 1800):
-        self._ensure_connected()
-        print(f"  [+] Sending command: '{command}'")
+    def is_connected(self) -> bool:
+        transport = self._ssh_client.get_transport() if self._ssh_client else None
+        return bool(transport and transport.is_active())
+
+    def open_channel(self, command: str, timeout: int):
+        stdin, stdout, stderr = self._ssh_client.exec_command(command, timeout=timeout)
+        stdin.close()
+        return stdout.channel
+
+    def run(self, command: str, timeout: int) -> int:
         stdin, stdout, stderr = self._ssh_client.exec_command(command, timeout=timeout)
+        return stdout.channel.recv_exit_status()
+
+    def close(self):
+        if self._ssh_client:
+            self._ssh_client.close()
+
+
+class DockerExecBackend:
+    """
+    Runs commands through the Docker exec API: no sshd, no port mapping, no SSH keys
+    and no connection handshake. The container just idles until commands arrive.
+    """
+
+    name = "docker_exec"
+    container_command = ["sleep", "infinity"]
+    container_ports = None
+    startup_delay = 0
+
+    def __init__(self, container: "KaliContainer"):
+        self._container = container
+
+    def connect(self):
+        pass  # Every exec is its own API call; there is no session to establish.
+
+    def is_connected(self) -> bool:
+        return not self._container._destroyed
+
+    def open_channel(self, command: str, timeout: int) -> DockerExecChannel:
+        # The timeout is enforced by RemoteProcess, which kills the process group.
+        return DockerExecChannel(self._container._owner._docker_client.api, self._container.id, command)
+
+    def run(self, command: str, timeout: int) -> int:
+        return self._container._container.exec_run(["sh", "-c", command]).exit_code
+
+    def close(self):
+        pass
+
+
+EXECUTION_BACKENDS: Dict[str, type] = {SshBackend.name: SshBackend, DockerExecBackend.name: DockerExecBackend}
+
+
+class KaliContainer:
+    def __init__(self, owner):
+        self._owner = owner
+        self._backend = EXECUTION_BACKENDS[owner.backend](self)
+        # Number of commands served; used by the pool to cap container reuse.
+        self.uses = 0
 
-        # --- THE FIX: We now wait for the command to complete by checking the exit status. ---
-        # This is crucial because it blocks until the command is finished.
-        exit_status = stdout.channel.recv_exit_status()
-        print(f"  [+] Command finished with exit status: {exit_status}")
-        # We no longer read stdout/stderr here, as it's all in the file.
+        print(f"  [+] Creating Kali container from 'dawnyawn-kali-agent' image ({owner.backend} backend)...")
+        with timed("container_create"):
+            self._container = owner._docker_client.containers.create(
+                image="dawnyawn-kali-agent",
+                command=self._backend.container_command,
+                ports=self._backend.container_ports,
+                detach=True
+            )
+        live_containers.inc()
+        self._destroyed = False
 
-    def copy_file_from_container(self, path: str) -> str:
-        """Copies a file from the container and returns its content as a string."""
+        self.id = self._container.id
+        self.short_id = self._container.short_id
+
+        with timed("container_start"):
+            self._ensure_started()
+        print(f"  [+] Container '{self.short_id}' created and running.")
+
+    def _ensure_started(self):
+        self._container.reload()
+        if self._container.status != "running":
+            self._container.start()
+            time.sleep(self._backend.startup_delay)
+        self._container.reload()
+
+    def _ensure_connected(self):
+        self._backend.connect()
+
+    def connect(self):
+        """Establishes the backend's session (SSH) up front so the first command does not pay for it."""
+        self._ensure_connected()
+
+    def is_healthy(self, deep: bool = True) -> bool:
+        """
+        A shallow check only verifies the backend's connection is still active. A deep check
+        also confirms the container is running and can execute a trivial command.
+        """
         try:
-            bits, stat = self._container.get_archive(path)
-
-            with BytesIO() as f:
-                for chunk in bits:
-                    f.write(chunk)
-                f.seek(0)
-                with tarfile.open(fileobj=f) as tar:
-                    # Handle cases where the tarball might be empty or malformed
-                    members = tar.getmembers()
-                    if not members:
-                         return f"Command produced no output file at '{path}' (empty archive)."
-                    member = members[0]
-                    extracted_file = tar.extractfile(member)
-                    if extracted_file:
-                        return extracted_file.read().decode('utf-8', errors='ignore')
-                    else:
-                        return f"Failed to extract file from archive for '{path}'."
+            if not self._backend.is_connected():
+                return False
+            if not deep:
+                return True
+            self._container.reload()
+            if self._container.status != "running":
+                return False
+            return self._backend.run("true", timeout=10) == 0
+        except Exception:
+            return False
 
-        except docker.errors.NotFound:
-            # If the command produced no output file, return a string indicating that.
-            return f"Command produced no output file at '{path}'."
-        except IndexError:
-            # If the tarball is empty, it means the file was not created.
-            return f"Command produced no output file at '{path}'."
+    def start_command(self, command: str, timeout: float = 1800) -> RemoteProcess:
+        """Starts a command and returns a handle for streaming its output as it is produced."""
+        self._ensure_connected()
+        print(f"  [+] Starting command: '{command}'")
+        pid_file = f"/tmp/.dawnyawn_{uuid.uuid4().hex[:8]}.pid"
+        channel = self._backend.open_channel(_wrap_in_process_group(command, pid_file), timeout)
+        return RemoteProcess(channel, command, timeout,
+                             signal_group=lambda sig: self._signal_process_group(pid_file, sig))
+
+    def _signal_process_group(self, pid_file: str, signal_name: str):
+        self._backend.run(f"test -f {pid_file} && kill -{signal_name} -$(cat {pid_file})", timeout=10)
 
     def destroy(self):
-        if self._ssh_client:
-            self._ssh_client.close()
+        self._backend.close()
         try:
-            self._container.reload()
-            print(f"\n  [+] Cleaning up container '{self.short_id}'...")
-            if self._container.status in ["running", "created"]:
-                self._container.stop()
-            self._container.remove(force=True)
+            with timed("destroy"):
+                self._container.reload()
+                print(f"\n  [+] Cleaning up container '{self.short_id}'...")
+                if self._container.status in ["running", "created"]:
+                    self._container.stop()
+                self._container.remove(force=True)
             print("  [+] Cleanup complete.")
         except docker.errors.NotFound:
             pass
+        finally:
+            if not self._destroyed:
+                self._destroyed = True
+                live_containers.dec()
 
 
 class KaliManager:
-    def __init__(self):
+    def __init__(self, backend: str = SshBackend.name):
+        if backend not in EXECUTION_BACKENDS:
+            raise ValueError(f"Unknown execution backend '{backend}'. Use one of {sorted(EXECUTION_BACKENDS)}.")
+        # How commands reach the containers: "ssh" (sshd + paramiko) or "docker_exec" (Docker exec API).
+        self.backend = backend
         try:
             # --- THE FIX: Add a longer timeout for all Docker operations ---
             # We'll set a generous 180-second (3-minute) timeout.
@@ -136,5 +416,12 @@ class KaliManager:
             print("FATAL ERROR: Could not connect to Docker. Is it running?")
             raise e
 
-    def create_container(self) -> "KaliContainer":
-        return KaliContainer(owner=self)
\ No newline at end of file
+    def create_container(self, connect: bool = False) -> "KaliContainer":
+        container = KaliContainer(owner=self)
+        if connect:
+            try:
+                container.connect()
+            except Exception:
+                container.destroy()
+                raise
+        return container
@@ -0,0 +1,183 @@
+# kali_execution_server/kali_driver/pool.py
+import queue
+import threading
+import time
+from typing import Callable, Dict
+
+
+class PoolMetrics:
+    """Thread-safe counters describing how well the pool is absorbing container startup cost."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.containers_created = 0
+        self.containers_retired = 0
+        self.health_check_failures = 0
+
+    def record_acquire(self, hit: bool, waited: float):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def increment(self, counter: str, amount: int = 1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            acquires = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / acquires) if acquires else 0.0,
+                "wait_seconds_total": round(self.wait_seconds_total, 4),
+                "wait_seconds_avg": round(self.wait_seconds_total / acquires, 4) if acquires else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 4),
+                "containers_created": self.containers_created,
+                "containers_retired": self.containers_retired,
+                "health_check_failures": self.health_check_failures,
+            }
+
+
+class ContainerPool:
+    """
+    Keeps a number of started, SSH-connected containers ready so the request
+    path does not pay for container creation, the startup sleep or SSH retries.
+    A background thread refills the pool and health-checks idle containers.
+    """
+
+    def __init__(self, factory: Callable, size: int, max_uses: int, health_check_interval: float):
+        # factory() must return a container that is already started and connected.
+        self._factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.health_check_interval = health_check_interval
+        self.metrics = PoolMetrics()
+
+        self._idle: "queue.Queue" = queue.Queue()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def idle_count(self) -> int:
+        return self._idle.qsize()
+
+    def start(self):
+        """Starts the background refill / health-check thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._maintain, name="kali-container-pool", daemon=True)
+        self._thread.start()
+        print(f"  [+] Container pool started (size={self.size}, max_uses={self.max_uses}).")
+
+    def shutdown(self):
+        """Stops the background thread and destroys every idle container."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+        while True:
+            try:
+                container = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._retire(container)
+
+    def acquire(self):
+        """
+        Returns a ready container. Idle containers are served first (a hit);
+        if none is available a container is created on the request path (a miss).
+        """
+        started = time.monotonic()
+        while True:
+            try:
+                container = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if container.is_healthy(deep=False):
+                self.metrics.record_acquire(hit=True, waited=time.monotonic() - started)
+                self._wakeup.set()
+                return container
+            self.metrics.increment("health_check_failures")
+            self._retire(container)
+
+        self._wakeup.set()
+        container = self._create()
+        self.metrics.record_acquire(hit=False, waited=time.monotonic() - started)
+        return container
+
+    def release(self, container, reusable: bool = True):
+        """Returns a container to the pool, or retires it if it is worn out or unhealthy."""
+        container.uses += 1
+        if (not reusable or self._stopped.is_set() or container.uses >= self.max_uses
+                or self._idle.qsize() >= self.size):
+            self._retire(container)
+            self._wakeup.set()
+            return
+        self._idle.put(container)
+
+    def _create(self):
+        container = self._factory()
+        self.metrics.increment("containers_created")
+        return container
+
+    def _retire(self, container):
+        self.metrics.increment("containers_retired")
+        try:
+            container.destroy()
+        except Exception as e:
+            print(f"  [!] Failed to destroy pooled container: {e}")
+
+    def _fill(self):
+        while not self._stopped.is_set():
+            with self._lock:
+                if self._idle.qsize() + self._pending >= self.size:
+                    return
+                self._pending += 1
+            try:
+                container = self._create()
+            except Exception as e:
+                print(f"  [!] Container pool refill failed: {e}")
+                return
+            finally:
+                with self._lock:
+                    self._pending -= 1
+            if self._stopped.is_set():
+                self._retire(container)
+                return
+            self._idle.put(container)
+
+    def _health_check_idle(self):
+        for _ in range(self._idle.qsize()):
+            try:
+                container = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            if container.is_healthy(deep=True):
+                self._idle.put(container)
+            else:
+                self.metrics.increment("health_check_failures")
+                self._retire(container)
+
+    def _maintain(self):
+        last_health_check = time.monotonic()
+        while not self._stopped.is_set():
+            self._fill()
+            if time.monotonic() - last_health_check >= self.health_check_interval:
+                self._health_check_idle()
+                last_health_check = time.monotonic()
+                self._fill()
+            self._wakeup.wait(timeout=self.health_check_interval)
+            self._wakeup.clear()
@@ -0,0 +1,147 @@
+# kali_execution_server/kali_driver/sessions.py
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+
+class ExecutionSession:
+    """One long-lived container (and its SSH transport) bound to a mission."""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.container = None
+        self.lock = threading.Lock()
+        self.created_at = time.time()
+        self.last_used = time.monotonic()
+        self.commands = 0
+        # Set by SessionRegistry.close() under the lock; a closed session never gets a container again.
+        self.closed = False
+
+    def describe(self) -> Dict:
+        return {
+            "session_id": self.session_id,
+            "container_id": self.container.short_id if self.container else None,
+            "commands": self.commands,
+            "idle_seconds": round(time.monotonic() - self.last_used, 1),
+        }
+
+
+class SessionRegistry:
+    """
+    Maps session IDs to persistent containers so files, tool state and caches
+    survive between the steps of a mission. Sessions idle for longer than the
+    TTL are reaped by a background thread.
+    """
+
+    def __init__(self, acquire: Callable, release: Callable, idle_ttl: float, reap_interval: float):
+        # acquire() returns a ready container; release(container, reusable) disposes of it.
+        self._acquire = acquire
+        self._release = release
+        self.idle_ttl = idle_ttl
+        self.reap_interval = reap_interval
+        self._sessions: Dict[str, ExecutionSession] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._reap_loop, name="kali-session-reaper", daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+        for session_id in list(self._sessions):
+            self.close(session_id)
+
+    def list_sessions(self) -> List[Dict]:
+        with self._lock:
+            return [session.describe() for session in self._sessions.values()]
+
+    def _session(self, session_id: str) -> ExecutionSession:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = ExecutionSession(session_id)
+                print(f"  [+] Opened execution session '{session_id}'.")
+            return session
+
+    def _ensure_container(self, session: ExecutionSession):
+        """
+        Gives the session a healthy container. The caller holds session.lock. Raises
+        RuntimeError if the session was closed after the caller looked it up, rather than
+        starting a container that nothing would ever release.
+        """
+        if session.closed:
+            raise RuntimeError(f"Session '{session.session_id}' was closed.")
+        if session.container is not None and not session.container.is_healthy(deep=False):
+            print(f"  [!] Session '{session.session_id}' lost its container. Replacing it.")
+            self._release(session.container, reusable=False)
+            session.container = None
+        if session.container is None:
+            session.container = self._acquire()
+
+    def open(self, session_id: str) -> Dict:
+        """
+        Creates the session and its container ahead of the first command, so the agent
+        can have it started while it is still planning. Opening an open session is a no-op.
+        """
+        session = self._session(session_id)
+        with session.lock:
+            self._ensure_container(session)
+            session.last_used = time.monotonic()
+        return session.describe()
+
+    @contextmanager
+    def lease(self, session_id: str):
+        """Yields the session's container, creating or replacing it as needed. Commands in one session run serially."""
+        session = self._session(session_id)
+        with session.lock:
+            self._ensure_container(session)
+            try:
+                yield session.container
+            finally:
+                session.commands += 1
+                session.last_used = time.monotonic()
+
+    def close(self, session_id: str) -> bool:
+        """Destroys a session's container. Returns False if the session does not exist."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        with session.lock:
+            session.closed = True
+            if session.container is not None:
+                # Session containers hold mission state, so they never go back to the pool.
+                self._release(session.container, reusable=False)
+                session.container = None
+        print(f"  [+] Closed execution session '{session_id}' after {session.commands} command(s).")
+        return True
+
+    def reap_idle(self) -> int:
+        """Closes sessions idle for longer than the TTL. Sessions running a command are skipped."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [s for s in self._sessions.values()
+                       if now - s.last_used > self.idle_ttl and not s.lock.locked()]
+        reaped = 0
+        for session in expired:
+            print(f"  [+] Reaping idle execution session '{session.session_id}'.")
+            reaped += self.close(session.session_id)
+        return reaped
+
+    def _reap_loop(self):
+        while not self._stopped.wait(timeout=self.reap_interval):
+            try:
+                self.reap_idle()
+            except Exception as e:
+                print(f"  [!] Session reaper failed: {e}")
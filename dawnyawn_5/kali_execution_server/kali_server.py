@@ -2,22 +2,61 @@
 import uvicorn
 import uuid
 import os
+import time
+import json
 import logging
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
 
 # Local Imports
 from kali_driver.driver import KaliManager, KaliContainer
+from kali_driver.pool import ContainerPool
+from kali_driver.sessions import SessionRegistry
+from kali_driver.metrics import Gauge, format_server_timing, registry, request_timings, timed
+from jobs import Job, JobScheduler
+from server_config import server_config
 
 
 # --- Pydantic Models ---
 class ExecuteRequest(BaseModel):
     command: str
+    # Commands sharing a session ID run in the same long-lived container.
+    session_id: Optional[str] = None
+    # Time budget in seconds (default: KALI_DEFAULT_COMMAND_TIMEOUT). When it expires the
+    # command is stopped and the output so far is returned with partial=True.
+    timeout: Optional[float] = Field(None, gt=0)
 
 
 class ExecuteResponse(BaseModel):
     filename: str
     file_content: str
+    exit_status: Optional[int] = None
+    partial: bool = False
+
+
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status: str
+    filename: str
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    command: str
+    filename: str
+    exit_status: Optional[int] = None
+    error: Optional[str] = None
+    partial: bool = False
+    # Output produced since the requested offset; pass next_offset on the next poll.
+    output: str
+    next_offset: int
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
 
 
 # --- FastAPI App Setup ---
@@ -25,48 +64,304 @@ app = FastAPI(title="DawnYawn Ephemeral Execution Server")
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] (ExecutionServer) - %(message)s")
 
 logging.info("Initializing Kali Docker Manager...")
-kali_manager = KaliManager()
-logging.info("Kali Docker Manager initialized.")
+kali_manager = KaliManager(backend=server_config.EXECUTION_BACKEND)
+logging.info("Kali Docker Manager initialized (execution backend: %s).", kali_manager.backend)
+os.makedirs(server_config.OUTPUT_DIR, exist_ok=True)
 
+container_pool: ContainerPool = None
+if server_config.POOL_SIZE > 0:
+    container_pool = ContainerPool(
+        factory=lambda: kali_manager.create_container(connect=True),
+        size=server_config.POOL_SIZE,
+        max_uses=server_config.POOL_MAX_USES,
+        health_check_interval=server_config.POOL_HEALTH_CHECK_INTERVAL,
+    )
 
-@app.post("/execute", response_model=ExecuteResponse)
-def execute_command(request: ExecuteRequest):
+
+def _acquire_container() -> KaliContainer:
+    with timed("container_acquire"):
+        if container_pool:
+            return container_pool.acquire()
+        return kali_manager.create_container()
+
+
+def _release_container(container: KaliContainer, reusable: bool):
+    if container_pool:
+        container_pool.release(container, reusable=reusable)
+    else:
+        container.destroy()
+
+
+session_registry = SessionRegistry(
+    acquire=_acquire_container,
+    release=_release_container,
+    idle_ttl=server_config.SESSION_IDLE_TTL,
+    reap_interval=server_config.SESSION_REAP_INTERVAL,
+)
+
+
+@app.on_event("startup")
+def start_background_workers():
+    if container_pool:
+        container_pool.start()
+    session_registry.start()
+
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    job_scheduler.shutdown()
+    logging.info("Closing %d execution session(s)...", len(session_registry))
+    session_registry.shutdown()
+    if container_pool:
+        logging.info("Shutting down container pool...")
+        container_pool.shutdown()
+
+
+inflight_requests = registry.register(Gauge("kali_inflight_requests", "HTTP requests currently being served."))
+registry.register(Gauge("kali_pool_idle_containers", "Warm containers waiting in the pool.",
+                        callback=lambda: container_pool.idle_count if container_pool else 0))
+registry.register(Gauge("kali_open_sessions", "Open mission execution sessions.",
+                        callback=lambda: len(session_registry)))
+registry.register(Gauge("kali_job_queue_depth", "Submitted jobs waiting for an execution slot.",
+                        callback=lambda: job_scheduler.queue_depth))
+registry.register(Gauge("kali_jobs_running", "Jobs currently executing.",
+                        callback=lambda: job_scheduler.running_count))
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
     """
-    Creates a new container, runs a single command, extracts the output
-    to a file, and destroys the container.
+    Counts in-flight requests and adds a Server-Timing header with the time spent in
+    each phase (container acquire, SSH connect, command, ...). For streamed responses
+    the header is sent before the body, so it only covers the phases before streaming.
     """
-    container: KaliContainer = None
-    command = request.command
+    timings = {}
+    token = request_timings.set(timings)
+    inflight_requests.inc()
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        inflight_requests.dec()
+        raise
+    finally:
+        request_timings.reset(token)
+    timings["total"] = time.perf_counter() - started
+    response.headers["Server-Timing"] = format_server_timing(timings)
+
+    body = response.body_iterator
+
+    async def body_then_done():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            inflight_requests.dec()
+
+    response.body_iterator = body_then_done()
+    return response
+
+
+@contextmanager
+def _leased_container(session_id: Optional[str]):
+    """Yields the session's persistent container, or a pooled one that is released afterwards."""
+    if session_id:
+        with session_registry.lease(session_id) as container:
+            yield container
+        return
 
+    container = _acquire_container()
+    reusable = False
+    try:
+        yield container
+        reusable = True
+    finally:
+        logging.info("--- [CLEANUP] Releasing container %s ---", container.id[:12])
+        _release_container(container, reusable=reusable)
+
+
+def _output_filename(command: str) -> str:
     sanitized_command = "".join(c for c in command if c.isalnum() or c in (' ', '_', '-')).rstrip()
     unique_id = uuid.uuid4().hex[:6]
-    output_filename = f"{sanitized_command.replace(' ', '_')}_{unique_id}.txt"
-    output_filepath_in_container = f"/tmp/{output_filename}"
+    # Keep the name well below filesystem limits even for very long commands.
+    return f"{sanitized_command.replace(' ', '_')[:120]}_{unique_id}.txt"
 
-    logging.info("--- [EXECUTE] New request for command: '%s' ---", command)
-    try:
-        container = kali_manager.create_container()
-        # --- FINAL FIX: Use the simple '.id' attribute we added to the KaliContainer class ---
-        logging.info("Created temporary container: %s", container.id[:12])
 
-        full_command_with_redirect = f"{command} > {output_filepath_in_container} 2>&1"
-        container.send_command_and_get_output(full_command_with_redirect, timeout=1800)
+def _time_budget(requested: Optional[float]) -> float:
+    return min(requested or server_config.DEFAULT_COMMAND_TIMEOUT, server_config.MAX_COMMAND_TIMEOUT)
+
+
+def _run_and_persist(container: KaliContainer, command: str, output_filename: str, timeout: Optional[float] = None,
+                     on_start: Callable = None) -> Iterator[Dict]:
+    """
+    Runs a command and yields its output events as they arrive, while appending
+    every chunk to the output file on disk. Ends with an 'exit' event, whose 'partial'
+    flag is set if the time budget expired and the command was stopped early. If the
+    consumer goes away early (e.g. a dropped client), the remote process is killed.
+    """
+    output_filepath = os.path.join(server_config.OUTPUT_DIR, output_filename)
+    process = container.start_command(command, timeout=_time_budget(timeout))
+    if on_start:
+        on_start(process)
+    written = 0
+    with open(output_filepath, 'w', encoding='utf-8') as f:
+        try:
+            for stream, text in process.iter_output():
+                f.write(text)
+                written += len(text)
+                yield {"event": "output", "stream": stream, "data": text}
+        except GeneratorExit:
+            process.kill()
+            raise
+    if process.timed_out:
+        logging.warning("--- ⏱ Time budget of %ss expired for '%s'; returning %d chars of partial output ---",
+                        process.timeout, command, written)
+    yield {"event": "exit", "filename": output_filename, "exit_status": process.exit_status, "chars": written,
+           "partial": process.timed_out}
+
+
+@app.post("/execute", response_model=ExecuteResponse)
+def execute_command(request: ExecuteRequest):
+    """
+    Runs a single command in the session's container (or a pooled one) and
+    returns its full output once it finishes, or what it produced before its
+    time budget expired (partial=True).
+    """
+    command = request.command
+    output_filename = _output_filename(command)
+
+    logging.info("--- [EXECUTE] New request for command: '%s' (session: %s) ---", command, request.session_id)
+    try:
+        with _leased_container(request.session_id) as container:
+            # --- FINAL FIX: Use the simple '.id' attribute we added to the KaliContainer class ---
+            logging.info("Using container: %s (use #%d)", container.id[:12], container.uses + 1)
+            for event in _run_and_persist(container, command, output_filename, request.timeout):
+                if event["event"] == "exit":
+                    exit_event = event
 
-        # NOTE: This assumes you have a 'copy_file_from_container' method in your driver.
-        # If not, that will be the next error we need to implement.
-        file_content = container.copy_file_from_container(output_filepath_in_container)
+        # The output was written to disk as it streamed; read it back once for the response.
+        with open(os.path.join(server_config.OUTPUT_DIR, output_filename), 'r', encoding='utf-8') as f:
+            file_content = f.read()
 
         logging.info("--- ✅ Command executed, result captured in '%s' ---", output_filename)
-        return ExecuteResponse(filename=output_filename, file_content=file_content)
+        return ExecuteResponse(filename=output_filename, file_content=file_content,
+                               exit_status=exit_event["exit_status"], partial=exit_event["partial"])
 
     except Exception as e:
         logging.error("--- ❌ Command execution failed: %s ---", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Command execution failed on server: {e}")
-    finally:
-        if container:
-            # --- FINAL FIX: Use the simple '.id' attribute ---
-            logging.info("--- [CLEANUP] Destroying container %s ---", container.id[:12])
-            container.destroy()
+
+
+@app.post("/execute/stream")
+def execute_command_stream(request: ExecuteRequest):
+    """
+    Runs a single command and streams its stdout/stderr as newline-delimited JSON
+    events while it runs. The full output is still persisted to disk.
+    """
+    command = request.command
+    output_filename = _output_filename(command)
+    logging.info("--- [STREAM] New request for command: '%s' (session: %s) ---", command, request.session_id)
+
+    def event_stream():
+        yield json.dumps({"event": "start", "filename": output_filename}) + "\n"
+        try:
+            with _leased_container(request.session_id) as container:
+                for event in _run_and_persist(container, command, output_filename, request.timeout):
+                    yield json.dumps(event) + "\n"
+            logging.info("--- ✅ Command streamed, result captured in '%s' ---", output_filename)
+        except Exception as e:
+            logging.error("--- ❌ Streamed command execution failed: %s ---", e, exc_info=True)
+            yield json.dumps({"event": "error", "detail": f"Command execution failed on server: {e}"}) + "\n"
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+
+def _run_job(job: Job):
+    """Blocking job body, executed on the job scheduler's thread pool."""
+    with _leased_container(job.session_id) as container:
+        for event in _run_and_persist(container, job.command, job.filename, job.timeout,
+                                      on_start=job.attach_process):
+            if event["event"] == "output":
+                job.append_output(event["data"])
+            elif event["event"] == "exit":
+                job.exit_status = event["exit_status"]
+                job.partial = event["partial"]
+    logging.info("--- ✅ Job %s finished, result captured in '%s' ---", job.job_id[:8], job.filename)
+
+
+job_scheduler = JobScheduler(
+    runner=_run_job,
+    max_concurrent=server_config.JOB_MAX_CONCURRENT,
+    retention_seconds=server_config.JOB_RETENTION_SECONDS,
+)
+
+
+@app.post("/jobs", response_model=JobSubmitResponse, status_code=202)
+async def submit_job(request: ExecuteRequest):
+    """Queues a command for execution and returns immediately with a job ID."""
+    job = job_scheduler.submit(request.command, request.session_id, _output_filename(request.command),
+                               timeout=request.timeout)
+    logging.info("--- [JOB] Queued %s for command: '%s' (session: %s) ---",
+                 job.job_id[:8], request.command, request.session_id)
+    return JobSubmitResponse(job_id=job.job_id, status=job.status.value, filename=job.filename)
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, offset: int = 0):
+    """Returns a job's status and the output produced since 'offset'."""
+    job = job_scheduler.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    return JobResponse(**job.to_dict(offset))
+
+
+@app.delete("/jobs/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    """Cancels a queued job or kills the remote process of a running one."""
+    job = await job_scheduler.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    logging.info("--- [JOB] Cancellation requested for %s ---", job_id[:8])
+    return JobResponse(**job.to_dict())
+
+
+@app.get("/sessions")
+def list_sessions():
+    """Lists the open execution sessions."""
+    return {"sessions": session_registry.list_sessions()}
+
+
+@app.put("/sessions/{session_id}")
+def open_session(session_id: str):
+    """Starts a session's container before its first command. Called by the agent while it plans."""
+    try:
+        return session_registry.open(session_id)
+    except Exception as e:
+        logging.error("--- ❌ Could not open session '%s': %s ---", session_id, e, exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Could not open session: {e}")
+
+
+@app.delete("/sessions/{session_id}")
+def close_session(session_id: str):
+    """Destroys a session's container. Called by the agent when its mission ends."""
+    if not session_registry.close(session_id):
+        raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found.")
+    return {"session_id": session_id, "closed": True}
+
+
+@app.get("/pool/metrics")
+def pool_metrics():
+    """Reports warm pool hits, misses and acquire wait times."""
+    if not container_pool:
+        return {"enabled": False}
+    return {"enabled": True, "size": container_pool.size, "idle": container_pool.idle_count,
+            **container_pool.metrics.snapshot()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Exposes phase histograms, container/request/queue gauges and counters in Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type=registry.CONTENT_TYPE)
 
 
 if __name__ == "__main__":
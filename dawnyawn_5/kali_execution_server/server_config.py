@@ -0,0 +1,45 @@
+# kali_execution_server/server_config.py
+import os
+
+
+# --- Execution Server Configuration ---
+class ServerConfig:
+    """Tunable settings for the execution server. Every value can be overridden via an environment variable."""
+
+    # --- Command execution ---
+    # How commands reach a container: "ssh" (sshd in the container, paramiko client) or
+    # "docker_exec" (the Docker exec API; no sshd, port mapping or SSH key needed).
+    EXECUTION_BACKEND: str = os.getenv("KALI_EXECUTION_BACKEND", "ssh").lower()
+
+    # Time budget for commands whose request does not set one, in seconds. When a budget
+    # expires the command is stopped and the output produced so far is returned as partial.
+    DEFAULT_COMMAND_TIMEOUT: float = float(os.getenv("KALI_DEFAULT_COMMAND_TIMEOUT", "1800"))
+    # Upper bound on any requested time budget.
+    MAX_COMMAND_TIMEOUT: float = float(os.getenv("KALI_MAX_COMMAND_TIMEOUT", "7200"))
+
+    # --- Warm container pool ---
+    # Number of started, SSH-connected containers kept ready. 0 disables the pool.
+    POOL_SIZE: int = int(os.getenv("KALI_POOL_SIZE", "2"))
+    # A pooled container is destroyed after serving this many commands.
+    POOL_MAX_USES: int = int(os.getenv("KALI_POOL_MAX_USES", "20"))
+    # Seconds between background health checks of idle pooled containers.
+    POOL_HEALTH_CHECK_INTERVAL: float = float(os.getenv("KALI_POOL_HEALTH_CHECK_INTERVAL", "30"))
+
+    # --- Mission-affine execution sessions ---
+    # A session container with no commands for this many seconds is destroyed.
+    SESSION_IDLE_TTL: float = float(os.getenv("KALI_SESSION_IDLE_TTL", "900"))
+    # Seconds between sweeps for idle sessions.
+    SESSION_REAP_INTERVAL: float = float(os.getenv("KALI_SESSION_REAP_INTERVAL", "60"))
+
+    # --- Asynchronous job API ---
+    # Maximum number of jobs executing at once; further jobs wait in the queue.
+    JOB_MAX_CONCURRENT: int = int(os.getenv("KALI_JOB_MAX_CONCURRENT", "4"))
+    # Finished jobs (and their in-memory output) are forgotten after this many seconds.
+    JOB_RETENTION_SECONDS: float = float(os.getenv("KALI_JOB_RETENTION_SECONDS", "3600"))
+
+    # --- Command output ---
+    # Every command's full output is persisted here as it streams, for later reporting.
+    OUTPUT_DIR: str = os.getenv("KALI_OUTPUT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "outputs"))
+
+
+server_config = ServerConfig()
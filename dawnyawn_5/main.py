@@ -3,40 +3,71 @@ import os
 import argparse
 import logging
 from dotenv import load_dotenv
-from agent.task_manager import TaskManager
+from agent.task_manager import TaskManager, APPROVAL_POLICIES
 
-def setup_logging():
+def setup_logging(log_filename: str = 'agent_run.log',
+                  log_format: str = "%(asctime)s [%(levelname)s] [%(name)s] - %(message)s"):
     project_root = os.path.dirname(os.path.abspath(__file__))
     logs_dir = os.path.join(project_root, 'logs')
     os.makedirs(logs_dir, exist_ok=True)
-    log_filepath = os.path.join(logs_dir, 'agent_run.log')
+    log_filepath = os.path.join(logs_dir, log_filename)
 
     logging.basicConfig(
         level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] [%(name)s] - %(message)s",
+        format=log_format,
         handlers=[
             logging.FileHandler(log_filepath, mode='w'), # 'w' for overwrite on new run
             logging.StreamHandler()
         ]
     )
 
+def llm_configured() -> bool:
+    """Checks the .env settings needed to talk to the LLM, logging what is missing."""
+    # Replaying recorded LLM responses does not need a live LLM server.
+    replaying = os.getenv("LLM_CASSETTE_MODE", "off").lower() == "replay"
+    if (not os.getenv("OLLAMA_BASE_URL") and not replaying) or not os.getenv("LLM_MODEL"):
+        logging.critical("FATAL ERROR: OLLAMA_BASE_URL or LLM_MODEL not found in .env file.")
+        return False
+    return True
+
+def parse_time_budgets(values) -> dict:
+    """Turns repeated '--time-budget TOOL=SECONDS' options into {tool name: seconds}."""
+    budgets = {}
+    for value in values or []:
+        name, _, seconds = value.partition("=")
+        try:
+            budgets[name.strip()] = float(seconds)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid time budget '{value}', expected TOOL=SECONDS")
+    return budgets
+
+def add_time_budget_argument(parser: argparse.ArgumentParser):
+    parser.add_argument("--time-budget", action="append", metavar="TOOL=SECONDS",
+                        help="Override a tool's time budget for this run, e.g. nikto_web_vuln_scan=300. Repeatable.")
+
 def main():
     setup_logging()
     load_dotenv()
-    if not os.getenv("OLLAMA_BASE_URL") or not os.getenv("LLM_MODEL"):
-        logging.critical("FATAL ERROR: OLLAMA_BASE_URL or LLM_MODEL not found in .env file.")
+    if not llm_configured():
         return
 
     parser = argparse.ArgumentParser(description="DawnYawn Autonomous Agent")
     parser.add_argument("goal", type=str, help="The high-level goal for the agent.")
+    parser.add_argument("--approval-policy", choices=APPROVAL_POLICIES, default="ask",
+                        help="'ask' confirms resuming and the plan on the console; 'auto' approves both.")
+    add_time_budget_argument(parser)
     args = parser.parse_args()
+    try:
+        time_budgets = parse_time_budgets(args.time_budget)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
 
     logging.info("--- DawnYawn Agent Initializing ---")
     logging.info("--- Using Local LLM: %s ---", os.getenv("LLM_MODEL"))
     logging.warning("SECURITY WARNING: This agent executes AI-generated commands on a remote server.")
 
     try:
-        task_manager = TaskManager(goal=args.goal)
+        task_manager = TaskManager(goal=args.goal, approval_policy=args.approval_policy, time_budgets=time_budgets)
         # --- THE FIX: Ask the user if they want to resume or start fresh ---
         task_manager.initialize_mission()
         task_manager.run()
@@ -45,4 +76,4 @@ def main():
         logging.critical("An unhandled exception occurred during the mission: %s", e, exc_info=True)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
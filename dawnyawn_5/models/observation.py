@@ -1,6 +1,66 @@
 # dawnyawn/models/observation.py
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Annotated, List, Literal, Optional, Union
+
+
+class PortFinding(BaseModel):
+    """An open port and the service detected on it (e.g. from Nmap)."""
+    kind: Literal["port"] = "port"
+    host: str
+    port: int
+    protocol: str = "tcp"
+    service: Optional[str] = None
+    product: Optional[str] = None
+    version: Optional[str] = None
+
+    def summary(self) -> str:
+        service = " ".join(part for part in (self.service, self.product, self.version) if part)
+        return f"{self.host} {self.port}/{self.protocol} open {service}".rstrip()
+
+
+class PathFinding(BaseModel):
+    """A discovered web path and its HTTP status (e.g. from Gobuster)."""
+    kind: Literal["path"] = "path"
+    path: str
+    status: int
+    size: Optional[int] = None
+    redirect: Optional[str] = None
+
+    def summary(self) -> str:
+        text = f"{self.path} (Status: {self.status})"
+        if self.redirect:
+            text += f" -> {self.redirect}"
+        return text
+
+
+class TechnologyFinding(BaseModel):
+    """A technology identified on a target (e.g. from WhatWeb)."""
+    kind: Literal["technology"] = "technology"
+    target: str
+    name: str
+    version: Optional[str] = None
+    detail: Optional[str] = None
+
+    def summary(self) -> str:
+        text = f"{self.name} {self.version or ''}".rstrip()
+        return f"{text} [{self.detail}]" if self.detail else text
+
+
+class VulnerabilityFinding(BaseModel):
+    """A potential weakness reported by a scanner (e.g. Nikto or sqlmap)."""
+    kind: Literal["vulnerability"] = "vulnerability"
+    description: str
+    location: Optional[str] = None
+    reference: Optional[str] = None
+
+    def summary(self) -> str:
+        text = f"{self.location}: {self.description}" if self.location else self.description
+        return f"{text} ({self.reference})" if self.reference else text
+
+
+Finding = Annotated[Union[PortFinding, PathFinding, TechnologyFinding, VulnerabilityFinding],
+                    Field(discriminator="kind")]
+
 
 class Observation(BaseModel):
     """
@@ -8,5 +68,17 @@ class Observation(BaseModel):
     """
     status: str = Field(..., description="The outcome of the command. Either 'SUCCESS' or 'FAILURE'.")
     key_finding: str = Field(..., description="A concise, one-sentence summary of the most important information or error message from the output.")
+    findings: List[Finding] = Field(default_factory=list, description="Typed findings parsed from the raw output.")
+    raw_output_ref: Optional[str] = Field(None, description="Where the raw output is stored (e.g. its observation filename).")
     full_output_truncated: Optional[bool] = Field(False, description="True if the full_output was too long and has been truncated.")
-    full_output: str = Field(..., description="The raw, multi-line output from the command. Truncated if too long.")
\ No newline at end of file
+    full_output: str = Field("", description="The raw, multi-line output from the command. Usually left empty and kept by reference.")
+
+    def to_prompt_text(self, max_findings: int = 50) -> str:
+        """Compact rendering of the findings for prompts and reports."""
+        lines = [f"[{self.status}] {self.key_finding}"]
+        lines.extend(f"- {finding.summary()}" for finding in self.findings[:max_findings])
+        if len(self.findings) > max_findings:
+            lines.append(f"- ... and {len(self.findings) - max_findings} more finding(s)")
+        if self.raw_output_ref:
+            lines.append(f"(Raw output: {self.raw_output_ref})")
+        return "\n".join(lines)
@@ -1,68 +1,129 @@
-# dawnyawn/reporting/report_generator.py (Corrected for String Observation)
+# dawnyawn/reporting/report_generator.py
 import os
 import logging
+from contextlib import ExitStack
 from datetime import datetime
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from config import REPORT_FORMATS
+from reporting.report_writers import REPORT_WRITERS, ReportSummary, StepInfo
+from services.blob_store import BlobStore
 
 # Define the project root relative to this file's location
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # Correctly point to the Reports directory inside the Projects folder
 REPORTS_DIR = os.path.join(PROJECT_ROOT, "Projects", "Reports")
 
+# Stored raw outputs are copied into the reports in pieces of this many characters.
+CHUNK_CHARS = 65536
+
+
+def _final_summary(history: List[Dict]) -> str:
+    # --- THE FIX: Handle both string and dict observations for the final step ---
+    if history and history[-1].get('command') == 'finish_mission':
+        final_observation = history[-1].get('observation')
+        # If the observation is a simple string (from a failure), just use it.
+        if isinstance(final_observation, str):
+            return final_observation
+        # If it's a dictionary (from a successful finish), get the key_finding.
+        if isinstance(final_observation, dict):
+            return final_observation.get('key_finding', "No summary provided.")
+    return "Mission did not conclude with a `finish_mission` command."
+
+
+def _summarize(goal: str, history: List[Dict], blob_store: Optional[BlobStore]) -> ReportSummary:
+    """Everything the reports show ahead of the execution log; reads step metadata only, no outputs."""
+    from pydantic import TypeAdapter, ValidationError
+    from models.observation import Finding
+
+    finding_adapter = TypeAdapter(Finding)
+    steps, findings = [], {}
+    for number, item in enumerate(history, start=1):
+        step = StepInfo(number=number, command=item.get('command', 'N/A'), seconds=item.get('seconds'),
+                        tool_seconds=item.get('tool_seconds'), findings=item.get('findings', []),
+                        flags=[flag for flag in ("cached", "partial") if item.get(flag)])
+        if item.get('output'):
+            step.output_bytes = item['output'].get('size')
+            if blob_store is not None:
+                step.raw_output = os.path.relpath(blob_store.path_for(item['output']['hash']), PROJECT_ROOT)
+        for data in step.findings:
+            try:
+                line = finding_adapter.validate_python(data).summary()
+            except ValidationError:
+                continue
+            seen = findings.setdefault(data.get('kind', 'other'), {})
+            seen.setdefault(line, None)  # A dict keeps first-seen order and drops repeats.
+        steps.append(step)
+    return ReportSummary(goal=goal, generated_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'), steps=steps,
+                         findings={kind: list(lines) for kind, lines in findings.items()},
+                         final_summary=_final_summary(history))
 
-def create_report(goal: str, history: List[Dict]):
-    """Generates a professional text report from the mission history."""
+
+def _observation_chunks(item: Dict, blob_store: Optional[BlobStore]) -> Iterator[str]:
+    """
+    A step's observation as the reports show it: the inline observation (e.g. parsed
+    findings or an error) if it has one, otherwise its raw output streamed from the blob store.
+    """
+    if item.get('note'):
+        yield f"{item['note']}\n"
+    if 'observation' in item:
+        text = str(item['observation'])
+    elif 'output' in item and blob_store is not None:
+        yield from blob_store.iter_chunks(item['output']['hash'], CHUNK_CHARS)
+        return
+    elif 'output' in item:
+        text = item['output'].get('preview', '')
+    else:
+        text = ''
+    yield text or 'No observation recorded.'
+
+
+def create_report(goal: str, history: List[Dict], blob_store: Optional[BlobStore] = None,
+                  reports_dir: str = REPORTS_DIR, formats: Sequence[str] = REPORT_FORMATS) -> Optional[str]:
+    """
+    Writes the mission report in each of the given formats ('txt', 'md', 'json', 'html')
+    in a single pass over the history, streaming stored outputs from disk, so neither time
+    nor memory depends on more than one output chunk at a time. Returns the path of the
+    first format's report, or None on failure.
+    """
     try:
-        os.makedirs(REPORTS_DIR, exist_ok=True)
+        os.makedirs(reports_dir, exist_ok=True)
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        report_filename = f"report_{timestamp}.txt"
-        report_filepath = os.path.join(REPORTS_DIR, report_filename)
-
-        with open(report_filepath, 'w', encoding='utf-8') as f:
-            f.write("--- DAWNYAWN MISSION REPORT ---\n")
-            f.write("=" * 35 + "\n\n")
-            f.write(f"Mission Goal: {goal}\n")
-            f.write(f"Report Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write("--- EXECUTION LOG ---\n")
-            f.write("=" * 21 + "\n\n")
-
-            if not history:
-                f.write("No actions were executed during this mission.\n")
-            else:
-                for i, item in enumerate(history):
-                    f.write(f"Step {i + 1}:\n")
-                    f.write("-" * 10 + "\n")
-                    f.write(f"  Action Command:\n    `{item.get('command', 'N/A')}`\n\n")
-                    f.write("  Observation:\n")
-
-                    obs_text = item.get('observation', 'No observation recorded.')
-                    if not isinstance(obs_text, str):
-                        obs_text = str(obs_text)
-
-                    indented_obs = "    " + obs_text.replace('\n', '\n    ')
-                    f.write(indented_obs)
-                    f.write("\n\n")
-
-            f.write("--- FINAL SUMMARY ---\n")
-            f.write("=" * 21 + "\n\n")
-
-            # --- THE FIX: Handle both string and dict observations for the final step ---
-            final_finding = "Mission did not conclude with a `finish_mission` command."
-            if history and history[-1].get('command') == 'finish_mission':
-                final_observation = history[-1].get('observation')
-                # If the observation is a simple string (from a failure), just use it.
-                if isinstance(final_observation, str):
-                    final_finding = final_observation
-                # If it's a dictionary (from a successful finish), get the key_finding.
-                elif isinstance(final_observation, dict):
-                    final_finding = final_observation.get('key_finding', "No summary provided.")
-
-            f.write(f"{final_finding}\n")
-
-        logging.info("✅ Professional report generated at: %s", report_filepath)
+        base_path = os.path.join(reports_dir, f"report_{timestamp}")
+        summary = _summarize(goal, history, blob_store)
+
+        paths = []
+        with ExitStack() as files:
+            writers = []
+            for report_format in formats:
+                writer_class = REPORT_WRITERS.get(report_format)
+                if writer_class is None:
+                    logging.warning("Unknown report format '%s'; expected one of %s.",
+                                    report_format, ", ".join(REPORT_WRITERS))
+                    continue
+                paths.append(f"{base_path}.{writer_class.extension}")
+                writers.append(writer_class(files.enter_context(open(paths[-1], 'w', encoding='utf-8'))))
+
+            for writer in writers:
+                writer.begin(summary)
+            for step, item in zip(summary.steps, history):
+                for writer in writers:
+                    writer.begin_step(step)
+                for chunk in _observation_chunks(item, blob_store):
+                    for writer in writers:
+                        writer.observation(chunk)
+                for writer in writers:
+                    writer.end_step(step)
+            for writer in writers:
+                writer.end(summary)
+
+        if not paths:
+            return None
+        logging.info("✅ Professional report generated at: %s", ", ".join(paths))
+        return paths[0]
 
     except IOError as e:
         logging.error("Failed to write report file: %s", e)
     except Exception as e:
-        logging.error("An unexpected error occurred during report generation: %s", e, exc_info=True)
\ No newline at end of file
+        logging.error("An unexpected error occurred during report generation: %s", e, exc_info=True)
@@ -0,0 +1,274 @@
+# dawnyawn/reporting/report_writers.py
+"""
+One writer per report format. The report generator makes a single pass over the
+mission history and calls every writer in turn: begin() with the mission summary
+(timings and findings, which are small), then for each step begin_step(), any number
+of observation() chunks streamed from disk, and end_step(); finally end(). Writers
+never hold more than one chunk of an observation.
+"""
+import json
+import html
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, TextIO
+
+
+@dataclass
+class StepInfo:
+    number: int
+    command: str
+    seconds: Optional[float] = None  # The whole step: deciding, running the tool and assessing.
+    tool_seconds: Optional[float] = None
+    output_bytes: Optional[int] = None
+    raw_output: Optional[str] = None  # Path of the stored raw output, relative to the project.
+    flags: List[str] = field(default_factory=list)  # e.g. "cached", "partial"
+    findings: List[Dict] = field(default_factory=list)
+
+
+@dataclass
+class ReportSummary:
+    goal: str
+    generated_at: str
+    steps: List[StepInfo]
+    # Finding kind -> unique one-line summaries, in the order they were found.
+    findings: Dict[str, List[str]]
+    final_summary: str
+
+    @property
+    def total_seconds(self) -> Optional[float]:
+        timed = [step.seconds for step in self.steps if step.seconds is not None]
+        return sum(timed) if timed else None
+
+
+FINDING_TITLES = {"port": "Open Ports", "path": "Web Paths", "technology": "Technologies",
+                  "vulnerability": "Potential Vulnerabilities"}
+
+
+def _seconds(value: Optional[float]) -> str:
+    return f"{value:.2f}" if value is not None else "-"
+
+
+def _size(value: Optional[int]) -> str:
+    if value is None:
+        return "-"
+    if value < 1024:
+        return f"{value} B"
+    if value < 1024 ** 2:
+        return f"{value / 1024:.1f} KB"
+    return f"{value / 1024 ** 2:.1f} MB"
+
+
+class _Indenter:
+    """Prefixes every non-empty line of a text that arrives in arbitrary chunks."""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.at_line_start = True
+
+    def feed(self, chunk: str) -> str:
+        out = []
+        for i, part in enumerate(chunk.split("\n")):
+            if i:
+                out.append("\n")
+                self.at_line_start = True
+            if part:
+                if self.at_line_start:
+                    out.append(self.prefix)
+                out.append(part)
+                self.at_line_start = False
+        return "".join(out)
+
+
+class ReportWriter:
+    extension = ""
+
+    def __init__(self, f: TextIO):
+        self.f = f
+
+    def begin(self, summary: ReportSummary):
+        pass
+
+    def begin_step(self, step: StepInfo):
+        pass
+
+    def observation(self, chunk: str):
+        pass
+
+    def end_step(self, step: StepInfo):
+        pass
+
+    def end(self, summary: ReportSummary):
+        pass
+
+
+class TextReportWriter(ReportWriter):
+    extension = "txt"
+
+    def begin(self, summary: ReportSummary):
+        self.f.write("--- DAWNYAWN MISSION REPORT ---\n")
+        self.f.write("=" * 35 + "\n\n")
+        self.f.write(f"Mission Goal: {summary.goal}\n")
+        self.f.write(f"Report Generated: {summary.generated_at}\n\n")
+        if summary.findings:
+            self.f.write("--- FINDINGS ---\n")
+            self.f.write("=" * 16 + "\n\n")
+            for kind, lines in summary.findings.items():
+                self.f.write(f"  {FINDING_TITLES.get(kind, kind.title())}:\n")
+                self.f.writelines(f"    - {line}\n" for line in lines)
+                self.f.write("\n")
+        self.f.write("--- EXECUTION LOG ---\n")
+        self.f.write("=" * 21 + "\n\n")
+        if not summary.steps:
+            self.f.write("No actions were executed during this mission.\n")
+
+    def begin_step(self, step: StepInfo):
+        self.f.write(f"Step {step.number}:\n")
+        self.f.write("-" * 10 + "\n")
+        self.f.write(f"  Action Command:\n    `{step.command}`\n\n")
+        if step.seconds is not None:
+            self.f.write(f"  Time: {_seconds(step.seconds)}s (tool {_seconds(step.tool_seconds)}s)\n\n")
+        self.f.write("  Observation:\n")
+        self._indenter = _Indenter("    ")
+
+    def observation(self, chunk: str):
+        self.f.write(self._indenter.feed(chunk))
+
+    def end_step(self, step: StepInfo):
+        self.f.write("\n" if self._indenter.at_line_start else "\n\n")
+        if step.raw_output:
+            self.f.write(f"  Raw Output: {step.raw_output} ({step.output_bytes} bytes, gzip)\n\n")
+
+    def end(self, summary: ReportSummary):
+        self.f.write("--- FINAL SUMMARY ---\n")
+        self.f.write("=" * 21 + "\n\n")
+        self.f.write(f"{summary.final_summary}\n")
+
+
+def _md_cell(text: str) -> str:
+    return text.replace("|", "\\|").replace("\n", " ")
+
+
+class MarkdownReportWriter(ReportWriter):
+    extension = "md"
+
+    def begin(self, summary: ReportSummary):
+        self.f.write("# DawnYawn Mission Report\n\n")
+        self.f.write(f"**Goal:** {summary.goal}  \n**Generated:** {summary.generated_at}\n\n")
+        self.f.write(f"## Final Summary\n\n{summary.final_summary}\n\n")
+        for kind, lines in summary.findings.items():
+            self.f.write(f"## {FINDING_TITLES.get(kind, kind.title())}\n\n")
+            self.f.writelines(f"- {line}\n" for line in lines)
+            self.f.write("\n")
+        self.f.write("## Step Timing\n\n")
+        self.f.write("| Step | Command | Step (s) | Tool (s) | Output | Notes |\n")
+        self.f.write("|---:|---|---:|---:|---:|---|\n")
+        for step in summary.steps:
+            self.f.write(f"| {step.number} | `{_md_cell(step.command)}` | {_seconds(step.seconds)} | "
+                         f"{_seconds(step.tool_seconds)} | {_size(step.output_bytes)} | {', '.join(step.flags)} |\n")
+        self.f.write(f"| | **Total** | {_seconds(summary.total_seconds)} | | | |\n\n")
+        self.f.write("## Execution Log\n\n")
+
+    def begin_step(self, step: StepInfo):
+        self.f.write(f"### Step {step.number}\n\n`{step.command}`\n\n")
+        # An indented code block: unlike a fence, no observation text can close it early.
+        self._indenter = _Indenter("    ")
+
+    def observation(self, chunk: str):
+        self.f.write(self._indenter.feed(chunk))
+
+    def end_step(self, step: StepInfo):
+        self.f.write("\n" if self._indenter.at_line_start else "\n\n")
+        if step.raw_output:
+            self.f.write(f"Raw output: `{step.raw_output}` ({step.output_bytes} bytes, gzip)\n\n")
+
+
+class JsonReportWriter(ReportWriter):
+    """Writes one JSON document, streaming each observation into its string value."""
+    extension = "json"
+
+    def begin(self, summary: ReportSummary):
+        self.f.write("{\n")
+        for key, value in (("goal", summary.goal), ("generated_at", summary.generated_at),
+                           ("final_summary", summary.final_summary), ("total_seconds", summary.total_seconds),
+                           ("findings", summary.findings)):
+            self.f.write(f"  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},\n")
+        self.f.write('  "steps": [')
+        self._first_step = True
+
+    def begin_step(self, step: StepInfo):
+        fields = {"step": step.number, "command": step.command, "seconds": step.seconds,
+                  "tool_seconds": step.tool_seconds, "output_bytes": step.output_bytes,
+                  "raw_output": step.raw_output, "flags": step.flags, "findings": step.findings}
+        self.f.write("\n    " if self._first_step else ",\n    ")
+        self._first_step = False
+        self.f.write(json.dumps(fields, ensure_ascii=False)[:-1] + ', "observation": "')
+
+    def observation(self, chunk: str):
+        # JSON escapes character by character, so escaping chunk by chunk is exact.
+        self.f.write(json.dumps(chunk, ensure_ascii=False)[1:-1])
+
+    def end_step(self, step: StepInfo):
+        self.f.write('"}')
+
+    def end(self, summary: ReportSummary):
+        self.f.write("\n  ]\n}\n")
+
+
+_HTML_STYLE = """
+body { font-family: system-ui, sans-serif; margin: 2em auto; max-width: 70em; color: #222; }
+table { border-collapse: collapse; margin-bottom: 1.5em; }
+th, td { border: 1px solid #ccc; padding: 0.3em 0.6em; text-align: left; }
+td.num { text-align: right; font-variant-numeric: tabular-nums; }
+code, pre { font-family: ui-monospace, monospace; }
+pre { background: #f6f8fa; padding: 0.8em; overflow-x: auto; white-space: pre-wrap; }
+details { margin-bottom: 0.8em; }
+summary { cursor: pointer; }
+.flag { background: #fff3cd; padding: 0 0.4em; border-radius: 3px; font-size: 0.85em; }
+"""
+
+
+class HtmlReportWriter(ReportWriter):
+    """A single self-contained HTML page; each step's observation is a collapsible block."""
+    extension = "html"
+
+    def begin(self, summary: ReportSummary):
+        e = html.escape
+        self.f.write(f"<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n<meta charset=\"utf-8\">\n"
+                     f"<title>DawnYawn Mission Report</title>\n<style>{_HTML_STYLE}</style>\n</head>\n<body>\n")
+        self.f.write(f"<h1>DawnYawn Mission Report</h1>\n<p><strong>Goal:</strong> {e(summary.goal)}<br>\n"
+                     f"<strong>Generated:</strong> {e(summary.generated_at)}</p>\n")
+        self.f.write(f"<h2>Final Summary</h2>\n<p>{e(summary.final_summary)}</p>\n")
+        for kind, lines in summary.findings.items():
+            self.f.write(f"<h2>{e(FINDING_TITLES.get(kind, kind.title()))}</h2>\n<ul>\n")
+            self.f.writelines(f"<li>{e(line)}</li>\n" for line in lines)
+            self.f.write("</ul>\n")
+        self.f.write("<h2>Step Timing</h2>\n<table>\n<tr><th>Step</th><th>Command</th><th>Step (s)</th>"
+                     "<th>Tool (s)</th><th>Output</th><th>Notes</th></tr>\n")
+        for step in summary.steps:
+            self.f.write(f"<tr><td class=\"num\"><a href=\"#step-{step.number}\">{step.number}</a></td>"
+                         f"<td><code>{e(step.command)}</code></td><td class=\"num\">{_seconds(step.seconds)}</td>"
+                         f"<td class=\"num\">{_seconds(step.tool_seconds)}</td>"
+                         f"<td class=\"num\">{_size(step.output_bytes)}</td><td>{e(', '.join(step.flags))}</td></tr>\n")
+        self.f.write(f"<tr><th></th><th>Total</th><th class=\"num\">{_seconds(summary.total_seconds)}</th>"
+                     f"<th></th><th></th><th></th></tr>\n</table>\n<h2>Execution Log</h2>\n")
+
+    def begin_step(self, step: StepInfo):
+        flags = "".join(f" <span class=\"flag\">{html.escape(flag)}</span>" for flag in step.flags)
+        self.f.write(f"<details id=\"step-{step.number}\">\n<summary>Step {step.number}: "
+                     f"<code>{html.escape(step.command)}</code>{flags}</summary>\n<pre>")
+
+    def observation(self, chunk: str):
+        self.f.write(html.escape(chunk, quote=False))
+
+    def end_step(self, step: StepInfo):
+        self.f.write("</pre>\n")
+        if step.raw_output:
+            self.f.write(f"<p>Raw output: <code>{html.escape(step.raw_output)}</code> "
+                         f"({step.output_bytes} bytes, gzip)</p>\n")
+        self.f.write("</details>\n")
+
+    def end(self, summary: ReportSummary):
+        self.f.write("</body>\n</html>\n")
+
+
+REPORT_WRITERS = {cls.extension: cls for cls in (TextReportWriter, MarkdownReportWriter, JsonReportWriter,
+                                                 HtmlReportWriter)}
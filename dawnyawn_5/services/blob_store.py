@@ -0,0 +1,110 @@
+# dawnyawn/services/blob_store.py
+import io
+import os
+import gzip
+import hashlib
+import logging
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, Optional, TextIO
+
+# Characters of an output kept inline in a history entry as its preview.
+PREVIEW_CHARS = 200
+
+
+class BlobStore:
+    """
+    A content-addressed store of gzip-compressed text blobs, laid out as
+    `<directory>/<hash[:2]>/<hash>.gz`. Identical content is written once; a
+    history entry only keeps a small reference (hash, size and preview) and
+    readers load the content when they actually need it.
+    """
+
+    def __init__(self, directory: str, cache_size: int = 16):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        # Recently read blobs, so prompts rendering the last few steps don't re-inflate them.
+        self.read = lru_cache(maxsize=cache_size)(self._read)
+        # Texts whose compressed write was deferred (see put()), by hash, until it lands.
+        self._pending: Dict[str, str] = {}
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], f"{digest}.gz")
+
+    def put(self, text: str, submit: Optional[Callable] = None) -> Dict:
+        """
+        Stores a text and returns its reference: {"hash", "size", "preview"}. If 'submit' is
+        given (e.g. SideTasks.submit), the compressed write is handed to it and the text is
+        served from memory until the blob is on disk.
+        """
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        if digest not in self._pending and not os.path.exists(self.path_for(digest)):
+            if submit is None:
+                self._write(digest, data)
+            else:
+                self._pending[digest] = text
+                submit(self._write, digest, data)
+        return {"hash": digest, "size": len(data), "preview": text[:PREVIEW_CHARS]}
+
+    def _write(self, digest: str, data: bytes):
+        path = self.path_for(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(temp_path, 'wb', compresslevel=6) as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        self._pending.pop(digest, None)
+        logging.info("Stored output blob %s (%d bytes).", digest[:12], len(data))
+
+    def _open(self, digest: str) -> TextIO:
+        text = self._pending.get(digest)
+        if text is not None:
+            # Universal newlines, like reading the gzip file in text mode.
+            return io.StringIO(text, newline=None)
+        return gzip.open(self.path_for(digest), 'rt', encoding='utf-8')
+
+    def _read(self, digest: str) -> str:
+        with self._open(digest) as f:
+            return f.read()
+
+    def read_prefix(self, digest: str, max_chars: int) -> str:
+        """Decompresses only the start of a blob."""
+        with self._open(digest) as f:
+            return f.read(max_chars)
+
+    def iter_lines(self, digest: str) -> Iterator[str]:
+        """Streams a blob line by line without holding all of it in memory."""
+        with self._open(digest) as f:
+            yield from f
+
+    def iter_chunks(self, digest: str, chunk_chars: int = 65536) -> Iterator[str]:
+        """Streams a blob in fixed-size pieces, so even a single huge line is never held whole."""
+        with self._open(digest) as f:
+            while True:
+                chunk = f.read(chunk_chars)
+                if not chunk:
+                    return
+                yield chunk
+
+
+def step_observation(step: Dict, store: Optional[BlobStore] = None, max_chars: Optional[int] = None) -> str:
+    """
+    The text a history step contributes to prompts and reports: its inline observation
+    if it has one (e.g. parsed findings or an error), otherwise its stored raw output.
+    Without a store, blob-backed steps fall back to their preview.
+    """
+    if "observation" in step:
+        text = str(step["observation"])
+    elif "output" in step:
+        ref = step["output"]
+        if store is None:
+            text = ref.get("preview", "")
+        elif max_chars is not None and ref.get("size", 0) > max_chars:
+            text = store.read_prefix(ref["hash"], max_chars)
+        else:
+            text = store.read(ref["hash"])
+    else:
+        text = ""
+    note = step.get("note")
+    text = f"{note}\n{text}" if note else text
+    return text[:max_chars] if max_chars is not None else text
@@ -0,0 +1,160 @@
+# dawnyawn/services/llm_cassette.py
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from types import SimpleNamespace
+from typing import Dict, Iterator, List, Optional
+
+# Request parameters that do not influence the model's answer and are left out of the key.
+_IGNORED_PARAMS = {"timeout", "stream", "stream_options"}
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when no recorded response matches a request."""
+
+
+def request_key(params: Dict) -> str:
+    """Stable hash of the model, messages and sampling parameters of a chat completion request."""
+    relevant = {k: v for k, v in params.items() if k not in _IGNORED_PARAMS}
+    canonical = json.dumps(relevant, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMCassette:
+    """
+    An append-only JSONL store of chat completion responses keyed by request hash.
+    Identical requests recorded several times are replayed in their recorded order.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._records: Dict[str, List[Dict]] = {}
+        self._replay_cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return sum(len(records) for records in self._records.values())
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A torn final line from an interrupted recording.
+                self._records.setdefault(record["key"], []).append(record)
+        logging.info("Loaded %d recorded LLM responses from '%s'.", len(self), self.path)
+
+    def add(self, key: str, content: str, latency: float, usage: Optional[Dict] = None):
+        record = {"key": key, "content": content, "latency": round(latency, 4), "usage": usage}
+        with self._lock:
+            self._records.setdefault(key, []).append(record)
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n")
+
+    def next_response(self, key: str) -> Dict:
+        with self._lock:
+            records = self._records.get(key)
+            if not records:
+                raise CassetteMiss(f"No recorded LLM response for request {key[:12]} in '{self.path}'.")
+            index = self._replay_cursor.get(key, 0)
+            # Once a key's recordings are used up, keep serving the last one.
+            self._replay_cursor[key] = index + 1
+            return records[min(index, len(records) - 1)]
+
+
+_cassettes: Dict[str, LLMCassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path: str) -> LLMCassette:
+    """Returns the process-wide cassette for a path, so every LLM caller shares one store."""
+    path = os.path.abspath(path)
+    with _cassettes_lock:
+        if path not in _cassettes:
+            _cassettes[path] = LLMCassette(path)
+        return _cassettes[path]
+
+
+def _as_completion(record: Dict) -> SimpleNamespace:
+    """Builds an object shaped like an OpenAI ChatCompletion from a recorded response."""
+    usage = record.get("usage") or {}
+    return SimpleNamespace(
+        choices=[SimpleNamespace(index=0, finish_reason="stop",
+                                 message=SimpleNamespace(role="assistant", content=record["content"]))],
+        usage=SimpleNamespace(**usage) if usage else None,
+    )
+
+
+def _as_chunks(record: Dict, chunk_chars: int = 16) -> Iterator[SimpleNamespace]:
+    """Replays a recorded response as streamed ChatCompletionChunk-shaped objects."""
+    content = record["content"] or ""
+    for start in range(0, len(content), chunk_chars):
+        yield SimpleNamespace(choices=[SimpleNamespace(index=0, finish_reason=None,
+                                                       delta=SimpleNamespace(content=content[start:start + chunk_chars]))])
+    yield SimpleNamespace(choices=[SimpleNamespace(index=0, finish_reason="stop", delta=SimpleNamespace(content=None))])
+
+
+class CassetteLLMClient:
+    """
+    Stands in for the OpenAI client's `chat.completions.create`. In "record" mode it
+    forwards each request to the real client and stores the response; in "replay"
+    mode it serves stored responses without any server, optionally sleeping for the
+    recorded latency multiplied by latency_scale.
+    """
+
+    def __init__(self, cassette: LLMCassette, mode: str, inner_client=None, latency_scale: float = 0.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode '{mode}'. Use 'record' or 'replay'.")
+        if mode == "record" and inner_client is None:
+            raise ValueError("Record mode needs a real LLM client to forward requests to.")
+        self.cassette = cassette
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._inner = inner_client
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **params):
+        key = request_key(params)
+        if self.mode == "replay":
+            record = self.cassette.next_response(key)
+            if self.latency_scale > 0:
+                time.sleep(record["latency"] * self.latency_scale)
+            return _as_chunks(record) if params.get("stream") else _as_completion(record)
+
+        if params.get("stream"):
+            return self._record_stream(key, params)
+        started = time.monotonic()
+        response = self._inner.chat.completions.create(**params)
+        latency = time.monotonic() - started
+        usage = getattr(response, "usage", None)
+        self.cassette.add(key, response.choices[0].message.content, latency,
+                          usage.model_dump() if hasattr(usage, "model_dump") else None)
+        return response
+
+    def _record_stream(self, key: str, params: Dict) -> Iterator:
+        """
+        Forwards a streamed request and records the content the caller consumed. If the
+        caller stops early (e.g. once its JSON is complete), only that prefix is stored,
+        which is exactly what replay needs to reproduce the same result.
+        """
+        started = time.monotonic()
+        stream = self._inner.chat.completions.create(**params)
+        parts = []
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                yield chunk
+        finally:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+            self.cassette.add(key, "".join(parts), time.monotonic() - started)
@@ -1,25 +1,224 @@
 # dawnyawn/services/mcp_client.py (NEW Simplified Version)
+import json
+import time
+import logging
 import requests
-from typing import Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
 from config import service_config
+from services.transport import get_transport
+
+# Prepended to the output of a command that was stopped when its time budget expired.
+PARTIAL_OUTPUT_MARKER = "[PARTIAL OUTPUT:"
+# Slack on top of a command's time budget for the HTTP request carrying it; covers the
+# server's SIGTERM grace period and writing the response.
+_HTTP_TIMEOUT_MARGIN = 60
+_DEFAULT_COMMAND_TIMEOUT = 1800
+
+
+def mark_partial(output: str, time_budget: Optional[float]) -> str:
+    budget = f"{time_budget:.0f}s " if time_budget else ""
+    return (f"{PARTIAL_OUTPUT_MARKER} the {budget}time budget expired and the command was stopped; "
+            f"this is the output it produced until then.]\n{output}")
+
+
+def is_partial(output: Optional[str]) -> bool:
+    """True for the output of a command that was stopped by its time budget."""
+    return bool(output) and output.startswith(PARTIAL_OUTPUT_MARKER)
+
+
+# The execution session the current mission's commands are bound to (see mission_session()).
+_current_session_id: ContextVar[Optional[str]] = ContextVar("mcp_session_id", default=None)
+
+
+def get_session_id() -> Optional[str]:
+    """Returns the execution session ID of the mission running in this context, if any."""
+    return _current_session_id.get()
+
+
+@contextmanager
+def mission_session(session_id: str):
+    """
+    Binds every McpClient command issued inside the block to one persistent
+    container on the execution server, and closes that session on exit.
+    """
+    token = _current_session_id.set(session_id)
+    try:
+        yield session_id
+    finally:
+        _current_session_id.reset(token)
+        McpClient().close_session(session_id)
+
+
+@contextmanager
+def detached_session():
+    """
+    Runs the McpClient commands issued inside the block outside the mission's session,
+    in pooled containers, so several of them can run in parallel (see tools/sharding.py).
+    """
+    token = _current_session_id.set(None)
+    try:
+        yield
+    finally:
+        _current_session_id.reset(token)
+
 
 class McpClient:
-    """Handles communication with the ephemeral execution server."""
+    """Handles communication with the ephemeral execution server over the shared transport."""
+
+    def __init__(self):
+        self.transport = get_transport()
 
-    def execute_command(self, command: str) -> Tuple[str, str]:
+    def _build_payload(self, command: str, timeout: Optional[float] = None) -> Dict:
+        payload = {"command": command}
+        session_id = get_session_id()
+        if session_id:
+            payload["session_id"] = session_id
+        if timeout:
+            payload["timeout"] = timeout
+        return payload
+
+    def execute_command(self, command: str, timeout: Optional[float] = None) -> Tuple[str, str]:
         """
         Executes a command and returns the output filename and its content.
+        'timeout' is the command's time budget; when it expires the server stops the
+        command and the output produced so far is returned, marked with mark_partial().
         Returns (None, error_message) on failure.
         """
+        if service_config.EXECUTION_MODE == "stream":
+            return self._execute_streamed(command, timeout)
+        if service_config.EXECUTION_MODE == "jobs":
+            return self._execute_as_job(command, timeout)
+        payload = self._build_payload(command, timeout)
         try:
-            response = requests.post(
+            response = self.transport.post(
                 f"{service_config.KALI_DRIVER_URL}/execute",
-                json={"command": command},
-                timeout=1800  # Long timeout for potentially long commands
+                json=payload,
+                # The server enforces the budget; allow it time to stop the command and respond.
+                timeout=(timeout or _DEFAULT_COMMAND_TIMEOUT) + _HTTP_TIMEOUT_MARGIN
             )
             response.raise_for_status()
             data = response.json()
+            if data.get("partial"):
+                return data["filename"], mark_partial(data["file_content"], timeout)
             return data["filename"], data["file_content"]
         except requests.exceptions.RequestException as e:
             error_msg = f"Agent-side connection error: {e}"
-            return None, error_msg
\ No newline at end of file
+            return None, error_msg
+
+    def stream_command(self, command: str, timeout: Optional[float] = None) -> Iterator[Dict]:
+        """
+        Executes a command and yields the server's events as they arrive:
+        'start' (with the filename), 'output' (stream + data chunks), then 'exit' or 'error'.
+        Connection failures are reported as a final 'error' event.
+        """
+        try:
+            with self.transport.post(
+                f"{service_config.KALI_DRIVER_URL}/execute/stream",
+                json=self._build_payload(command, timeout),
+                stream=True,
+                # (connect, read-between-chunks): a silent command may produce nothing until its
+                # budget runs out, and then the server still takes its grace period to stop it.
+                timeout=(10, (timeout or _DEFAULT_COMMAND_TIMEOUT) + _HTTP_TIMEOUT_MARGIN)
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines(decode_unicode=True):
+                    if line:
+                        yield json.loads(line)
+        except requests.exceptions.RequestException as e:
+            yield {"event": "error", "detail": f"Agent-side connection error: {e}"}
+
+    def _execute_streamed(self, command: str, timeout: Optional[float] = None) -> Tuple[str, str]:
+        """Collects a streamed command into the same (filename, content) shape as execute_command."""
+        filename, chunks, partial = None, [], False
+        for event in self.stream_command(command, timeout):
+            kind = event.get("event")
+            if kind == "start":
+                filename = event.get("filename")
+            elif kind == "output":
+                chunks.append(event.get("data", ""))
+                logging.debug("[%s] %s", event.get("stream"), event.get("data", "").rstrip())
+            elif kind == "exit":
+                partial = event.get("partial", False)
+            elif kind == "error":
+                return None, event.get("detail", "Unknown streaming error.")
+        output = "".join(chunks)
+        return filename, mark_partial(output, timeout) if partial else output
+
+    def submit_job(self, command: str, timeout: Optional[float] = None) -> Dict:
+        """Queues a command on the server's job API. Returns the job_id, status and filename."""
+        response = self.transport.post(f"{service_config.KALI_DRIVER_URL}/jobs",
+                                       json=self._build_payload(command, timeout), timeout=60)
+        response.raise_for_status()
+        return response.json()
+
+    def get_job(self, job_id: str, offset: int = 0) -> Dict:
+        """Returns a job's status and the output produced since 'offset'."""
+        response = self.transport.get(f"{service_config.KALI_DRIVER_URL}/jobs/{job_id}",
+                                      endpoint="GET /jobs/{id}", params={"offset": offset}, timeout=60)
+        response.raise_for_status()
+        return response.json()
+
+    def cancel_job(self, job_id: str) -> Dict:
+        """Cancels a queued job or kills the remote process of a running one."""
+        response = self.transport.delete(f"{service_config.KALI_DRIVER_URL}/jobs/{job_id}",
+                                         endpoint="DELETE /jobs/{id}", timeout=60)
+        response.raise_for_status()
+        return response.json()
+
+    def _execute_as_job(self, command: str, timeout: Optional[float] = None) -> Tuple[str, str]:
+        """
+        Runs a command through the job API: short polls replace one long-lived request,
+        so a dropped connection only costs one poll. Interrupting cancels the job.
+        """
+        job_id = None
+        try:
+            job = self.submit_job(command, timeout)
+            job_id = job["job_id"]
+            chunks, offset = [], 0
+            while True:
+                time.sleep(service_config.JOB_POLL_INTERVAL)
+                job = self.get_job(job_id, offset)
+                if job["output"]:
+                    chunks.append(job["output"])
+                offset = job["next_offset"]
+                if job["status"] in ("COMPLETED", "FAILED", "CANCELLED"):
+                    break
+            if job["status"] != "COMPLETED":
+                return None, f"Job {job_id} ended with status {job['status']}: {job.get('error') or 'no details'}"
+            output = "".join(chunks)
+            return job["filename"], mark_partial(output, timeout) if job.get("partial") else output
+        except KeyboardInterrupt:
+            if job_id:
+                logging.warning("Interrupted; cancelling job %s on the server.", job_id)
+                self.cancel_job(job_id)
+            raise
+        except requests.exceptions.RequestException as e:
+            return None, f"Agent-side connection error: {e}"
+
+    def open_session(self, session_id: str) -> bool:
+        """Asks the server to start a session's container ahead of its first command. Failures are logged, not raised."""
+        try:
+            response = self.transport.put(f"{service_config.KALI_DRIVER_URL}/sessions/{session_id}",
+                                          endpoint="PUT /sessions/{id}", timeout=300)
+            response.raise_for_status()
+            logging.info("Execution session '%s' opened on the server.", session_id)
+            return True
+        except requests.exceptions.RequestException as e:
+            logging.warning("Could not open execution session '%s' ahead of time: %s", session_id, e)
+            return False
+
+    def close_session(self, session_id: str) -> bool:
+        """Asks the server to destroy a session's container. Failures are logged, not raised."""
+        try:
+            response = self.transport.delete(f"{service_config.KALI_DRIVER_URL}/sessions/{session_id}",
+                                             endpoint="DELETE /sessions/{id}", timeout=60)
+            if response.status_code == 404:
+                return False
+            response.raise_for_status()
+            logging.info("Execution session '%s' closed on the server.", session_id)
+            return True
+        except requests.exceptions.RequestException as e:
+            logging.warning("Could not close execution session '%s': %s", session_id, e)
+            return False
@@ -0,0 +1,185 @@
+# dawnyawn/services/transport.py
+import time
+import random
+import logging
+import threading
+from types import SimpleNamespace
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from config import HTTP_POOL_SIZE, HTTP_MAX_RETRIES, HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX
+
+# Statuses worth retrying: the server was overloaded or a proxy in front of it failed.
+RETRY_STATUSES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class EndpointMetrics:
+    """Thread-safe per-endpoint request counters: calls, errors, retries and latency."""
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, latency: float, error: bool = False, retries: int = 0):
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, {"requests": 0, "errors": 0, "retries": 0,
+                                                      "latency_total": 0.0, "latency_max": 0.0})
+            stats["requests"] += 1
+            stats["errors"] += int(error)
+            stats["retries"] += retries
+            stats["latency_total"] += latency
+            stats["latency_max"] = max(stats["latency_max"], latency)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {endpoint: {**stats, "latency_avg": stats["latency_total"] / stats["requests"]}
+                    for endpoint, stats in self._stats.items()}
+
+    def log_summary(self):
+        for endpoint, stats in sorted(self.snapshot().items()):
+            logging.info("%s: %d request(s), %d error(s), %d retr%s, avg %.3fs, max %.3fs",
+                         endpoint, stats["requests"], stats["errors"], stats["retries"],
+                         "y" if stats["retries"] == 1 else "ies", stats["latency_avg"], stats["latency_max"])
+
+
+endpoint_metrics = EndpointMetrics()
+
+
+def _never_sent(error: requests.exceptions.RequestException) -> bool:
+    """True if the request failed while connecting, so it cannot have reached the server."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.exceptions.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+class Transport:
+    """
+    A pooled, keep-alive HTTP session shared by every execution-server client in the
+    process. Transient failures are retried with jittered exponential backoff: failed
+    connections always (nothing was sent), read timeouts and 429/5xx gateway statuses
+    only for idempotent requests, so a command is never started twice.
+    """
+
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE, max_retries: int = HTTP_MAX_RETRIES,
+                 backoff_base: float = HTTP_BACKOFF_BASE, backoff_max: float = HTTP_BACKOFF_MAX,
+                 metrics: EndpointMetrics = endpoint_metrics):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.metrics = metrics
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method: str, url: str, endpoint: Optional[str] = None,
+                idempotent: Optional[bool] = None, **kwargs) -> requests.Response:
+        """
+        Sends a request through the shared session. 'endpoint' names the counter the
+        request is recorded under (defaults to "METHOD /path"); 'idempotent' defaults
+        to the HTTP semantics of the method.
+        """
+        method = method.upper()
+        endpoint = endpoint or f"{method} {urlsplit(url).path}"
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        attempt = 0
+        started = time.monotonic()
+        while True:
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.exceptions.RequestException as e:
+                retriable = _never_sent(e) or (idempotent and isinstance(e, requests.exceptions.Timeout))
+                if retriable and attempt < self.max_retries:
+                    attempt = self._backoff(endpoint, attempt, e)
+                    continue
+                self.metrics.record(endpoint, time.monotonic() - started, error=True, retries=attempt)
+                raise
+            if idempotent and response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                response.close()
+                attempt = self._backoff(endpoint, attempt, f"HTTP {response.status_code}")
+                continue
+            self.metrics.record(endpoint, time.monotonic() - started,
+                                error=response.status_code >= 500, retries=attempt)
+            return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def _backoff(self, endpoint: str, attempt: int, reason) -> int:
+        # "Full jitter": a random delay up to the exponential cap spreads out retrying clients.
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        logging.warning("%s failed (%s); retrying in %.2fs (attempt %d/%d).",
+                        endpoint, reason, delay, attempt + 1, self.max_retries)
+        time.sleep(delay)
+        return attempt + 1
+
+
+_transport: Optional[Transport] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> Transport:
+    """Returns the process-wide transport, creating it on first use."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = Transport()
+        return _transport
+
+
+class InstrumentedLLMClient:
+    """
+    Wraps an OpenAI-compatible client's `chat.completions.create` to record each call's
+    latency and errors in the shared endpoint metrics. Other attributes pass through.
+    """
+
+    def __init__(self, inner_client, endpoint: str = "LLM chat.completions", metrics: EndpointMetrics = endpoint_metrics):
+        self._inner = inner_client
+        self.endpoint = endpoint
+        self.metrics = metrics
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+    def _create(self, **params):
+        started = time.monotonic()
+        try:
+            response = self._inner.chat.completions.create(**params)
+        except Exception:
+            self.metrics.record(self.endpoint, time.monotonic() - started, error=True)
+            raise
+        if params.get("stream"):
+            return self._timed_stream(response, started)
+        self.metrics.record(self.endpoint, time.monotonic() - started)
+        return response
+
+    def _timed_stream(self, stream, started: float):
+        """Records a streamed call once the caller has finished with (or closed) the stream."""
+        error = False
+        try:
+            yield from stream
+        except Exception:
+            error = True
+            raise
+        finally:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+            self.metrics.record(self.endpoint, time.monotonic() - started, error=error)
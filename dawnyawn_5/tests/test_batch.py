@@ -0,0 +1,46 @@
+# dawnyawn/tests/test_batch.py
+import threading
+from unittest import mock
+
+import pytest
+
+import batch
+
+
+def test_goals_come_from_a_goal_file_or_a_target_template(tmp_path):
+    goals = tmp_path / "goals.txt"
+    goals.write_text("# lab network\nScan 10.0.0.1\n\n  Enumerate http://lab.local  \n", encoding="utf-8")
+    targets = tmp_path / "targets.txt"
+    targets.write_text("10.0.0.1\n# skipped\n10.0.0.2\n", encoding="utf-8")
+
+    assert batch.build_goals(str(goals)) == ["Scan 10.0.0.1", "Enumerate http://lab.local"]
+    assert batch.build_goals(targets_file=str(targets), goal_template="Scan {target}") == ["Scan 10.0.0.1",
+                                                                                         "Scan 10.0.0.2"]
+    with pytest.raises(ValueError):
+        batch.build_goals(targets_file=str(targets), goal_template="Scan everything")
+
+
+def test_batch_runs_missions_concurrently_in_separate_directories(tmp_path):
+    barrier = threading.Barrier(2, timeout=5)
+    created = []
+
+    class FakeTaskManager:
+        def __init__(self, goal, projects_dir, approval_policy, time_budgets=None):
+            created.append((goal, projects_dir, approval_policy))
+            self.status, self.step_durations, self.report_path = "finished", [0.5, 1.5], projects_dir + "/report"
+
+        def initialize_mission(self):
+            pass
+
+        def run(self):
+            barrier.wait()  # Both missions must be running at the same time.
+
+    with mock.patch.object(batch, "TaskManager", FakeTaskManager):
+        summary = batch.run_batch(["Scan host A", "Scan host B"], str(tmp_path), parallelism=2)
+
+    assert sorted(c[1] for c in created) == [str(tmp_path / "001_scan_host_a"), str(tmp_path / "002_scan_host_b")]
+    assert all(c[2] == "auto" for c in created)
+    assert summary["statuses"] == {"finished": 2}
+    assert summary["steps"] == 4
+    assert summary["mean_step_seconds"] == 1.0
+    assert [r["index"] for r in summary["results"]] == [1, 2]
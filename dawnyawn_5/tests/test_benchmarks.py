@@ -0,0 +1,29 @@
+# dawnyawn/tests/test_benchmarks.py
+from benchmarks.agent_loop import run_mission
+from benchmarks.fake_llm_server import ScriptedLLMServer
+
+
+def test_agent_loop_benchmark_runs_a_short_mission_offline(tmp_path):
+    with ScriptedLLMServer() as server:
+        result = run_mission(3, server, output_chars=500, workdir=str(tmp_path), trace_memory=False)
+
+    assert result["steps_executed"] == 3
+    # One planning request, then an action and a progress check per step.
+    assert result["llm"]["requests"] == 7
+    assert result["phases"]["save_state"]["calls"] == 4
+    assert result["phases"]["final_report"]["calls"] == 1
+    assert result["agent_overhead_ms_per_step"] > 0
+
+
+def test_background_bookkeeping_leaves_decisions_unchanged(tmp_path):
+    results, prompts = {}, {}
+    for pipelined in (True, False):
+        # A fresh server each time: its scripted answers depend on what it has already served.
+        with ScriptedLLMServer(record_prompts=True) as server:
+            results[pipelined] = run_mission(4, server, output_chars=2000, workdir=str(tmp_path / str(pipelined)),
+                                             trace_memory=False, pipelined=pipelined)
+            prompts[pipelined] = server.prompts
+
+    assert len(prompts[True]) == 9
+    assert prompts[True] == prompts[False]
+    assert results[False]["overlap_saved_ms_per_step"] == 0
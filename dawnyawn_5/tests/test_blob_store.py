@@ -0,0 +1,47 @@
+# dawnyawn/tests/test_blob_store.py
+import os
+
+from agent.history_compactor import HistoryCompactor
+from reporting import report_generator
+from services.blob_store import BlobStore, step_observation
+
+
+def test_identical_content_is_stored_once_and_compressed(tmp_path):
+    store = BlobStore(str(tmp_path))
+    output = "80/tcp open http\n" * 5000
+
+    first = store.put(output)
+    second = store.put(output)
+
+    assert first == second
+    assert first["size"] == len(output)
+    assert len(first["preview"]) == 200
+    files = [os.path.join(root, name) for root, _, names in os.walk(tmp_path) for name in names]
+    assert len(files) == 1
+    assert os.path.getsize(files[0]) < len(output) // 10
+    assert store.read(first["hash"]) == output
+    assert store.read_prefix(first["hash"], 10) == output[:10]
+
+
+def test_step_observation_prefers_inline_text_and_falls_back_to_blob(tmp_path):
+    store = BlobStore(str(tmp_path))
+    ref = store.put("PING host: 4 packets received")
+
+    assert step_observation({"observation": "parsed findings", "output": ref}, store) == "parsed findings"
+    assert step_observation({"output": ref, "note": "[CACHED]"}, store) == "[CACHED]\nPING host: 4 packets received"
+    assert step_observation({"output": ref}, None) == ref["preview"]
+
+
+def test_prompts_and_reports_load_blob_backed_steps(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    history = [{"command": "[curl_request] http://t", "output": store.put("HTTP/1.1 200 OK\nServer: nginx\n")}]
+
+    compactor = HistoryCompactor(summary_input_chars=5000, blob_store=store)
+    assert "Server: nginx" in compactor.render_step(history[0], max_tokens=1000)[0]
+    assert "Server: nginx" in compactor.digest_line(1, history[0])
+
+    report_generator.create_report("goal", history, store, reports_dir=str(tmp_path / "Reports"))
+    (report,) = (tmp_path / "Reports").glob("*.txt")
+    text = report.read_text(encoding="utf-8")
+    assert "    HTTP/1.1 200 OK\n    Server: nginx\n" in text
+    assert "Raw Output:" in text
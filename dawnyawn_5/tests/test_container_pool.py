@@ -0,0 +1,61 @@
+# dawnyawn/tests/test_container_pool.py
+import os
+import sys
+
+# The execution server is a separate application; make its packages importable.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "kali_execution_server"))
+
+from kali_driver.pool import ContainerPool
+
+
+class FakeContainer:
+    def __init__(self):
+        self.uses = 0
+        self.healthy = True
+        self.destroyed = False
+
+    def is_healthy(self, deep: bool = True) -> bool:
+        return self.healthy
+
+    def destroy(self):
+        self.destroyed = True
+
+
+def _make_pool(size=1, max_uses=2):
+    return ContainerPool(factory=FakeContainer, size=size, max_uses=max_uses, health_check_interval=60)
+
+
+def test_acquire_counts_hits_and_misses():
+    pool = _make_pool()
+    first = pool.acquire()  # Empty pool: created on the request path.
+    pool.release(first)
+    second = pool.acquire()  # Served from the idle queue.
+
+    assert second is first
+    stats = pool.metrics.snapshot()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+def test_release_retires_container_after_max_uses():
+    pool = _make_pool(max_uses=2)
+    container = pool.acquire()
+    pool.release(container)
+    pool.acquire()
+    pool.release(container)
+
+    assert container.destroyed
+    assert pool.idle_count == 0
+
+
+def test_unhealthy_idle_container_is_replaced():
+    pool = _make_pool()
+    stale = pool.acquire()
+    pool.release(stale)
+    stale.healthy = False
+
+    fresh = pool.acquire()
+
+    assert fresh is not stale
+    assert stale.destroyed
+    assert pool.metrics.snapshot()["health_check_failures"] == 1
@@ -0,0 +1,114 @@
+# dawnyawn/tests/test_execution_backends.py
+import os
+import sys
+import threading
+
+# The execution server is a separate application; make its packages importable.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "kali_execution_server"))
+
+from kali_driver.driver import DockerExecChannel, RemoteProcess
+
+
+class FakeExecApi:
+    """The slice of docker.APIClient used by DockerExecChannel, replaying a demultiplexed stream."""
+
+    def __init__(self, frames, exit_code, release=None):
+        self.frames = frames
+        self.exit_code = exit_code
+        self.release = release
+        self.created = []
+
+    def exec_create(self, container_id, cmd, **kwargs):
+        self.created.append((container_id, cmd))
+        return {"Id": "exec-1"}
+
+    def exec_start(self, exec_id, stream, demux):
+        def frames():
+            for frame in self.frames:
+                yield frame
+            if self.release:
+                self.release.wait(5)
+        return frames()
+
+    def exec_inspect(self, exec_id):
+        return {"Running": False, "ExitCode": self.exit_code}
+
+
+def test_docker_exec_output_is_streamed_per_stream_with_exit_code():
+    api = FakeExecApi([(b"PORT   STATE\n", None), (None, b"warn\xc3"), (b"80/tcp open\n", b"\xa9\n")], exit_code=3)
+    process = RemoteProcess(DockerExecChannel(api, "abc123", "nmap host"), "nmap host", timeout=5)
+
+    chunks = list(process.iter_output(poll_interval=0.01))
+
+    assert api.created == [("abc123", ["sh", "-c", "nmap host"])]
+    assert "".join(text for stream, text in chunks if stream == "stdout") == "PORT   STATE\n80/tcp open\n"
+    assert "".join(text for stream, text in chunks if stream == "stderr") == "warné\n"
+    assert process.exit_status == 3
+
+
+def test_time_budget_stops_the_command_and_keeps_its_partial_output():
+    release = threading.Event()
+    signals = []
+    api = FakeExecApi([(b"started\n", None), (b"80/tcp open\n", None)], exit_code=143, release=release)
+    channel = DockerExecChannel(api, "abc", "sleep 99")
+
+    def signal_group(sig):
+        signals.append(sig)
+        release.set()  # The process group dies on SIGTERM, so the output stream ends.
+
+    process = RemoteProcess(channel, "sleep 99", timeout=0.2, signal_group=signal_group)
+    chunks = list(process.iter_output(poll_interval=0.01))
+
+    assert "".join(text for _stream, text in chunks) == "started\n80/tcp open\n"
+    assert signals == ["TERM"]
+    assert process.timed_out
+    assert process.exit_status == 143
+
+
+def test_time_budget_escalates_to_kill_when_the_command_ignores_term():
+    release = threading.Event()
+    signals = []
+    channel = DockerExecChannel(FakeExecApi([(b"started\n", None)], exit_code=137, release=release), "abc", "sleep 99")
+
+    process = RemoteProcess(channel, "sleep 99", timeout=0.1, signal_group=signals.append, grace_period=0.1)
+    chunks = list(process.iter_output(poll_interval=0.01))
+    release.set()
+
+    assert chunks == [("stdout", "started\n")]
+    assert signals == ["TERM", "KILL"]
+    assert process.timed_out
+    assert process.exit_status is None
+
+
+class ChattyChannel:
+    """A channel whose command prints without pause and never exits on its own."""
+
+    def __init__(self):
+        self.closed = False
+
+    def recv_ready(self):
+        return not self.closed
+
+    def recv(self, size):
+        return b"testing password...\n"
+
+    def recv_stderr_ready(self):
+        return False
+
+    def exit_status_ready(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+
+def test_time_budget_stops_a_command_that_never_stops_printing():
+    signals = []
+    process = RemoteProcess(ChattyChannel(), "hydra -V", timeout=0.05, signal_group=signals.append,
+                            grace_period=0.05)
+
+    for _chunk in process.iter_output(poll_interval=0.01):
+        pass
+
+    assert signals == ["TERM", "KILL"]
+    assert process.timed_out
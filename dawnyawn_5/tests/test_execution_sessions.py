@@ -0,0 +1,90 @@
+# dawnyawn/tests/test_execution_sessions.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "kali_execution_server"))
+
+from kali_driver.sessions import SessionRegistry
+
+
+class FakeContainer:
+    short_id = "fake"
+
+    def __init__(self):
+        self.released = False
+
+    def is_healthy(self, deep: bool = True) -> bool:
+        return True
+
+
+def _make_registry(idle_ttl=900.0):
+    released = []
+
+    def release(container, reusable):
+        container.released = True
+        released.append((container, reusable))
+
+    return SessionRegistry(acquire=FakeContainer, release=release, idle_ttl=idle_ttl, reap_interval=60), released
+
+
+def test_session_reuses_one_container():
+    registry, _ = _make_registry()
+    with registry.lease("mission-1") as first:
+        pass
+    with registry.lease("mission-1") as second:
+        pass
+    with registry.lease("mission-2") as other:
+        pass
+
+    assert first is second
+    assert other is not first
+    assert len(registry) == 2
+
+
+def test_open_starts_the_container_before_the_first_command():
+    registry, _ = _make_registry()
+    described = registry.open("mission-1")
+
+    with registry.lease("mission-1") as container:
+        pass
+
+    assert described == {"session_id": "mission-1", "container_id": "fake", "commands": 0, "idle_seconds": 0.0}
+    assert registry.open("mission-1")["commands"] == 1
+    assert registry.list_sessions()[0]["container_id"] == container.short_id
+    assert len(registry) == 1
+
+
+def test_close_releases_container_as_not_reusable():
+    registry, released = _make_registry()
+    with registry.lease("mission-1") as container:
+        pass
+
+    assert registry.close("mission-1")
+    assert released == [(container, False)]
+    assert not registry.close("mission-1")
+
+
+def test_lease_of_a_session_closed_meanwhile_starts_no_container():
+    registry, released = _make_registry()
+    session = registry._session("mission-1")
+    # close() wins the race between a command looking the session up and locking it.
+    registry.close("mission-1")
+    registry._session = lambda session_id: session
+
+    with pytest.raises(RuntimeError):
+        with registry.lease("mission-1"):
+            pass
+    assert session.container is None
+    assert released == []
+
+
+def test_reap_idle_closes_expired_sessions():
+    registry, released = _make_registry(idle_ttl=0.0)
+    with registry.lease("mission-1"):
+        pass
+
+    assert registry.reap_idle() == 1
+    assert len(registry) == 0
+    assert len(released) == 1
@@ -0,0 +1,40 @@
+# dawnyawn/tests/test_history_compactor.py
+import json
+
+from agent.history_compactor import HistoryCompactor, fit_recent_lines, truncate_middle
+
+
+def _step(i, observation=None):
+    return {"command": f"[ping_check] host{i}", "observation": observation or f"PING host{i}: 4 packets received"}
+
+
+def test_render_step_truncates_huge_observations_to_its_budget():
+    compactor = HistoryCompactor(summary_input_chars=5000)
+    huge = "\n".join(f"+ /path{i}: interesting finding" for i in range(20000))
+
+    rendered, truncated = compactor.render_step(_step(1, huge), max_tokens=250)
+
+    assert truncated and len(rendered) <= 250 * 4 + 50
+    assert "chars truncated" in json.loads(rendered)["observation"]
+    rendered, truncated = compactor.render_step(_step(2), max_tokens=250)
+    assert not truncated and json.loads(rendered) == _step(2)
+
+
+def test_digest_line_keeps_the_salient_lines():
+    compactor = HistoryCompactor(summary_input_chars=5000)
+    step = {"command": "[nmap_scan] host", "observation": "Starting Nmap\n80/tcp   open  http\nNmap done"}
+
+    assert compactor.digest_line(4, step) == "Step 4: [nmap_scan] host -> 80/tcp open http"
+
+
+def test_fit_recent_lines_notes_what_was_left_out():
+    assert fit_recent_lines(["one", "two", "three"], 10) == "(1 earlier step(s) omitted to fit the prompt budget)\ntwo\nthree"
+
+
+def test_truncate_middle_keeps_head_and_tail():
+    text = "HEAD" + "x" * 1000 + "TAIL"
+    truncated = truncate_middle(text, 200)
+
+    assert truncated.startswith("HEAD")
+    assert truncated.endswith("TAIL")
+    assert len(truncated) <= 200
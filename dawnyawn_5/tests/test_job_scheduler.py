@@ -0,0 +1,72 @@
+# dawnyawn/tests/test_job_scheduler.py
+import os
+import sys
+import time
+import asyncio
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "kali_execution_server"))
+
+from jobs import JobScheduler, JobStatus
+
+
+class FakeProcess:
+    def __init__(self):
+        self.killed = threading.Event()
+
+    def kill(self):
+        self.killed.set()
+
+
+def _blocking_runner(job):
+    """Emits output until the job's process is killed."""
+    process = FakeProcess()
+    job.attach_process(process)
+    job.append_output("partial ")
+    process.killed.wait(timeout=5)
+
+
+async def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        await asyncio.sleep(0.01)
+
+
+def test_jobs_respect_concurrency_limit_and_expose_partial_output():
+    async def scenario():
+        scheduler = JobScheduler(runner=_blocking_runner, max_concurrent=1, retention_seconds=60)
+        first = scheduler.submit("nmap a", None, "a.txt")
+        second = scheduler.submit("nmap b", None, "b.txt")
+        await _wait_for(lambda: first.status == JobStatus.RUNNING and first.process is not None)
+
+        assert second.status == JobStatus.QUEUED
+        assert scheduler.queue_depth == 1
+        assert first.to_dict()["output"] == "partial "
+
+        await scheduler.cancel(second.job_id)
+        await scheduler.cancel(first.job_id)
+        await _wait_for(lambda: first.status == JobStatus.CANCELLED)
+        assert second.status == JobStatus.CANCELLED
+        scheduler.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_output_offsets_return_only_new_output():
+    def runner(job):
+        job.append_output("abc")
+        job.append_output("def")
+
+    async def scenario():
+        scheduler = JobScheduler(runner=runner, max_concurrent=2, retention_seconds=60)
+        job = scheduler.submit("echo", None, "echo.txt")
+        await _wait_for(lambda: job.status == JobStatus.COMPLETED)
+
+        page = job.to_dict(offset=2)
+        assert page["output"] == "cdef"
+        assert page["next_offset"] == 6
+        assert job.to_dict(offset=6)["output"] == ""
+        scheduler.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,71 @@
+# dawnyawn/tests/test_llm_cassette.py
+from types import SimpleNamespace
+
+import pytest
+
+from services.llm_cassette import CassetteLLMClient, CassetteMiss, LLMCassette, request_key
+
+
+class FakeOpenAI:
+    """Answers each request with a numbered response so replay order can be checked."""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **params):
+        self.calls += 1
+        message = SimpleNamespace(content=f"answer {self.calls}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+REQUEST = {"model": "llama3.1:8b", "messages": [{"role": "user", "content": "hi"}], "temperature": 0.2}
+
+
+def test_request_key_ignores_timeout_but_not_sampling_params():
+    assert request_key({**REQUEST, "timeout": 600}) == request_key(REQUEST)
+    assert request_key({**REQUEST, "temperature": 0.0}) != request_key(REQUEST)
+
+
+def test_recorded_responses_replay_in_order(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    recorder = CassetteLLMClient(LLMCassette(path), "record", inner_client=FakeOpenAI())
+    recorder.chat.completions.create(**REQUEST)
+    recorder.chat.completions.create(**REQUEST)
+
+    # A fresh cassette reads the file back, as a later offline run would.
+    player = CassetteLLMClient(LLMCassette(path), "replay")
+    first = player.chat.completions.create(**REQUEST, timeout=10)
+    second = player.chat.completions.create(**REQUEST)
+
+    assert first.choices[0].message.content == "answer 1"
+    assert second.choices[0].message.content == "answer 2"
+
+
+def test_replay_miss_raises(tmp_path):
+    player = CassetteLLMClient(LLMCassette(str(tmp_path / "empty.jsonl")), "replay")
+    with pytest.raises(CassetteMiss):
+        player.chat.completions.create(**REQUEST)
+
+
+def test_streamed_requests_record_the_consumed_prefix_and_replay_as_chunks(tmp_path):
+    def chunk(text):
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+    class StreamingOpenAI:
+        def __init__(self):
+            self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+        def _create(self, **params):
+            return iter([chunk('{"a": 1}'), chunk(" trailing chatter")])
+
+    path = str(tmp_path / "cassette.jsonl")
+    recorder = CassetteLLMClient(LLMCassette(path), "record", inner_client=StreamingOpenAI())
+    stream = recorder.chat.completions.create(**REQUEST, stream=True)
+    next(stream)
+    stream.close()  # The caller stops once its JSON is complete.
+
+    player = CassetteLLMClient(LLMCassette(path), "replay")
+    replayed = player.chat.completions.create(**REQUEST, stream=True)
+
+    assert "".join(c.choices[0].delta.content or "" for c in replayed) == '{"a": 1}'
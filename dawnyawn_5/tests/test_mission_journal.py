@@ -0,0 +1,70 @@
+# dawnyawn/tests/test_mission_journal.py
+import json
+
+from agent.mission_journal import MissionJournal
+
+PLAN = [{"task_id": 1, "description": "Scan", "status": "PENDING"}]
+
+
+def _step(n):
+    return {"command": f"[nmap_scan] host{n}", "observation": f"output {n}"}
+
+
+def test_resume_replays_snapshot_and_journal_tail(tmp_path):
+    journal = MissionJournal(str(tmp_path), snapshot_every=3)
+    journal.start("goal", PLAN, [])
+    history = []
+    for n in range(5):
+        history.append(_step(n))
+        journal.append_step(history[-1])
+        journal.maybe_snapshot("goal", PLAN, history)
+    done_plan = [{**PLAN[0], "status": "COMPLETED"}]
+    journal.append_plan(done_plan)
+
+    state = MissionJournal(str(tmp_path)).load()
+
+    assert state["goal"] == "goal"
+    assert state["mission_history"] == history
+    assert state["plan"] == done_plan
+
+
+def test_saving_a_step_appends_instead_of_rewriting(tmp_path):
+    journal = MissionJournal(str(tmp_path), fsync_policy="never")
+    journal.start("goal", PLAN, [])
+    journal.append_step(_step(0))
+    journal.append_step(_step(1))
+
+    with open(journal.journal_path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [r["seq"] for r in records] == [1, 2]
+    with open(journal.snapshot_path, encoding="utf-8") as f:
+        assert json.load(f)["mission_history"] == []
+
+
+def test_torn_last_line_and_already_snapshotted_records_are_ignored(tmp_path):
+    journal = MissionJournal(str(tmp_path))
+    journal.start("goal", PLAN, [])
+    journal.append_step(_step(0))
+    journal.snapshot("goal", PLAN, [_step(0)])
+    # Simulate a crash between writing the snapshot and truncating the journal, plus a torn write.
+    with open(journal.journal_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"type": "step", "step": _step(0), "seq": 1}) + "\n")
+        f.write(json.dumps({"type": "step", "step": _step(1), "seq": 2}) + "\n")
+        f.write('{"type": "step", "st')
+
+    resumed = MissionJournal(str(tmp_path))
+    state = resumed.load()
+    assert state["mission_history"] == [_step(0), _step(1)]
+
+    resumed.append_step(_step(2))
+    assert MissionJournal(str(tmp_path)).load()["mission_history"] == [_step(0), _step(1), _step(2)]
+
+
+def test_clear_removes_all_files(tmp_path):
+    journal = MissionJournal(str(tmp_path))
+    journal.start("goal", PLAN, [])
+    journal.append_step(_step(0))
+    journal.clear()
+
+    assert not journal.exists()
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,49 @@
+# dawnyawn/tests/test_observation_index.py
+from agent.observation_index import ObservationIndex, tokenize
+
+
+HISTORY = [
+    {"command": "[nmap_scan] example.com", "observation": "22/tcp open ssh OpenSSH 8.2\n80/tcp open http nginx 1.18"},
+    {"command": "[whois_lookup] example.com", "observation": "Registrar: Example Registrar, Inc.\nCreation Date: 1995"},
+    {"command": "[gobuster_web_scan] http://example.com", "observation": "/admin (Status: 301)\n/login (Status: 200)"},
+]
+
+
+def test_tokenize_lowercases_and_drops_stop_words():
+    assert tokenize("Identify the Web Server on 80/tcp") == ["web", "server", "80", "tcp"]
+
+
+def test_search_ranks_the_matching_step_first():
+    index = ObservationIndex()
+    index.update(HISTORY)
+
+    hits = index.search("Find the registrar and creation date of the domain", top_k=3)
+
+    assert hits[0][1].step == 2
+    assert all(chunk.step != 3 for _score, chunk in hits)  # No shared terms, no score.
+
+
+def test_index_is_updated_incrementally_and_rebuilt_for_a_new_history():
+    index = ObservationIndex()
+    index.update(HISTORY[:1])
+    chunks = len(index)
+    index.update(HISTORY)
+    assert len(index) > chunks
+    assert index._indexed_steps == 3
+
+    index.update(HISTORY[2:])
+    assert [chunk.step for chunk in index._chunks] == [1]
+
+
+def test_render_respects_steps_and_token_budget():
+    index = ObservationIndex(chunk_chars=40)
+    big = "\n".join(f"{port}/tcp open http" for port in range(8000, 8100))
+    index.update(HISTORY + [{"command": "[nmap_scan] example.com -p 8000-8100", "observation": big}])
+
+    rendered = index.render("http web ports", top_k=50, token_budget=60)
+    assert "Step 4:" in rendered
+    assert sum(len(line) for line in rendered.splitlines() if line.startswith("  ")) <= 60 * 4
+
+    limited = index.render("http web ports", top_k=50, token_budget=60, steps={1, 2, 3})
+    assert "Step 4:" not in limited and "Step 1: [nmap_scan] example.com\n  80/tcp open http nginx 1.18" in limited
+    assert index.render("unrelated words", top_k=5, token_budget=100) == ""
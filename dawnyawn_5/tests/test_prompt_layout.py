@@ -0,0 +1,100 @@
+# dawnyawn/tests/test_prompt_layout.py
+from types import SimpleNamespace
+
+from agent.history_compactor import HistoryCompactor, estimate_tokens
+from agent.prompt_layout import PromptLayout, prompt_cache_usage, shared_prefix_chars
+
+
+def _step(i, observation=None):
+    return {"command": f"[ping_check] host{i}", "observation": observation or f"PING host{i}: 4 packets received"}
+
+
+def _layout(token_budget=4000, step_tokens=1000, digest_share=0.3):
+    compactor = HistoryCompactor(summary_input_chars=5000, digest_share=digest_share)
+    return PromptLayout(compactor, token_budget=token_budget, step_tokens=step_tokens)
+
+
+def test_history_block_is_append_only_until_it_folds():
+    layout = _layout(token_budget=200, step_tokens=60)
+    history = []
+    blocks = []
+    for i in range(1, 12):
+        history.append(_step(i, f"PING host{i}: " + "x" * 100))
+        blocks.append(layout.history_block(history))
+
+    prefix_breaks = sum(not later.startswith(earlier) for earlier, later in zip(blocks, blocks[1:]))
+    assert layout.folded_steps > 0
+    assert 0 < prefix_breaks < len(blocks) // 2  # The prefix only changes when steps are folded.
+    assert "Earlier steps (condensed):" in blocks[-1]
+    assert layout._digest_lines[0].startswith("Step 1: [ping_check] host1")
+    assert f"Step {len(history)}:" in blocks[-1]
+
+
+def test_recent_steps_verbatim_and_older_steps_condensed():
+    layout = _layout(token_budget=150, step_tokens=40, digest_share=1.0)
+    block = layout.history_block([_step(i) for i in range(1, 12)])
+
+    assert layout.folded_steps > 0
+    earlier, recent = block.split("\n\n", 1)
+    assert earlier.startswith("Earlier steps (condensed):\nStep 1: [ping_check] host1 -> PING host1: 4 packets received")
+    assert f"Step {layout.folded_steps}: [ping_check] host{layout.folded_steps} ->" in earlier
+    assert f"Step {layout.folded_steps + 1}:\n{{" in recent and "Step 11:\n{" in recent
+
+
+def test_digest_is_built_incrementally():
+    layout = _layout(token_budget=60, step_tokens=40)
+    history = [_step(1), _step(2), _step(3)]
+    layout.history_block(history)
+    folded = layout.folded_steps
+    history.append(_step(4))
+    layout.history_block(history)
+
+    assert folded > 0
+    assert len(layout._digest_lines) == layout.folded_steps
+    assert layout._digest_lines[0].startswith("Step 1:")
+
+
+def test_history_block_respects_token_budget_for_huge_observations():
+    layout = _layout(token_budget=1000, step_tokens=333)
+    huge = "\n".join(f"+ /path{i}: interesting finding" for i in range(20000))
+    history = [_step(i, huge) for i in range(1, 40)]
+
+    block = layout.history_block(history)
+
+    assert estimate_tokens(block) <= 1100
+    assert "chars truncated" in block
+
+
+def test_abridged_steps_are_the_folded_and_truncated_ones():
+    layout = _layout(token_budget=300, step_tokens=100)
+    history = [_step(1), _step(2, "x" * 1000), _step(3)]
+    layout.history_block(history)
+
+    assert layout.folded_steps == 0 and layout.abridged_steps == {2}
+    history.extend(_step(i) for i in range(4, 12))
+    layout.history_block(history)
+    assert layout.folded_steps > 2
+    assert layout.abridged_steps == set(range(1, layout.folded_steps + 1))
+
+
+def test_new_history_resets_the_layout():
+    layout = _layout()
+    layout.history_block([_step(1), _step(2)])
+
+    assert "host9" in layout.history_block([_step(9)]) and "host1" not in layout.history_block([_step(9)])
+
+
+def test_prompt_cache_usage_reads_cached_tokens_or_evaluated_counts():
+    openai_style = SimpleNamespace(prompt_tokens=1000, prompt_tokens_details={"cached_tokens": 900})
+    assert prompt_cache_usage(openai_style, 1100) == {"evaluated_tokens": 100, "cached_tokens": 900,
+                                                      "cache_reuse": 0.9}
+    ollama_style = SimpleNamespace(prompt_tokens=250, prompt_tokens_details=None)
+    assert prompt_cache_usage(ollama_style, 1000)["cache_reuse"] == 0.75
+    assert prompt_cache_usage(None, 1000)["cache_reuse"] is None
+
+
+def test_shared_prefix_chars():
+    long = "a" * 10000
+    assert shared_prefix_chars(long + "b", long + "c") == 10000
+    assert shared_prefix_chars("abc", "abd") == 2
+    assert shared_prefix_chars("", "abc") == 0
@@ -0,0 +1,69 @@
+# dawnyawn/tests/test_report_generator.py
+import json
+import tracemalloc
+
+from reporting.report_generator import create_report
+from services.blob_store import BlobStore
+
+PORT = {"kind": "port", "host": "10.0.0.5", "port": 80, "protocol": "tcp", "service": "http",
+        "product": "nginx", "version": None}
+
+
+def _history(store):
+    return [
+        {"command": "[nmap_scan] 10.0.0.5", "output": store.put("PORT   STATE\n80/tcp open http\n"),
+         "observation": "[SUCCESS] 1 open port\n- 10.0.0.5 80/tcp open http nginx", "findings": [PORT],
+         "seconds": 12.5, "tool_seconds": 10.25},
+        {"command": "[fetch_web_content] http://10.0.0.5/", "output": store.put("<script>alert('x')</script>\n"),
+         "note": "[CACHED RESULT: reused]", "cached": True, "seconds": 0.5, "tool_seconds": 0.0},
+        {"command": "[nmap_scan] 10.0.0.5 -p 80", "observation": "[SUCCESS] again", "findings": [PORT]},
+        {"command": "finish_mission", "observation": "Found nginx on port 80."},
+    ]
+
+
+def test_every_format_is_written_from_one_pass(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    path = create_report("Audit 10.0.0.5", _history(store), store, reports_dir=str(tmp_path / "Reports"))
+
+    assert path.endswith(".txt")
+    base = path[:-len(".txt")]
+    text = open(path, encoding="utf-8").read()
+    assert "    - 10.0.0.5 80/tcp open http nginx\n" in text  # Findings section, deduplicated.
+    assert text.count("10.0.0.5 80/tcp open http nginx") == 2  # ...plus the step's own observation.
+    assert "  Time: 12.50s (tool 10.25s)" in text
+    assert text.endswith("--- FINAL SUMMARY ---\n" + "=" * 21 + "\n\nFound nginx on port 80.\n")
+
+    report = json.load(open(base + ".json", encoding="utf-8"))
+    assert report["findings"] == {"port": ["10.0.0.5 80/tcp open http nginx"]}
+    assert report["total_seconds"] == 13.0
+    assert [step["step"] for step in report["steps"]] == [1, 2, 3, 4]
+    assert report["steps"][1]["observation"] == "[CACHED RESULT: reused]\n<script>alert('x')</script>\n"
+    assert report["steps"][1]["flags"] == ["cached"]
+
+    markdown = open(base + ".md", encoding="utf-8").read()
+    assert "| 1 | `[nmap_scan] 10.0.0.5` | 12.50 | 10.25 | 30 B |  |" in markdown
+    assert "| 3 | `[nmap_scan] 10.0.0.5 -p 80` | - | - | - |  |" in markdown
+
+    page = open(base + ".html", encoding="utf-8").read()
+    assert "&lt;script&gt;alert('x')&lt;/script&gt;" in page and "<script>" not in page
+    assert page.rstrip().endswith("</html>")
+
+
+def test_large_outputs_are_streamed_with_bounded_memory(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    # Each output is one 3 MB line and then many short lines: neither may be held whole.
+    output = store.put("A" * 3_000_000 + "\n" + "/p\n" * 250_000)
+    history = [{"command": "[gobuster_web_scan] http://t", "output": output} for _ in range(4)]
+    create_report("warm-up", [], store, reports_dir=str(tmp_path / "Reports"))  # Imports are not the report's.
+
+    tracemalloc.start()
+    try:
+        path = create_report("goal", history, store, reports_dir=str(tmp_path / "Reports"))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    # 15 MB of observations, written four times over, in a few MB.
+    assert peak < 4_000_000
+    steps = json.load(open(path[:-len(".txt")] + ".json", encoding="utf-8"))["steps"]
+    assert [len(step["observation"]) for step in steps] == [3_750_001] * 4
@@ -0,0 +1,96 @@
+# dawnyawn/tests/test_result_cache.py
+import threading
+import time
+
+from services.mcp_client import is_partial, mark_partial
+from tools.base_tool import normalize_host, normalize_url
+from tools.hydra_tool import HydraTool
+from tools.nmap_tool import NmapTool
+from tools.result_cache import ToolResultCache
+
+
+def test_normalization_canonicalizes_hosts_and_urls():
+    assert normalize_host("  Example.COM. ") == "example.com"
+    assert normalize_url("HTTP://Example.com:80") == "http://example.com/"
+    assert normalize_url("https://example.com:8443/a?x=1#top") == "https://example.com:8443/a?x=1"
+    assert normalize_url("example.com/login") == "http://example.com/login"
+
+
+def test_equivalent_inputs_hit_the_cache():
+    cache = ToolResultCache()
+    calls = []
+
+    def execute():
+        calls.append(1)
+        return "nmap_out.txt", "80/tcp open"
+
+    first = cache.get_or_execute(NmapTool(), "Example.com", execute)
+    second = cache.get_or_execute(NmapTool(), " example.com ", execute)
+
+    assert len(calls) == 1
+    assert not first.cache_hit
+    assert second.cache_hit and second.output == "80/tcp open"
+
+
+def test_failures_and_zero_ttl_tools_are_not_cached():
+    cache = ToolResultCache()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        return None, "Agent-side connection error"
+
+    cache.get_or_execute(NmapTool(), "example.com", failing)
+    cache.get_or_execute(NmapTool(), "example.com", failing)
+    cache.get_or_execute(HydraTool(), "ssh,example.com,root", lambda: ("h.txt", "no password"))
+    result = cache.get_or_execute(HydraTool(), "ssh,example.com,root", lambda: ("h.txt", "no password"))
+
+    assert len(calls) == 2
+    assert not result.cache_hit
+
+
+def test_ttl_override_can_disable_caching():
+    cache = ToolResultCache(ttl_overrides={"nmap_scan": 0})
+    calls = []
+    for _ in range(2):
+        cache.get_or_execute(NmapTool(), "example.com", lambda: calls.append(1) or ("f.txt", "out"))
+
+    assert len(calls) == 2
+
+
+def test_concurrent_identical_requests_are_coalesced():
+    cache = ToolResultCache()
+    calls = []
+    started = threading.Event()
+
+    def slow_execute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "f.txt", "out"
+
+    results = []
+    owner = threading.Thread(target=lambda: results.append(cache.get_or_execute(NmapTool(), "a.com", slow_execute)))
+    owner.start()
+    started.wait()
+    results.append(cache.get_or_execute(NmapTool(), "A.com", slow_execute))
+    owner.join()
+
+    assert len(calls) == 1
+    assert cache.coalesced == 1
+    assert [r.output for r in results] == ["out", "out"]
+
+
+def test_partial_results_are_not_cached():
+    cache = ToolResultCache()
+    calls = []
+
+    def stopped_by_budget():
+        calls.append(1)
+        return "nmap_out.txt", mark_partial("22/tcp open", 1200)
+
+    first = cache.get_or_execute(NmapTool(), "example.com", stopped_by_budget)
+    second = cache.get_or_execute(NmapTool(), "example.com", stopped_by_budget)
+
+    assert is_partial(first.output) and not second.cache_hit
+    assert len(calls) == 2
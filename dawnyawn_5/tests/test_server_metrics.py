@@ -0,0 +1,43 @@
+# dawnyawn/tests/test_server_metrics.py
+import os
+import sys
+
+# The execution server is a separate application; make its packages importable.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "kali_execution_server"))
+
+from kali_driver.metrics import (Gauge, Histogram, MetricsRegistry, format_server_timing, observe_phase,
+                                 phase_seconds, request_timings)
+
+
+def test_histogram_renders_cumulative_buckets_in_prometheus_format():
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram("phase_seconds", "Phase time.", labelnames=("phase",), buckets=(0.1, 1)))
+    registry.register(Gauge("queue_depth", "Queued jobs.", callback=lambda: 3))
+    histogram.observe(0.05, phase="command")
+    histogram.observe(0.5, phase="command")
+    histogram.observe(5, phase="command")
+
+    text = registry.render()
+
+    assert "# TYPE phase_seconds histogram" in text
+    assert 'phase_seconds_bucket{phase="command",le="0.1"} 1' in text
+    assert 'phase_seconds_bucket{phase="command",le="1"} 2' in text
+    assert 'phase_seconds_bucket{phase="command",le="+Inf"} 3' in text
+    assert 'phase_seconds_count{phase="command"} 3' in text
+    assert "queue_depth 3" in text
+
+
+def test_phases_are_added_to_the_current_request_breakdown():
+    timings = {}
+    token = request_timings.set(timings)
+    try:
+        observe_phase("ssh_connect", 0.25)
+        observe_phase("command", 1.5)
+        observe_phase("command", 0.5)
+    finally:
+        request_timings.reset(token)
+    observe_phase("destroy", 0.1)  # Outside a request: histogram only.
+
+    assert timings == {"ssh_connect": 0.25, "command": 2.0}
+    assert format_server_timing(timings) == "ssh_connect;dur=250.0, command;dur=2000.0"
+    assert 'phase="destroy"' in "\n".join(phase_seconds.render())
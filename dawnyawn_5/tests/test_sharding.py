@@ -0,0 +1,180 @@
+# dawnyawn/tests/test_sharding.py
+import threading
+
+import pytest
+
+from services import mcp_client
+from tools import sharding
+from tools.gobuster_tool import GobusterTool
+from tools.nmap_tool import NmapTool
+from tools.sharding import ThroughputTracker, WordlistShardedTool, split_evenly, split_range
+from tools.subdomain_tool import SubdomainTool
+
+
+def _nmap_xml(ports, host="10.0.0.5"):
+    elements = "".join(f'<port protocol="tcp" portid="{p}"><state state="open"/><service name="svc{p}"/></port>'
+                       for p in ports)
+    return (f'<?xml version="1.0"?><nmaprun><host><status state="up"/><address addr="{host}" addrtype="ipv4"/>'
+            f'<ports>{elements}</ports></host></nmaprun>')
+
+
+class ShardClient:
+    """Answers each shard by its port range, and checks the shards run concurrently outside the session."""
+
+    def __init__(self, shards):
+        self.barrier = threading.Barrier(shards, timeout=5)
+        self.sessions = []
+
+    def execute_command(self, command, timeout=None):
+        self.sessions.append(mcp_client.get_session_id())
+        self.barrier.wait()
+        if "-p 1-2" in command:
+            return "a.txt", _nmap_xml([22, 80])
+        if "-p 3-4" in command:
+            return "b.txt", _nmap_xml([80, 443])  # Port 80 again: must be de-duplicated.
+        return None, "Agent-side connection error: refused"
+
+
+def test_ranges_and_items_are_split_into_balanced_shards():
+    assert [(r.start, r.stop) for r in split_range(1, 10, 3)] == [(1, 4), (4, 7), (7, 11)]
+    assert split_evenly(["a", "b", "c", "d", "e"], 2) == [["a", "c", "e"], ["b", "d"]]
+    assert split_evenly(["a"], 4) == [["a"]]
+
+
+def test_nmap_inputs_are_sharded_by_host_or_port():
+    tool = NmapTool(shards=4)
+
+    assert tool.plan_shards("example.com") == ["example.com"]
+    assert tool.plan_shards("10.0.0.0/24") == ["10.0.0.0/26", "10.0.0.64/26", "10.0.0.128/26", "10.0.0.192/26"]
+    assert tool.plan_shards("10.0.0.1 10.0.0.2 -p 80") == ["10.0.0.1 -p 80", "10.0.0.2 -p 80"]
+    assert tool.plan_shards("10.0.0.5 -p 1-65535")[-1] == "10.0.0.5 -p 49152-65535"
+    assert NmapTool(shards=1).plan_shards("10.0.0.0/24") == ["10.0.0.0/24"]
+
+
+def test_shards_run_in_parallel_and_merge_into_one_result():
+    tool = NmapTool(shards=3)
+    tool.mcp_client = ShardClient(shards=3)
+    token = mcp_client._current_session_id.set("mission-1")
+    try:
+        filename, output = tool.execute("10.0.0.5 -p 1-6")
+    finally:
+        mcp_client._current_session_id.reset(token)
+
+    assert tool.mcp_client.sessions == [None, None, None]
+    assert filename == "a.txt"
+    observation = tool.parse_output(output)
+    assert sorted(f.port for f in observation.findings) == [22, 80, 443]
+    assert "3 parallel shards (1 failed)" in observation.key_finding
+    assert output.count('<shard ') == 3
+
+
+class WordlistClient:
+    def __init__(self):
+        self.commands = []
+
+    def execute_command(self, command, timeout=None):
+        self.commands.append(command)
+        shard = len(self.commands)
+        return f"shard{shard}.txt", (f"Progress: 10 / 1000 (1.00%)\r/admin (Status: 301) [Size: 0]\n"
+                                     f"/page{shard} (Status: 200) [Size: 12]\nProgress: 1000 / 1000 (100.00%)\n")
+
+
+def test_gobuster_wordlist_shards_are_merged_without_duplicates():
+    tool = GobusterTool()
+    tool.throughput = ThroughputTracker(max_shards=4, target_seconds=60)  # Nothing measured yet.
+    tool.mcp_client = WordlistClient()
+
+    filename, output = tool.execute("http://lab.local")
+
+    assert len(tool.mcp_client.commands) == 4
+    assert "awk 'NR % 4 == 3' /app/wordlists/common.txt" in tool.mcp_client.commands[3]
+    assert output.count("/admin ") == 1
+    assert "Shard 2/4: 1000 words in" in output
+    assert sorted(f.path for f in tool.parse_output(output).findings) == ["/admin", "/page1", "/page2", "/page3",
+                                                                          "/page4"]
+
+
+def test_subdomain_results_are_keyed_by_name():
+    tool = SubdomainTool()
+    assert tool.result_key("Found: WWW.lab.local.") == "www.lab.local"
+    assert tool.result_key("Starting gobuster in DNS enumeration mode") is None
+
+
+def test_shard_count_follows_measured_throughput():
+    tracker = ThroughputTracker(max_shards=8, target_seconds=10)
+    assert tracker.shards_for("common.txt") == 8  # Unmeasured: use every shard available.
+
+    tracker.record("common.txt", words=1000, total_words=4000, seconds=10)  # 100 words/s per shard.
+    assert tracker.shards_for("common.txt") == 4
+
+    tracker.record("common.txt", words=4000, total_words=4000, seconds=1)  # Smoothed to 2050 words/s.
+    assert tracker.shards_for("common.txt") == 1
+
+
+def test_throughput_measured_by_one_mission_is_reused_by_the_next(monkeypatch):
+    tracker = ThroughputTracker(max_shards=4, target_seconds=60)
+    monkeypatch.setattr(GobusterTool, "throughput", tracker)
+    first, second = GobusterTool(), GobusterTool()  # Each mission's ToolManager has its own instance.
+    first.mcp_client = WordlistClient()
+
+    first.execute("http://lab.local")
+
+    assert second.throughput.shards_for(second.throughput_key("http://lab.local/")) < 4
+    assert second.throughput.shards_for(second.throughput_key("http://other.local")) == 4  # Another target.
+
+
+class FakeClock:
+    """A monotonic clock per thread, so concurrent shards each see only their own time pass."""
+
+    def __init__(self):
+        self._now = {}
+
+    def monotonic(self):
+        return self._now.get(threading.get_ident(), 0.0)
+
+    def advance(self, seconds):
+        self._now[threading.get_ident()] = self.monotonic() + seconds
+
+
+class TimedWordlistClient:
+    """Answers every process with a complete progress line after 'seconds' on a fake clock."""
+
+    def __init__(self, clock, seconds, total):
+        self.clock, self.seconds, self.total = clock, seconds, total
+        self.commands = []
+
+    def execute_command(self, command, timeout=None):
+        self.commands.append(command)
+        self.clock.advance(self.seconds)
+        words = self.total // (int(command.split("NR % ")[1].split()[0]) if "NR % " in command else 1)
+        return "out.txt", f"Progress: {words} / {words} (100.00%)\n"
+
+
+def test_unsharded_runs_are_measured_so_a_slower_target_gets_shards_back(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(sharding, "time", clock)
+    tool = GobusterTool()
+    tool.throughput = ThroughputTracker(max_shards=4, target_seconds=60)
+    key = tool.throughput_key("http://lab.local")
+
+    tool.mcp_client = TimedWordlistClient(clock, seconds=10, total=4000)  # Each shard: 1000 words at 100 words/s.
+    tool.execute("http://lab.local")
+    assert len(tool.mcp_client.commands) == 4
+    assert tool.throughput.shards_for(key) == 1
+
+    tool.mcp_client = TimedWordlistClient(clock, seconds=400, total=4000)  # The target slowed to 10 words/s.
+    tool.execute("http://lab.local")
+    assert "NR %" not in tool.mcp_client.commands[0]
+    assert tool.throughput.shards_for(key) > 1  # Smoothed to 55 words/s.
+
+
+def test_wordlist_tools_must_implement_the_shard_hooks():
+    class Incomplete(WordlistShardedTool):
+        name = "incomplete"
+        description = "Has no shard command."
+
+        def result_key(self, line):
+            return line
+
+    with pytest.raises(TypeError):
+        Incomplete()
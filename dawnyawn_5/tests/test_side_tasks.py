@@ -0,0 +1,68 @@
+# dawnyawn/tests/test_side_tasks.py
+import threading
+import time
+from concurrent.futures import wait
+
+import pytest
+
+from agent.side_tasks import SideTasks
+from services.blob_store import BlobStore
+
+
+def test_tasks_run_in_order_off_the_calling_thread():
+    side_tasks = SideTasks()
+    ran = []
+    for i in range(5):
+        side_tasks.submit(lambda i=i: ran.append((i, threading.current_thread().name)))
+    side_tasks.close()
+
+    assert [i for i, _ in ran] == list(range(5))
+    assert all(name.startswith("side-task") for _, name in ran)
+
+
+def test_overlapped_time_is_counted_as_saved():
+    side_tasks = SideTasks()
+    side_tasks.submit(time.sleep, 0.05)
+    wait(side_tasks._pending)  # The caller's own work, e.g. an LLM call, outlasts the task.
+    side_tasks.drain()
+
+    assert side_tasks.busy_seconds >= 0.05
+    assert side_tasks.saved_seconds > 0.04
+
+
+def test_disabled_runs_inline_and_saves_nothing():
+    side_tasks = SideTasks(enabled=False)
+    ran = []
+    side_tasks.submit(ran.append, threading.current_thread().name)
+
+    assert ran == [threading.current_thread().name]
+    assert side_tasks.saved_seconds == 0
+
+
+def test_a_failed_task_is_raised_by_the_next_submit():
+    side_tasks = SideTasks()
+    side_tasks.submit(open, "/nonexistent/dir/journal")
+    wait(side_tasks._pending)
+
+    with pytest.raises(FileNotFoundError):
+        side_tasks.submit(lambda: None)
+    side_tasks.submit(lambda: None)  # Reported once only.
+    side_tasks.close()
+
+
+def test_deferred_blob_is_readable_before_it_is_written(tmp_path):
+    store = BlobStore(str(tmp_path))
+    queued = []
+    ref = store.put("line 1\r\nline 2\n", submit=lambda fn, *args: queued.append((fn, args)))
+
+    assert len(queued) == 1
+    assert not (tmp_path / ref["hash"][:2]).exists()
+    assert store.read(ref["hash"]) == "line 1\nline 2\n"
+    assert list(store.iter_lines(ref["hash"])) == ["line 1\n", "line 2\n"]
+    assert store.put("line 1\r\nline 2\n", submit=lambda fn, *args: queued.append((fn, args))) == ref
+    assert len(queued) == 1  # Identical content is only written once.
+
+    fn, args = queued[0]
+    fn(*args)
+    assert store.read_prefix(ref["hash"], 6) == "line 1"
+    assert "".join(store.iter_chunks(ref["hash"], 4)) == "line 1\nline 2\n"
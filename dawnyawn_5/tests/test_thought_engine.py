@@ -0,0 +1,174 @@
+# dawnyawn/tests/test_thought_engine.py
+from types import SimpleNamespace
+
+from agent import thought_engine
+from agent.json_extractor import IncrementalJsonExtractor
+from agent.thought_engine import ThoughtEngine
+from models.task_node import TaskNode, TaskStatus
+from tools.tool_manager import ToolManager
+
+
+class ScriptedClient:
+    """Returns canned completions in order, mimicking client.chat.completions.create."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **params):
+        self.requests.append(params)
+        message = SimpleNamespace(content=self.responses.pop(0))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+PLAN = [TaskNode(task_id=1, description="Scan the target"), TaskNode(task_id=2, description="Identify the web server")]
+HISTORY = [{"command": "[nmap_scan] example.com", "observation": "80/tcp open http nginx 1.18"}]
+
+
+def _engine(*responses) -> ThoughtEngine:
+    engine = ThoughtEngine(ToolManager())
+    engine.client = ScriptedClient(*responses)
+    return engine
+
+
+def test_decide_step_returns_completed_ids_and_next_action():
+    engine = _engine('{"completed_task_ids": [1, 2, 7], '
+                     '"next_action": {"tool_name": "whatweb_scan", "tool_input": "http://example.com"}}')
+
+    decision = engine.decide_step("Audit example.com", PLAN, HISTORY)
+
+    assert decision.completed_task_ids == [1, 2]  # Unknown task 7 is dropped.
+    assert decision.next_action.tool_name == "whatweb_scan"
+
+
+def test_decide_step_returns_none_on_invalid_schema():
+    engine = _engine('{"completed_task_ids": [1]}')
+
+    assert engine.decide_step("Audit example.com", PLAN, HISTORY) is None
+
+
+def test_decide_step_returns_none_for_unknown_tool():
+    engine = _engine('{"completed_task_ids": [], "next_action": {"tool_name": "rm_rf", "tool_input": "/"}}')
+
+    assert engine.decide_step("Audit example.com", PLAN, HISTORY) is None
+
+
+class StreamingClient:
+    """Streams a response in small chunks and records how many the caller consumed."""
+
+    def __init__(self, text, chunk_chars=4):
+        self.pieces = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)]
+        self.consumed = 0
+        self.closed = False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **params):
+        assert params["stream"] is True
+        return self
+
+    def __iter__(self):
+        for piece in self.pieces:
+            self.consumed += 1
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+    def close(self):
+        self.closed = True
+
+
+def test_json_extractor_handles_strings_and_split_input():
+    extractor = IncrementalJsonExtractor()
+
+    assert extractor.feed('```json\n{"tool_input": "a } \\" {"') is None
+    assert extractor.feed(', "x": {"y": 1}}\n``` and {"next": 2}') == '{"tool_input": "a } \\" {", "x": {"y": 1}}'
+    assert extractor.feed("") == '{"next": 2}'
+
+
+def test_streaming_stops_once_a_valid_object_is_complete(monkeypatch):
+    monkeypatch.setattr(thought_engine, "LLM_STREAMING", True)
+    answer = '{"tool_name": "nmap_scan", "tool_input": "example.com"}'
+    client = StreamingClient(answer + "\n\nI chose nmap because" + " it is thorough." * 50)
+    engine = ThoughtEngine(ToolManager())
+    engine.client = client
+
+    selection = engine.choose_next_action("Audit example.com", PLAN, HISTORY)
+
+    assert selection.tool_name == "nmap_scan"
+    assert client.closed
+    assert client.consumed == len(answer) // 4 + 1
+    assert engine.call_timings[-1]["ttft"] is not None
+
+
+def test_streaming_skips_objects_that_fail_validation(monkeypatch):
+    monkeypatch.setattr(thought_engine, "LLM_STREAMING", True)
+    engine = ThoughtEngine(ToolManager())
+    engine.client = StreamingClient('{"thinking": "scan first"} {"completed_task_ids": [1]}')
+
+    assert engine.get_completed_task_ids("Audit example.com", PLAN, HISTORY) == [1]
+
+
+def _mission_history():
+    return [
+        {"command": "[nmap_scan] example.com", "observation": "80/tcp open http nginx 1.18"},
+        {"command": "[whois_lookup] example.com", "observation": "Registrar: Example Registrar, Inc."},
+    ] + [{"command": f"[ping_check] host{i}", "observation": f"host{i} is up"} for i in range(3)]
+
+
+def _mission_plan():
+    plan = [TaskNode(task_id=1, description="Look up the registrar"),
+            TaskNode(task_id=2, description="Identify the http server software")]
+    plan[0].status = TaskStatus.COMPLETED
+    return plan
+
+
+def test_next_action_prompt_retrieves_only_what_the_history_does_not_show():
+    engine = _engine('{"tool_name": "whatweb_scan", "tool_input": "http://example.com"}',
+                     '{"tool_name": "whatweb_scan", "tool_input": "http://example.com"}')
+    history = _mission_history()
+
+    # Five short steps fit the history budget verbatim, so nothing needs retrieving.
+    engine.choose_next_action("Audit example.com", _mission_plan(), history)
+    assert "Earlier Steps" not in engine.client.requests[0]["messages"][-1]["content"]
+
+    # A long scan is truncated in the middle, where its finding is.
+    filler = [f"filler line {i:05d}" for i in range(3000)]
+    history[0] = {"command": "[nmap_scan] example.com",
+                  "observation": "\n".join(filler[:1500] + ["80/tcp open http nginx 1.18"] + filler[1500:])}
+    engine.prompt_layout.reset()
+    engine.choose_next_action("Audit example.com", _mission_plan(), history)
+
+    history_message, request = (m["content"] for m in engine.client.requests[1]["messages"][1:])
+    assert engine.prompt_layout.folded_steps == 0
+    excerpts = request.split("**Earlier Steps (excerpts relevant to the pending tasks):**\n")[1].split("\n\n")[0]
+    assert "80/tcp open http nginx 1.18" in excerpts and "Example Registrar" not in request
+    excerpt_lines = [line.strip() for line in excerpts.splitlines() if line.startswith("  ")]
+    assert excerpt_lines and not any(line in history_message for line in excerpt_lines)
+
+
+def test_folded_steps_keep_their_digest_alongside_retrieval():
+    engine = _engine('{"tool_name": "whatweb_scan", "tool_input": "http://example.com"}')
+    engine.prompt_layout.token_budget = 60  # Fold all but the latest step...
+    engine.history_compactor.digest_share = 2.0  # ...into a digest that keeps every line.
+
+    engine.choose_next_action("Audit example.com", _mission_plan(), _mission_history())
+
+    history_message, request = (m["content"] for m in engine.client.requests[0]["messages"][1:])
+    assert engine.prompt_layout.folded_steps == 4
+    assert "Step 2: [whois_lookup] example.com -> Registrar: Example Registrar, Inc." in history_message
+    assert "80/tcp open http nginx 1.18" in request
+
+
+def test_every_call_shares_the_system_prompt_and_history_prefix():
+    engine = _engine('{"completed_task_ids": [1]}',
+                     '{"tool_name": "whatweb_scan", "tool_input": "http://example.com"}')
+    history = list(HISTORY)
+
+    engine.get_completed_task_ids("Audit example.com", PLAN, history)
+    history.append({"command": "[whatweb_scan] http://example.com", "observation": "nginx[1.18]"})
+    engine.choose_next_action("Audit example.com", PLAN, history)
+
+    first, second = (request["messages"] for request in engine.client.requests)
+    assert first[0] == second[0]
+    assert second[1]["content"].startswith(first[1]["content"])  # History is append-only.
+    assert "Strategic Plan" in second[2]["content"] and "Strategic Plan" not in second[1]["content"]
+    assert engine.call_timings[1]["shared_prefix"] > 0.5
@@ -0,0 +1,102 @@
+# dawnyawn/tests/test_tool_parsers.py
+from tools.gobuster_tool import GobusterTool
+from tools.nikto_tool import NiktoTool
+from tools.nmap_tool import NmapTool
+from tools.sqlmap_tool import SqlmapTool
+from tools.whatweb_tool import WhatWebTool
+
+NMAP_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<nmaprun scanner="nmap" args="nmap -sV -T4 --open -oX - example.com">
+<host><status state="up"/><address addr="93.184.216.34" addrtype="ipv4"/>
+<hostnames><hostname name="example.com" type="user"/></hostnames>
+<ports>
+<port protocol="tcp" portid="80"><state state="open"/><service name="http" product="nginx" version="1.18.0"/></port>
+<port protocol="tcp" portid="443"><state state="open"/><service name="https"/></port>
+</ports></host>
+</nmaprun>"""
+
+GOBUSTER_OUTPUT = """===============================================================
+Gobuster v3.6
+===============================================================
+/admin                (Status: 301) [Size: 0] [--> http://example.com/admin/]
+/index.php            (Status: 200) [Size: 1024]
+Progress: 4614 / 4615 (99.98%)
+==============================================================="""
+
+WHATWEB_OUTPUT = ("http://example.com [200 OK] Apache[2.4.7], Country[UNITED STATES][US], "
+                  "HTTPServer[Ubuntu Linux][Apache/2.4.7 (Ubuntu)], PHP[5.5.9], Title[Home, Sweet Home]")
+
+NIKTO_OUTPUT = """- Nikto v2.5.0
++ Target IP:          93.184.216.34
++ Start Time:         2025-09-25 14:57:01
++ Server: Apache/2.4.7 (Ubuntu)
++ /: The anti-clickjacking X-Frame-Options header is not present.
++ /phpinfo.php: Output from the phpinfo() function was found. OSVDB-3233
++ 8102 requests: 0 error(s) and 2 item(s) reported on remote host
++ End Time:           2025-09-25 15:01:13"""
+
+SQLMAP_OUTPUT = """sqlmap identified the following injection point(s) with a total of 46 HTTP(s) requests:
+---
+Parameter: cat (GET)
+    Type: boolean-based blind
+    Title: AND boolean-based blind - WHERE or HAVING clause
+    Payload: cat=1 AND 1=1
+
+    Type: UNION query
+    Title: Generic UNION query (NULL) - 11 columns
+---
+back-end DBMS: MySQL >= 5.6"""
+
+
+def test_nmap_xml_becomes_port_findings():
+    observation = NmapTool().parse_output(NMAP_XML)
+
+    assert [(f.host, f.port, f.product) for f in observation.findings] == [
+        ("example.com", 80, "nginx"), ("example.com", 443, None)]
+    assert "2 open port(s)" in observation.key_finding
+
+
+def test_nmap_non_xml_output_falls_back_to_raw_text():
+    assert NmapTool().parse_output("Failed to resolve \"nosuchhost\".") is None
+
+
+def test_gobuster_paths_are_parsed_with_status_and_redirect():
+    observation = GobusterTool().parse_output(GOBUSTER_OUTPUT)
+
+    assert [(f.path, f.status, f.redirect) for f in observation.findings] == [
+        ("/admin", 301, "http://example.com/admin/"), ("/index.php", 200, None)]
+
+
+def test_whatweb_plugins_become_technologies():
+    findings = WhatWebTool().parse_output(WHATWEB_OUTPUT).findings
+    by_name = {f.name: f for f in findings}
+
+    assert by_name["Apache"].version == "2.4.7"
+    assert by_name["PHP"].version == "5.5.9"
+    assert by_name["Title"].detail == "Home, Sweet Home"
+
+
+def test_nikto_findings_skip_run_metadata():
+    observation = NiktoTool().parse_output(NIKTO_OUTPUT)
+
+    assert len(observation.findings) == 2
+    assert observation.findings[1].location == "/phpinfo.php"
+    assert observation.findings[1].reference == "OSVDB-3233"
+    assert "Apache/2.4.7" in observation.key_finding
+
+
+def test_sqlmap_injection_points_are_reported():
+    observation = SqlmapTool().parse_output(SQLMAP_OUTPUT)
+
+    assert len(observation.findings) == 2
+    assert observation.findings[0].location == "cat (GET)"
+    assert "MySQL" in observation.key_finding
+
+
+def test_prompt_text_is_much_smaller_than_raw_output():
+    raw = GOBUSTER_OUTPUT + "\n" + "\n".join(f"Progress: {i} / 4615" for i in range(2000))
+    observation = GobusterTool().parse_output(raw)
+    observation.raw_output_ref = "gobuster_dir_abc123.txt"
+
+    assert len(observation.to_prompt_text()) * 10 < len(raw)
+    assert "gobuster_dir_abc123.txt" in observation.to_prompt_text()
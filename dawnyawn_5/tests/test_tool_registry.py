@@ -0,0 +1,75 @@
+# dawnyawn/tests/test_tool_registry.py
+import json
+from unittest import mock
+
+from tools import registry
+from tools.tool_manager import ToolManager
+
+
+def test_tools_are_instantiated_on_first_use_only(tmp_path):
+    manager = ToolManager(manifest_cache=str(tmp_path / "manifest.json"))
+
+    manifest = manager.get_tool_manifest()
+
+    assert "- `nmap_scan`: Performs a comprehensive Nmap scan" in manifest
+    assert manifest.endswith("summary of all findings.")
+    assert manager._instances == {}
+    nmap = manager.get_tool("nmap_scan")
+    assert manager.get_tool("nmap_scan") is nmap
+    assert list(manager._instances) == ["nmap_scan"]
+    assert nmap._mcp_client is None  # The execution-server client is created when a command runs.
+    assert manager.get_tool("no_such_tool") is None
+
+
+def test_a_tool_that_fails_to_load_is_dropped(tmp_path):
+    manager = ToolManager(manifest_cache=str(tmp_path / "manifest.json"))
+    manager._specs["broken_tool"] = "no_such_module:BrokenTool"
+    manager._specs["misnamed_tool"] = registry.BUILTIN_TOOLS["ping_check"]
+
+    assert manager.get_tool("broken_tool") is None
+    assert manager.get_tool("misnamed_tool") is None
+    assert "broken_tool" not in manager.tool_names
+    assert "misnamed_tool" not in manager.tool_names
+    assert manager.get_tool("ping_check") is not None
+
+
+def test_every_registered_tool_loads_under_its_name():
+    manager = ToolManager(manifest_cache=None)
+    assert sorted(manager.tools) == sorted(registry.BUILTIN_TOOLS)
+
+
+def test_manifest_cache_is_reused_until_a_tool_module_changes(tmp_path):
+    cache = tmp_path / "manifest.json"
+    specs = registry.discover_tools()
+    with mock.patch.dict(registry._manifests, clear=True):
+        built = registry.load_manifest(specs, str(cache))
+    assert json.loads(cache.read_text(encoding="utf-8"))["tools"] == built
+
+    with mock.patch.dict(registry._manifests, clear=True), \
+            mock.patch.object(registry, "_build_manifest", side_effect=AssertionError("rebuilt")):
+        assert registry.load_manifest(specs, str(cache)) == built  # Served from the file.
+
+    with mock.patch.dict(registry._manifests, clear=True), \
+            mock.patch.object(registry, "_fingerprint", return_value="edited"), \
+            mock.patch.object(registry, "_build_manifest", return_value={"nmap_scan": "new"}):
+        assert registry.load_manifest(specs, str(cache)) == {"nmap_scan": "new"}
+
+
+def test_time_budget_overrides_apply_to_loaded_tools():
+    manager = ToolManager(manifest_cache=None, time_budgets={"nikto_web_vuln_scan": 300})
+
+    assert manager.get_tool("nikto_web_vuln_scan").time_budget_seconds == 300
+    assert manager.get_tool("ping_check").time_budget_seconds == 60  # The tool's own default.
+
+
+def test_tools_send_their_time_budget_with_the_command():
+    class RecordingClient:
+        def execute_command(self, command, timeout=None):
+            self.timeout = timeout
+            return "out.txt", "ok"
+
+    tool = ToolManager(manifest_cache=None, time_budgets={"whois_lookup": 15}).get_tool("whois_lookup")
+    tool.mcp_client = RecordingClient()
+    tool.execute("example.com")
+
+    assert tool.mcp_client.timeout == 15
@@ -0,0 +1,100 @@
+# dawnyawn/tests/test_transport.py
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from services.transport import EndpointMetrics, InstrumentedLLMClient, Transport
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    """Answers 503 to the first request of each method, then 200."""
+    protocol_version = "HTTP/1.1"  # Keep-alive.
+    failed = set()
+    seen = []
+
+    def _respond(self):
+        self.seen.append((self.command, self.client_address[1]))
+        status = 200 if self.command in self.failed else 503
+        self.failed.add(self.command)
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    do_GET = do_POST = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _FlakyHandler.failed, _FlakyHandler.seen = set(), []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _FlakyHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def _transport(metrics):
+    return Transport(max_retries=2, backoff_base=0.001, backoff_max=0.001, metrics=metrics)
+
+
+def test_idempotent_requests_retry_transient_statuses_on_one_connection(server):
+    metrics = EndpointMetrics()
+    transport = _transport(metrics)
+
+    response = transport.get(f"{server}/jobs/1", endpoint="GET /jobs/{id}", timeout=5)
+
+    assert response.status_code == 200
+    assert len({port for _, port in _FlakyHandler.seen}) == 1  # Keep-alive reused the connection.
+    stats = metrics.snapshot()["GET /jobs/{id}"]
+    assert stats["requests"] == 1 and stats["retries"] == 1 and stats["errors"] == 0
+
+
+def test_non_idempotent_requests_are_not_retried_after_reaching_the_server(server):
+    metrics = EndpointMetrics()
+
+    response = _transport(metrics).post(f"{server}/execute", json={"command": "id"}, timeout=5)
+
+    assert response.status_code == 503
+    assert len(_FlakyHandler.seen) == 1
+    assert metrics.snapshot()["POST /execute"]["errors"] == 1
+
+
+def test_failed_connections_are_retried_even_for_non_idempotent_requests():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]  # Closed again before the request, so nothing listens here.
+    metrics = EndpointMetrics()
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        _transport(metrics).post(f"http://127.0.0.1:{port}/execute", timeout=5)
+
+    stats = metrics.snapshot()["POST /execute"]
+    assert stats["retries"] == 2 and stats["errors"] == 1
+
+
+def test_instrumented_llm_client_records_calls_and_errors():
+    class Inner:
+        def __init__(self):
+            self.chat = type("Chat", (), {"completions": self})()
+            self.calls = 0
+
+        def create(self, **params):
+            self.calls += 1
+            if self.calls > 1:
+                raise RuntimeError("boom")
+            return "completion"
+
+    metrics = EndpointMetrics()
+    client = InstrumentedLLMClient(Inner(), metrics=metrics)
+
+    assert client.chat.completions.create(model="m") == "completion"
+    with pytest.raises(RuntimeError):
+        client.chat.completions.create(model="m")
+    stats = metrics.snapshot()["LLM chat.completions"]
+    assert stats["requests"] == 2 and stats["errors"] == 1
@@ -1,12 +1,41 @@
 # dawnyawn/tools/base_tool.py
 from abc import ABC, abstractmethod
+from urllib.parse import urlsplit, urlunsplit
 from services.mcp_client import McpClient
-from typing import Tuple
+from models.observation import Observation
+from typing import Optional, Tuple
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_host(value: str) -> str:
+    """Canonical form of a hostname or IP input: trimmed, lower-cased, no trailing dot."""
+    return value.strip().strip("'\"").lower().rstrip(".")
+
+
+def normalize_url(value: str) -> str:
+    """Canonical form of a URL input: lower-cased scheme and host, no default port or fragment."""
+    value = value.strip().strip("'\"")
+    parts = urlsplit(value if "://" in value else f"http://{value}")
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    netloc = host if parts.port in (None, _DEFAULT_PORTS.get(scheme)) else f"{host}:{parts.port}"
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
 
 
 class BaseTool(ABC):
     """Abstract base class for all agent tools."""
 
+    # How long a result may be reused within a mission, in seconds. 0 disables caching,
+    # which is the right choice for tools with side effects (exploits, brute force).
+    cache_ttl_seconds: int = 600
+    # How long one run may take on the execution server, in seconds. When the budget
+    # expires the command is stopped and its output so far is returned, marked partial.
+    # ToolManager applies per-mission overrides to the instance.
+    time_budget_seconds: float = 1800
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -23,7 +52,18 @@ class BaseTool(ABC):
         pass
 
     def __init__(self):
-        self.mcp_client = McpClient()
+        self._mcp_client = None
+
+    @property
+    def mcp_client(self) -> McpClient:
+        """The execution-server client, created when the tool first runs a command."""
+        if self._mcp_client is None:
+            self._mcp_client = McpClient()
+        return self._mcp_client
+
+    @mcp_client.setter
+    def mcp_client(self, client):
+        self._mcp_client = client
 
     @abstractmethod
     def _construct_command(self, tool_input: str) -> str:
@@ -40,4 +80,18 @@ class BaseTool(ABC):
         """
         full_command = self._construct_command(tool_input)
         print(f"  > Executing constructed command: `{full_command}`")
-        return self.mcp_client.execute_command(full_command)
\ No newline at end of file
+        return self.mcp_client.execute_command(full_command, timeout=self.time_budget_seconds)
+
+    def parse_output(self, raw_output: str) -> Optional[Observation]:
+        """
+        Turns the tool's raw output into a compact, typed Observation. Tools with a
+        known output format override this; returning None means the raw text is used.
+        """
+        return None
+
+    def normalize_input(self, tool_input: str) -> str:
+        """
+        Canonical form of the input, used to recognise repeated requests. Tools that
+        take hosts or URLs override this with normalize_host / normalize_url.
+        """
+        return " ".join(tool_input.split())
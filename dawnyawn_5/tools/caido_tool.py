@@ -1,7 +1,9 @@
 # dawnyawn/tools/caido_tool.py
-from tools.base_tool import BaseTool
+from tools.base_tool import BaseTool, normalize_url
 
 class CaidoTool(BaseTool):
+    cache_ttl_seconds = 1800
+
     @property
     def name(self) -> str:
         return "caido_passive_scan"
@@ -17,4 +19,7 @@ class CaidoTool(BaseTool):
     def _construct_command(self, tool_input: str) -> str:
         # Runs a headless, non-interactive scan. The exact flags might vary,
         # but this represents a common pattern for CLI tools.
-        return f"caido-cli scan start --headless --no-interaction '{tool_input}'"
\ No newline at end of file
+        return f"caido-cli scan start --headless --no-interaction '{tool_input}'"
+
+    def normalize_input(self, tool_input: str) -> str:
+        return normalize_url(tool_input)
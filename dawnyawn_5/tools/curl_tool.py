@@ -1,7 +1,10 @@
 # dawnyawn/tools/curl_tool.py
-from tools.base_tool import BaseTool
+from tools.base_tool import BaseTool, normalize_url
 
 class CurlTool(BaseTool):
+    cache_ttl_seconds = 120
+    time_budget_seconds = 120
+
     @property
     def name(self) -> str:
         return "fetch_web_content"
@@ -16,4 +19,7 @@ class CurlTool(BaseTool):
 
     def _construct_command(self, tool_input: str) -> str:
         # -sSL: Silent mode, show errors, and follow redirects. A robust combination for scripting.
-        return f"curl -sSL '{tool_input}'"
\ No newline at end of file
+        return f"curl -sSL '{tool_input}'"
+
+    def normalize_input(self, tool_input: str) -> str:
+        return normalize_url(tool_input)
@@ -1,7 +1,10 @@
 # dawnyawn/tools/dns_tool.py
-from tools.base_tool import BaseTool
+from tools.base_tool import BaseTool, normalize_host
 
 class DnsTool(BaseTool):
+    cache_ttl_seconds = 300
+    time_budget_seconds = 60
+
     @property
     def name(self) -> str:
         return "dns_lookup"
@@ -16,4 +19,7 @@ class DnsTool(BaseTool):
 
     def _construct_command(self, tool_input: str) -> str:
         # 'dig +short' provides a clean, IP-only output that is easy for the agent to parse.
-        return f"dig +short {tool_input}"
\ No newline at end of file
+        return f"dig +short {tool_input}"
+
+    def normalize_input(self, tool_input: str) -> str:
+        return normalize_host(tool_input)
@@ -1,7 +1,22 @@
 # dawnyawn/tools/gobuster_tool.py
-from tools.base_tool import BaseTool
+import re
+from typing import Optional
+from tools.base_tool import normalize_url
+from tools.sharding import WordlistShardedTool
+from models.observation import Observation, PathFinding
+
+# e.g. "/admin                (Status: 301) [Size: 0] [--> http://example.com/admin/]"
+_RESULT_LINE = re.compile(
+    r"^(?P<path>/\S*)\s+\(Status:\s*(?P<status>\d+)\)(?:\s*\[Size:\s*(?P<size>\d+)\])?(?:\s*\[-->\s*(?P<redirect>[^\]]+)\])?"
+)
+
+class GobusterTool(WordlistShardedTool):
+    cache_ttl_seconds = 1800
+    time_budget_seconds = 900
+    # --- THE FIX: Reference the wordlist copied into our app directory ---
+    # This path is now reliable and controlled by our project.
+    wordlist = "/app/wordlists/common.txt"
 
-class GobusterTool(BaseTool):
     @property
     def name(self) -> str:
         return "gobuster_web_scan"
@@ -14,8 +29,29 @@ class GobusterTool(BaseTool):
             "Example: 'http://www.pentest-ground.com'"
         )
 
-    def _construct_command(self, tool_input: str) -> str:
-        # --- THE FIX: Reference the wordlist copied into our app directory ---
-        # This path is now reliable and controlled by our project.
-        wordlist = "/app/wordlists/common.txt"
-        return f"gobuster dir -u {tool_input} -w {wordlist} -t 50 --no-error"
\ No newline at end of file
+    def _construct_shard_command(self, tool_input: str, wordlist: str) -> str:
+        return f"gobuster dir -u {tool_input} -w {wordlist} -t 50 --no-error"
+
+    def result_key(self, line: str) -> Optional[str]:
+        match = _RESULT_LINE.match(line)
+        return match.group("path") if match else None
+
+    def parse_output(self, raw_output: str) -> Optional[Observation]:
+        findings = []
+        for line in raw_output.splitlines():
+            # Progress updates are carriage-return separated; the result is the last segment.
+            match = _RESULT_LINE.match(line.split("\r")[-1].strip())
+            if match:
+                findings.append(PathFinding(
+                    path=match.group("path"),
+                    status=int(match.group("status")),
+                    size=int(match.group("size")) if match.group("size") else None,
+                    redirect=match.group("redirect").strip() if match.group("redirect") else None,
+                ))
+        if not findings and "Error" in raw_output:
+            return None  # Let the model see gobuster's own error message.
+        key_finding = f"{len(findings)} path(s) discovered." if findings else "No paths were discovered."
+        return Observation(status="SUCCESS", key_finding=key_finding, findings=findings)
+
+    def normalize_input(self, tool_input: str) -> str:
+        return normalize_url(tool_input)
@@ -2,6 +2,9 @@
 from tools.base_tool import BaseTool
 
 class JohnTheRipperTool(BaseTool):
+    cache_ttl_seconds = 0
+    time_budget_seconds = 900
+
     @property
     def name(self) -> str:
         return "john_crack_hash"
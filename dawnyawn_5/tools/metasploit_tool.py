@@ -3,6 +3,9 @@ from tools.base_tool import BaseTool
 
 
 class MetasploitTool(BaseTool):
+    cache_ttl_seconds = 0
+    time_budget_seconds = 1200
+
     @property
     def name(self) -> str:
         return "metasploit_exploit"
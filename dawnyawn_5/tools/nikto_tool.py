@@ -1,7 +1,19 @@
 # dawnyawn/tools/nikto_tool.py
-from tools.base_tool import BaseTool
+import re
+from typing import Optional
+from tools.base_tool import BaseTool, normalize_url
+from models.observation import Observation, VulnerabilityFinding
+
+# Nikto prints run metadata with the same '+ ' prefix as its findings.
+_METADATA_PREFIXES = ("Target ", "Start Time", "End Time", "Server:", "SSL Info", "Platform:",
+                      "Message:", "Root page")
+_REFERENCE = re.compile(r"\b(OSVDB-\d+|CVE-\d{4}-\d+)\b")
+_LOCATION = re.compile(r"^(/\S*?):\s+(.*)$")
 
 class NiktoTool(BaseTool):
+    cache_ttl_seconds = 1800
+    time_budget_seconds = 900
+
     @property
     def name(self) -> str:
         return "nikto_web_vuln_scan"
@@ -17,3 +29,31 @@ class NiktoTool(BaseTool):
     def _construct_command(self, tool_input: str) -> str:
         # return f"nikto -host '{tool_input}' -maxtime 60"
         return f"nikto -Display 1234EP -o report.html -Format htm -Tuning 123bde -host '{tool_input}'"
+
+    def parse_output(self, raw_output: str) -> Optional[Observation]:
+        findings, server = [], None
+        for line in raw_output.splitlines():
+            line = line.strip()
+            if not line.startswith("+ "):
+                continue
+            text = line[2:].strip()
+            if text.startswith("Server:"):
+                server = text.split(":", 1)[1].strip()
+                continue
+            if text.startswith(_METADATA_PREFIXES) or re.match(r"^\d+ (host|requests?)", text):
+                continue
+            reference = _REFERENCE.search(text)
+            location = _LOCATION.match(text)
+            findings.append(VulnerabilityFinding(
+                description=location.group(2) if location else text,
+                location=location.group(1) if location else None,
+                reference=reference.group(1) if reference else None,
+            ))
+        if not findings and server is None:
+            return None
+        key_finding = f"{len(findings)} potential issue(s) reported"
+        key_finding += f" on server '{server}'." if server else "."
+        return Observation(status="SUCCESS", key_finding=key_finding, findings=findings)
+
+    def normalize_input(self, tool_input: str) -> str:
+        return normalize_url(tool_input)
@@ -1,7 +1,66 @@
 # dawnyawn/tools/nmap_tool.py
-from tools.base_tool import BaseTool
+import re
+import math
+import ipaddress
+import xml.etree.ElementTree as ET
+from typing import List, Optional, Tuple
+from config import NMAP_SHARDS
+from tools.base_tool import BaseTool, normalize_host
+from services.mcp_client import is_partial, mark_partial
+from tools.sharding import ShardResult, run_shards, split_evenly, split_range
+from models.observation import Observation, PortFinding
+
+# "-p 1-1024" / "-p80,443" at the end of the input selects the ports to scan.
+_PORT_OPTION = re.compile(r"\s-p\s*(?P<ports>\S+)\s*$")
+# nmap's last-octet range syntax, e.g. "10.0.0.1-50".
+_OCTET_RANGE = re.compile(r"^(?P<prefix>\d{1,3}\.\d{1,3}\.\d{1,3}\.)(?P<start>\d{1,3})-(?P<end>\d{1,3})$")
+
+
+def _parse_xml(raw_output: str) -> Optional[ET.Element]:
+    try:
+        root = ET.fromstring(raw_output[raw_output.find("<?xml"):] if "<?xml" in raw_output else raw_output)
+    except ET.ParseError:
+        return None
+    return root if root.tag == "nmaprun" else None
+
+
+def _split_targets(targets: List[str], shards: int) -> List[str]:
+    """Breaks CIDR blocks and octet ranges into pieces so the targets can be spread over shards."""
+    units = []
+    for target in targets:
+        octets = _OCTET_RANGE.match(target)
+        if octets:
+            prefix = octets.group("prefix")
+            units.extend(f"{prefix}{r.start}-{r.stop - 1}" if len(r) > 1 else f"{prefix}{r.start}"
+                         for r in split_range(int(octets.group("start")), int(octets.group("end")), shards))
+            continue
+        try:
+            network = ipaddress.ip_network(target, strict=False)
+        except ValueError:
+            units.append(target)  # A hostname.
+            continue
+        extra_bits = min(math.ceil(math.log2(shards)), network.max_prefixlen - network.prefixlen)
+        if extra_bits:
+            units.extend(str(subnet) for subnet in network.subnets(prefixlen_diff=extra_bits))
+        else:
+            units.append(target)
+    return units
+
+
+def _split_ports(ports: str, shards: int) -> List[str]:
+    """Splits a port list ("22,80,443") or range ("1-65535") over shards; other specs stay whole."""
+    if re.fullmatch(r"\d+-\d+", ports):
+        start, end = (int(p) for p in ports.split("-"))
+        return [f"{r.start}-{r.stop - 1}" for r in split_range(start, end, shards)]
+    if re.fullmatch(r"[\d,-]+", ports):
+        return [",".join(group) for group in split_evenly([p for p in ports.split(",") if p], shards)]
+    return [ports]
+
 
 class NmapTool(BaseTool):
+    cache_ttl_seconds = 1800
+    time_budget_seconds = 1200
+
     @property
     def name(self) -> str:
         return "nmap_scan"
@@ -10,11 +69,148 @@ class NmapTool(BaseTool):
     def description(self) -> str:
         return (
             "Performs a comprehensive Nmap scan on a target to discover open ports, "
-            "running services, and their versions. The input must be a single IP "
-            "address or a hostname."
+            "running services, and their versions. The input is an IP address or hostname, "
+            "or several of them and CIDR ranges separated by spaces (e.g. '10.0.0.0/24 10.0.1.5'), "
+            "optionally followed by a port selection such as '-p 1-65535'. Large inputs are "
+            "scanned in parallel shards and merged into one result."
         )
 
+    def __init__(self, shards: int = NMAP_SHARDS):
+        super().__init__()
+        self.shards = shards
+
+    def plan_shards(self, tool_input: str) -> List[str]:
+        """
+        Returns the inputs of the parallel shards for a scan: the targets split by host
+        (CIDR blocks are cut into subnets) or, for a single target, the ports split into
+        ranges. A single input means the scan is not worth sharding.
+        """
+        ports_match = _PORT_OPTION.search(" " + tool_input)
+        ports = ports_match.group("ports") if ports_match else None
+        targets_text = (" " + tool_input)[:ports_match.start()] if ports_match else tool_input
+        targets = [t for t in re.split(r"[\s,]+", targets_text.strip()) if t]
+        if self.shards <= 1 or not targets or any(t.startswith("-") for t in targets):
+            return [tool_input]  # Unsharded, or nmap options we don't interpret.
+
+        port_option = f" -p {ports}" if ports else ""
+        units = _split_targets(targets, self.shards)
+        if len(units) > 1:
+            return [" ".join(group) + port_option for group in split_evenly(units, self.shards)]
+        if ports:
+            return [f"{units[0]} -p {shard_ports}" for shard_ports in _split_ports(ports, self.shards)]
+        return [tool_input]
+
+    def execute(self, tool_input: str) -> Tuple[str, str]:
+        shard_inputs = self.plan_shards(tool_input)
+        if len(shard_inputs) == 1:
+            return super().execute(tool_input)
+        commands = [self._construct_command(shard_input) for shard_input in shard_inputs]
+        print(f"  > Executing Nmap in {len(commands)} parallel shards: " + "; ".join(f"`{c}`" for c in commands))
+        results = run_shards(self.mcp_client, commands, label="nmap shard", timeout=self.time_budget_seconds)
+        filename, merged = self.merge_shards(self._construct_command(tool_input), results)
+        if filename and any(is_partial(result.output) for result in results):
+            merged = mark_partial(merged, self.time_budget_seconds)
+        return filename, merged
+
+    @staticmethod
+    def merge_shards(command: str, results: List[ShardResult]) -> Tuple[Optional[str], str]:
+        """
+        Merges the -oX outputs of all shards into one nmaprun document: one <host> per
+        address with de-duplicated ports, plus a <shards> element with per-shard timing.
+        Returns (None, errors) only if no shard produced XML.
+        """
+        merged = ET.Element("nmaprun", {"scanner": "nmap", "args": command, "sharded": str(len(results))})
+        hosts, ports_seen = {}, {}
+        shards_element = ET.Element("shards")
+        errors = []
+        for result in results:
+            root = _parse_xml(result.output) if result.ok else None
+            shard = ET.SubElement(shards_element, "shard", {
+                "index": str(result.index), "command": result.command, "seconds": f"{result.seconds:.2f}",
+                "status": "ok" if root is not None else "error"})
+            if is_partial(result.output):
+                shard.set("partial", "true")
+            if root is None:
+                shard.set("detail", result.output.strip()[:200])
+                errors.append(f"shard {result.index + 1}: {result.output.strip()[:200]}")
+                continue
+            shard.set("hosts", str(len(root.findall("host"))))
+            for host in root.iter("host"):
+                address = host.find("address")
+                key = address.get("addr") if address is not None else ET.tostring(host)
+                if key not in hosts:
+                    hosts[key] = host
+                    ports_seen[key] = {(p.get("protocol"), p.get("portid")) for p in host.iter("port")}
+                    merged.append(host)
+                    continue
+                existing = hosts[key]
+                status = existing.find("status")
+                if status is not None and status.get("state") != "up" and host.find("status") is not None:
+                    existing.remove(status)
+                    existing.insert(0, host.find("status"))
+                ports = existing.find("ports")
+                if ports is None:
+                    ports = ET.SubElement(existing, "ports")
+                for port in host.iter("port"):
+                    port_key = (port.get("protocol"), port.get("portid"))
+                    if port_key not in ports_seen[key]:
+                        ports_seen[key].add(port_key)
+                        ports.append(port)
+
+        if len(errors) == len(results):
+            return None, f"All {len(results)} Nmap shards failed:\n" + "\n".join(errors)
+        merged.append(shards_element)
+        filename = next(result.filename for result in results if result.ok)
+        return filename, '<?xml version="1.0"?>\n' + ET.tostring(merged, encoding="unicode")
+
     def _construct_command(self, tool_input: str) -> str:
         # Here we define the best-practice flags for a version scan.
         # The AI doesn't need to know this, only that it wants to find services.
-        return f"nmap -sV -T4 --open {tool_input}"
\ No newline at end of file
+        # '-oX -' writes machine-readable XML to stdout, which parse_output turns into findings.
+        return f"nmap -sV -T4 --open -oX - {tool_input}"
+
+    def parse_output(self, raw_output: str) -> Optional[Observation]:
+        root = _parse_xml(raw_output)
+        if root is None:
+            return None  # Not XML (e.g. an nmap usage error); fall back to the raw text.
+
+        findings = []
+        hosts_up = 0
+        for host in root.iter("host"):
+            status = host.find("status")
+            if status is not None and status.get("state") != "up":
+                continue
+            hosts_up += 1
+            address = host.find("address")
+            hostname = host.find("hostnames/hostname")
+            host_label = hostname.get("name") if hostname is not None else (address.get("addr") if address is not None else "unknown")
+            for port in host.iter("port"):
+                state = port.find("state")
+                if state is None or state.get("state") != "open":
+                    continue
+                service = port.find("service")
+                findings.append(PortFinding(
+                    host=host_label,
+                    port=int(port.get("portid")),
+                    protocol=port.get("protocol", "tcp"),
+                    service=service.get("name") if service is not None else None,
+                    product=service.get("product") if service is not None else None,
+                    version=service.get("version") if service is not None else None,
+                ))
+
+        if findings:
+            key_finding = f"{len(findings)} open port(s) found on {hosts_up} host(s)."
+        elif hosts_up:
+            key_finding = f"{hosts_up} host(s) up, but no open ports were found."
+        else:
+            key_finding = "No hosts were up or reachable."
+        shards = root.findall("shards/shard")
+        if shards:
+            slowest = max(shards, key=lambda shard: float(shard.get("seconds")))
+            failed = sum(1 for shard in shards if shard.get("status") != "ok")
+            key_finding += (f" Scanned in {len(shards)} parallel shards"
+                            f"{f' ({failed} failed)' if failed else ''}; slowest took {slowest.get('seconds')}s.")
+        return Observation(status="SUCCESS", key_finding=key_finding, findings=findings)
+
+    def normalize_input(self, tool_input: str) -> str:
+        return normalize_host(tool_input)
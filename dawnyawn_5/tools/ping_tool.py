@@ -1,7 +1,10 @@
 # dawnyawn/tools/ping_tool.py
-from tools.base_tool import BaseTool
+from tools.base_tool import BaseTool, normalize_host
 
 class PingTool(BaseTool):
+    cache_ttl_seconds = 60
+    time_budget_seconds = 60
+
     @property
     def name(self) -> str:
         return "ping_check"
@@ -15,4 +18,7 @@ class PingTool(BaseTool):
 
     def _construct_command(self, tool_input: str) -> str:
         # '-c 4' is critical to ensure the command is self-terminating and doesn't run forever.
-        return f"ping -c 4 {tool_input}"
\ No newline at end of file
+        return f"ping -c 4 {tool_input}"
+
+    def normalize_input(self, tool_input: str) -> str:
+        return normalize_host(tool_input)
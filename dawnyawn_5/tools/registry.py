@@ -0,0 +1,118 @@
+# dawnyawn/tools/registry.py
+import os
+import json
+import hashlib
+import logging
+import threading
+import importlib
+import importlib.util
+from importlib.metadata import entry_points
+from typing import Dict, Optional, Type
+
+# Built-in tools: tool name -> "module:ClassName". Tool modules are imported only when
+# a tool is first used, or when the manifest cache below has to be rebuilt.
+BUILTIN_TOOLS: Dict[str, str] = {
+    "nmap_scan": "tools.nmap_tool:NmapTool",
+    "gobuster_web_scan": "tools.gobuster_tool:GobusterTool",
+    "dns_lookup": "tools.dns_tool:DnsTool",
+    "ping_check": "tools.ping_tool:PingTool",
+    "fetch_web_content": "tools.curl_tool:CurlTool",
+    "whois_lookup": "tools.whois_tool:WhoisTool",
+    "whatweb_scan": "tools.whatweb_tool:WhatWebTool",
+    "nikto_web_vuln_scan": "tools.nikto_tool:NiktoTool",
+    "sqlmap_scan": "tools.sqlmap_tool:SqlmapTool",
+    "hydra_bruteforce": "tools.hydra_tool:HydraTool",
+    "subdomain_scan": "tools.subdomain_tool:SubdomainTool",
+    "john_crack_hash": "tools.john_tool:JohnTheRipperTool",
+    "metasploit_exploit": "tools.metasploit_tool:MetasploitTool",
+}
+
+# Installed packages can add tools by declaring entry points in this group, e.g.
+#   [project.entry-points."dawnyawn.tools"]
+#   my_scan = "my_package.tools:MyScanTool"
+ENTRY_POINT_GROUP = "dawnyawn.tools"
+
+_manifest_lock = threading.Lock()
+# Process-wide memo of loaded manifests, keyed by fingerprint.
+_manifests: Dict[str, Dict[str, str]] = {}
+
+
+def discover_tools() -> Dict[str, str]:
+    """Returns every available tool's name and "module:ClassName" spec, without importing any of them."""
+    specs = dict(BUILTIN_TOOLS)
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        if entry_point.name in specs:
+            logging.warning("Ignoring tool entry point '%s': the name is already registered.", entry_point.name)
+            continue
+        specs[entry_point.name] = entry_point.value
+    return specs
+
+
+def load_tool_class(spec: str) -> Type:
+    """Imports the tool class named by a "module:ClassName" spec."""
+    module_name, _, class_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def instantiate_tool(name: str, spec: str):
+    """Imports and instantiates a tool, checking it is registered under its own name."""
+    tool = load_tool_class(spec)()
+    if tool.name != name:
+        raise ValueError(f"Tool '{spec}' is registered as '{name}' but is named '{tool.name}'.")
+    return tool
+
+
+def _fingerprint(specs: Dict[str, str]) -> str:
+    """Changes whenever a tool is added or removed, or one of the tool modules is edited."""
+    digest = hashlib.sha256()
+    for name, spec in sorted(specs.items()):
+        digest.update(f"{name}={spec}".encode("utf-8"))
+        module_spec = importlib.util.find_spec(spec.partition(":")[0])
+        if module_spec and module_spec.origin and os.path.exists(module_spec.origin):
+            stat = os.stat(module_spec.origin)
+            digest.update(f":{stat.st_mtime_ns}:{stat.st_size}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _build_manifest(specs: Dict[str, str]) -> Dict[str, str]:
+    manifest = {}
+    for name, spec in specs.items():
+        try:
+            manifest[name] = instantiate_tool(name, spec).description
+        except Exception as e:
+            logging.error("Could not load tool '%s' (%s): %s", name, spec, e)
+    return manifest
+
+
+def load_manifest(specs: Dict[str, str], cache_path: Optional[str]) -> Dict[str, str]:
+    """
+    Returns {tool name: description} for the given tools. The result is read from
+    cache_path when its fingerprint still matches; otherwise every tool is imported
+    once to rebuild it, and the cache file is rewritten.
+    """
+    fingerprint = _fingerprint(specs)
+    with _manifest_lock:
+        if fingerprint in _manifests:
+            return _manifests[fingerprint]
+        manifest = None
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    cached = json.load(f)
+                if cached.get("fingerprint") == fingerprint:
+                    manifest = cached["tools"]
+            except (OSError, ValueError, KeyError) as e:
+                logging.warning("Ignoring unreadable tool manifest cache '%s': %s", cache_path, e)
+        if manifest is None:
+            manifest = _build_manifest(specs)
+            if cache_path:
+                try:
+                    os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+                    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        json.dump({"fingerprint": fingerprint, "tools": manifest}, f, indent=2)
+                    os.replace(tmp_path, cache_path)
+                except OSError as e:
+                    logging.warning("Could not write the tool manifest cache '%s': %s", cache_path, e)
+        _manifests[fingerprint] = manifest
+        return manifest
@@ -0,0 +1,86 @@
+# dawnyawn/tools/result_cache.py
+import time
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from services.mcp_client import is_partial
+from tools.base_tool import BaseTool
+
+
+class ToolResult(NamedTuple):
+    filename: Optional[str]
+    output: str
+    cache_hit: bool = False
+    cache_age_seconds: float = 0.0
+
+
+class _CacheEntry(NamedTuple):
+    filename: str
+    output: str
+    stored_at: float
+
+
+class ToolResultCache:
+    """
+    Mission-scoped cache of tool results keyed by tool name and normalized input.
+    Entries expire after the tool's TTL. Concurrent identical requests are coalesced
+    into a single execution (single-flight). Failed executions, and partial ones stopped
+    by their time budget, are never cached.
+    """
+
+    def __init__(self, ttl_overrides: Optional[Dict[str, int]] = None):
+        self.ttl_overrides = ttl_overrides or {}
+        self._entries: Dict[Tuple[str, str], _CacheEntry] = {}
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def ttl_for(self, tool: BaseTool) -> int:
+        return self.ttl_overrides.get(tool.name, tool.cache_ttl_seconds)
+
+    def get_or_execute(self, tool: BaseTool, tool_input: str,
+                       execute: Callable[[], Tuple[Optional[str], str]]) -> ToolResult:
+        ttl = self.ttl_for(tool)
+        if ttl <= 0:
+            return ToolResult(*execute())
+
+        key = (tool.name, tool.normalize_input(tool_input))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.time() - entry.stored_at <= ttl:
+                self.hits += 1
+                age = time.time() - entry.stored_at
+                logging.info("Tool cache hit for %s '%s' (%.0fs old).", key[0], key[1], age)
+                return ToolResult(entry.filename, entry.output, cache_hit=True, cache_age_seconds=age)
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                inflight = self._inflight[key] = Future()
+                owner = True
+                self.misses += 1
+            else:
+                owner = False
+                self.coalesced += 1
+
+        if not owner:
+            logging.info("Waiting for an identical in-flight %s '%s' request.", key[0], key[1])
+            filename, output = inflight.result()
+            return ToolResult(filename, output, cache_hit=True)
+
+        try:
+            filename, output = execute()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            inflight.set_exception(e)
+            raise
+        with self._lock:
+            # Failed runs and partial runs (stopped by their time budget) are not reused.
+            if filename and not is_partial(output):
+                self._entries[key] = _CacheEntry(filename, output, time.time())
+            del self._inflight[key]
+        inflight.set_result((filename, output))
+        return ToolResult(filename, output)
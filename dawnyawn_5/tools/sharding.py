@@ -0,0 +1,195 @@
+# dawnyawn/tools/sharding.py
+import re
+import math
+import time
+import shlex
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from abc import abstractmethod
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple, TypeVar
+from urllib.parse import urlsplit
+
+from config import GOBUSTER_MAX_SHARDS, GOBUSTER_TARGET_SHARD_SECONDS
+from services.mcp_client import detached_session, is_partial, mark_partial
+from tools.base_tool import BaseTool, normalize_host
+
+T = TypeVar("T")
+
+# Gobuster's progress line, e.g. "Progress: 1200 / 4614 (26.01%)".
+_PROGRESS = re.compile(r"Progress:\s*(\d+)\s*/\s*(\d+)")
+
+
+@dataclass
+class ShardResult:
+    """The outcome of one shard of a split tool run."""
+    index: int
+    command: str
+    filename: Optional[str]
+    output: str
+    seconds: float
+
+    @property
+    def ok(self) -> bool:
+        return self.filename is not None
+
+
+def split_evenly(items: Sequence[T], shards: int) -> List[List[T]]:
+    """Deals items round-robin into at most 'shards' non-empty groups."""
+    groups = [list(items[i::shards]) for i in range(max(1, min(shards, len(items))))]
+    return [group for group in groups if group]
+
+
+def split_range(start: int, end: int, shards: int) -> List[range]:
+    """Splits the inclusive range start..end into at most 'shards' contiguous ranges."""
+    total = end - start + 1
+    shards = max(1, min(shards, total))
+    bounds = [start + total * i // shards for i in range(shards + 1)]
+    return [range(bounds[i], bounds[i + 1]) for i in range(shards)]
+
+
+def run_shards(mcp_client, commands: List[str], label: str = "shard",
+               timeout: Optional[float] = None) -> List[ShardResult]:
+    """
+    Runs each command in its own container on the execution server, all at once, each
+    with the given time budget. Shards run outside the mission's persistent session,
+    which would otherwise serialize them in one container. Results are returned in
+    command order.
+    """
+    def run(index: int, command: str) -> ShardResult:
+        started = time.monotonic()
+        with detached_session():
+            filename, output = mcp_client.execute_command(command, timeout=timeout)
+        result = ShardResult(index, command, filename, output, time.monotonic() - started)
+        logging.info("%s %d/%d finished in %.1fs%s.", label, index + 1, len(commands), result.seconds,
+                     "" if result.ok else " with an error")
+        return result
+
+    with ThreadPoolExecutor(max_workers=len(commands), thread_name_prefix=label) as executor:
+        return list(executor.map(run, range(len(commands)), commands))
+
+
+class ThroughputTracker:
+    """
+    Remembers how fast one process works through a wordlist against one target (words
+    per second, smoothed over runs) and how long the wordlist is, and picks the shard
+    count that makes each shard take about target_seconds.
+    """
+
+    def __init__(self, max_shards: int, target_seconds: float, smoothing: float = 0.5):
+        self.max_shards = max_shards
+        self.target_seconds = target_seconds
+        self.smoothing = smoothing
+        self._rates: Dict[Hashable, float] = {}
+        self._sizes: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: Hashable, words: int, total_words: int, seconds: float):
+        if words <= 0 or seconds <= 0:
+            return
+        with self._lock:
+            rate = words / seconds
+            previous = self._rates.get(key)
+            self._rates[key] = rate if previous is None else self.smoothing * rate + (1 - self.smoothing) * previous
+            if total_words:
+                self._sizes[key] = total_words
+
+    def shards_for(self, key: Hashable) -> int:
+        """Shard count for the next run; the maximum until a run has been measured."""
+        with self._lock:
+            rate, size = self._rates.get(key), self._sizes.get(key)
+        if not rate or not size:
+            return self.max_shards
+        return max(1, min(self.max_shards, math.ceil(size / (rate * self.target_seconds))))
+
+
+# Throughput depends on the wordlist and the target (mostly how fast it answers), not on
+# the mission, so every tool instance (one per mission) shares the same measurements.
+wordlist_throughput = ThroughputTracker(GOBUSTER_MAX_SHARDS, GOBUSTER_TARGET_SHARD_SECONDS)
+
+
+class WordlistShardedTool(BaseTool):
+    """
+    A wordlist-driven tool (Gobuster) whose wordlist is split into K interleaved shards
+    with awk ('NR % K == i'), each run by its own process in its own container.
+    Result lines are merged and de-duplicated by result_key; each shard's word count,
+    duration and rate are reported at the top of the merged output. K comes from the
+    throughput measured on earlier runs against the same target, sharded or not.
+    """
+
+    wordlist: str = ""
+    throughput: ThroughputTracker = wordlist_throughput
+
+    @abstractmethod
+    def _construct_shard_command(self, tool_input: str, wordlist: str) -> str:
+        """The tool's command reading its words from 'wordlist' (a path or shell expression)."""
+        pass
+
+    def _construct_command(self, tool_input: str) -> str:
+        return self._construct_shard_command(tool_input, self.wordlist)
+
+    @abstractmethod
+    def result_key(self, line: str) -> Optional[str]:
+        """Identifies the finding on a result line, or None if the line is not a result."""
+        pass
+
+    def throughput_key(self, tool_input: str) -> Tuple[str, str]:
+        """Throughput is tracked per wordlist and target host."""
+        parts = urlsplit(tool_input if "://" in tool_input else f"//{tool_input.strip()}")
+        return self.wordlist, normalize_host(parts.hostname or tool_input)
+
+    def _record_progress(self, key: Tuple[str, str], output: str, seconds: float, shards: int) -> int:
+        """Records the rate from the last progress line of one process's output; returns its word count."""
+        progress = _PROGRESS.findall(output)
+        words, total = (int(progress[-1][0]), int(progress[-1][1])) if progress else (0, 0)
+        # Every shard reads about 1/K of the list, so K times one shard's total is the list's length.
+        self.throughput.record(key, words, total * shards, seconds)
+        return words
+
+    def execute(self, tool_input: str) -> Tuple[Optional[str], str]:
+        key = self.throughput_key(tool_input)
+        shards = self.throughput.shards_for(key)
+        if shards <= 1:
+            # Measured as well, so a target that has slowed down gets its shards back.
+            started = time.monotonic()
+            filename, output = super().execute(tool_input)
+            if filename is not None:
+                self._record_progress(key, output, time.monotonic() - started, shards=1)
+            return filename, output
+        wordlist = shlex.quote(self.wordlist)
+        # Each shard writes its slice to a temporary file rather than a pipe, so the tool
+        # knows the slice's length and its progress lines carry "done / total".
+        shard_command = self._construct_shard_command(tool_input, '"$f"')
+        commands = [f"f=$(mktemp) && trap 'rm -f \"$f\"' EXIT && "
+                    f"awk 'NR % {shards} == {i}' {wordlist} > \"$f\" && {shard_command}"
+                    for i in range(shards)]
+        print(f"  > Executing {self.name} over {shards} wordlist shards in parallel containers.")
+        results = run_shards(self.mcp_client, commands, label=f"{self.name} shard", timeout=self.time_budget_seconds)
+        return self.merge_shards(results, key)
+
+    def merge_shards(self, results: List[ShardResult], key: Tuple[str, str]) -> Tuple[Optional[str], str]:
+        """Combines the shards' result lines, dropping duplicates, under one status line per shard."""
+        header, lines, seen = [], [], set()
+        for result in results:
+            status = f"Shard {result.index + 1}/{len(results)}:"
+            if not result.ok:
+                header.append(f"{status} FAILED after {result.seconds:.1f}s: {result.output.strip()[:200]}")
+                continue
+            words = self._record_progress(key, result.output, result.seconds, len(results))
+            rate = f" ({words / result.seconds:.0f} words/s)" if words and result.seconds else ""
+            header.append(f"{status} {words or '?'} words in {result.seconds:.1f}s{rate}"
+                          f"{' (stopped by its time budget)' if is_partial(result.output) else ''}")
+            for line in result.output.splitlines():
+                line = line.split("\r")[-1].strip()
+                key = self.result_key(line)
+                if key is not None and key not in seen:
+                    seen.add(key)
+                    lines.append(line)
+        if all(not result.ok for result in results):
+            return None, f"All {len(results)} {self.name} shards failed:\n" + "\n".join(header)
+        filename = next(result.filename for result in results if result.ok)
+        merged = "\n".join(header + [f"{len(lines)} unique result(s) from {len(results)} shards:"] + lines)
+        if any(is_partial(result.output) for result in results):
+            merged = mark_partial(merged, self.time_budget_seconds)
+        return filename, merged
@@ -1,7 +1,15 @@
 # dawnyawn/tools/sqlmap_tool.py
-from tools.base_tool import BaseTool
+import re
+from typing import Optional
+from tools.base_tool import BaseTool, normalize_url
+from models.observation import Observation, VulnerabilityFinding
+
+_PARAMETER = re.compile(r"^Parameter:\s*(?P<name>\S+)\s*\((?P<place>[^)]+)\)")
 
 class SqlmapTool(BaseTool):
+    cache_ttl_seconds = 1800
+    time_budget_seconds = 1200
+
     @property
     def name(self) -> str:
         return "sqlmap_scan"
@@ -18,4 +26,27 @@ class SqlmapTool(BaseTool):
         # '--batch' is absolutely critical for an autonomous agent. It prevents sqlmap
         # from asking interactive questions and makes it run with default answers.
         # --level=1 and --risk=1 are safe defaults for initial scans.
-        return f"sqlmap -u '{tool_input}' --batch --level=1 --risk=1"
\ No newline at end of file
+        return f"sqlmap -u '{tool_input}' --batch --level=1 --risk=1"
+
+    def parse_output(self, raw_output: str) -> Optional[Observation]:
+        findings, parameter = [], None
+        for line in raw_output.splitlines():
+            line = line.strip()
+            match = _PARAMETER.match(line)
+            if match:
+                parameter = f"{match.group('name')} ({match.group('place')})"
+            elif parameter and line.startswith("Title:"):
+                findings.append(VulnerabilityFinding(description=f"SQL injection: {line[6:].strip()}",
+                                                     location=parameter))
+        dbms = re.search(r"back-end DBMS(?: is|:)\s*'?([^'\n]+)", raw_output)
+        if findings:
+            key_finding = f"{len(findings)} SQL injection technique(s) confirmed"
+            key_finding += f" against {dbms.group(1).strip()}." if dbms else "."
+        elif "do not appear to be injectable" in raw_output:
+            key_finding = "All tested parameters do not appear to be injectable."
+        else:
+            return None  # Unrecognised output (e.g. connection errors); keep the raw text.
+        return Observation(status="SUCCESS", key_finding=key_finding, findings=findings)
+
+    def normalize_input(self, tool_input: str) -> str:
+        return normalize_url(tool_input)
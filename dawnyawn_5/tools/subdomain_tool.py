@@ -1,7 +1,17 @@
 # dawnyawn/tools/subdomain_tool.py
-from tools.base_tool import BaseTool
+import re
+from typing import Optional
+from tools.base_tool import normalize_host
+from tools.sharding import WordlistShardedTool
+
+# e.g. "Found: www.example.com" (gobuster dns)
+_FOUND_LINE = re.compile(r"^Found:\s*(?P<name>\S+)")
+
+class SubdomainTool(WordlistShardedTool):
+    cache_ttl_seconds = 3600
+    time_budget_seconds = 900
+    wordlist = "/app/wordlists/bug-bounty-program-subdomains-trickest-inventory.txt"
 
-class SubdomainTool(BaseTool):
     @property
     def name(self) -> str:
         return "subdomain_scan"
@@ -14,7 +24,12 @@ class SubdomainTool(BaseTool):
             "Example: 'pentest-ground.com'"
         )
 
-    def _construct_command(self, tool_input: str) -> str:
-        # Use the same wordlist we use for directory scanning for this example.
-        wordlist = "/app/wordlists/bug-bounty-program-subdomains-trickest-inventory.txt"
-        return f"gobuster dns -d {tool_input} -w {wordlist} -t 50"
\ No newline at end of file
+    def _construct_shard_command(self, tool_input: str, wordlist: str) -> str:
+        return f"gobuster dns -d {tool_input} -w {wordlist} -t 50"
+
+    def result_key(self, line: str) -> Optional[str]:
+        match = _FOUND_LINE.match(line)
+        return match.group("name").lower().rstrip(".") if match else None
+
+    def normalize_input(self, tool_input: str) -> str:
+        return normalize_host(tool_input)
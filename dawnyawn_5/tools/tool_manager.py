@@ -2,73 +2,99 @@
 import logging
 from typing import Dict, Optional
 
-# --- Import all your tool classes ---
+from config import TOOL_CACHE_ENABLED, TOOL_CACHE_TTL_OVERRIDES, TOOL_MANIFEST_CACHE, TOOL_TIME_BUDGET_OVERRIDES
 from tools.base_tool import BaseTool
-from tools.nmap_tool import NmapTool
-from tools.gobuster_tool import GobusterTool
-from tools.dns_tool import DnsTool
-from tools.ping_tool import PingTool
-from tools.curl_tool import CurlTool
-from tools.whois_tool import WhoisTool
-from tools.whatweb_tool import WhatWebTool
-from tools.nikto_tool import NiktoTool
-from tools.sqlmap_tool import SqlmapTool
-from tools.hydra_tool import HydraTool
-from tools.subdomain_tool import SubdomainTool
-# --- Add the new imports ---
-from tools.john_tool import JohnTheRipperTool
-from tools.metasploit_tool import MetasploitTool
+from tools.registry import discover_tools, instantiate_tool, load_manifest
+from tools.result_cache import ToolResult, ToolResultCache
 
 
 class ToolManager:
-    """Manages the registration and execution of all available tools."""
+    """
+    Manages the registration and execution of all available tools. Tools are discovered
+    from the registry (built-ins plus entry points) and only imported and instantiated
+    when they are first used; the prompt manifest comes from the cached registry manifest.
+    """
 
-    def __init__(self):
-        self.tools: Dict[str, BaseTool] = {}
-        # --- Register all your tools here ---
-        self._register_tool(NmapTool())
-        self._register_tool(GobusterTool())
-        self._register_tool(DnsTool())
-        self._register_tool(PingTool())
-        self._register_tool(CurlTool())
-        self._register_tool(WhoisTool())
-        self._register_tool(WhatWebTool())
-        self._register_tool(NiktoTool())
-        self._register_tool(SqlmapTool())
-        self._register_tool(HydraTool())
-        self._register_tool(SubdomainTool())
-        # --- Register the new tools ---
-        self._register_tool(JohnTheRipperTool())
-        self._register_tool(MetasploitTool())
+    def __init__(self, manifest_cache: Optional[str] = TOOL_MANIFEST_CACHE,
+                 time_budgets: Optional[Dict[str, float]] = None):
+        self._specs: Dict[str, str] = discover_tools()
+        # Per-mission time budgets in seconds by tool name, on top of TOOL_TIME_BUDGETS.
+        self.time_budgets = {**TOOL_TIME_BUDGET_OVERRIDES, **(time_budgets or {})}
+        self._instances: Dict[str, BaseTool] = {}
+        self._manifest_cache = manifest_cache
+        self._manifest_text: Optional[str] = None
 
         self.finish_mission_tool_name = "finish_mission"
-        logging.info("ToolManager initialized with %d tools.", len(self.tools))
+        # One cache per ToolManager, i.e. per mission.
+        self.result_cache = ToolResultCache(TOOL_CACHE_TTL_OVERRIDES) if TOOL_CACHE_ENABLED else None
+        logging.info("ToolManager initialized with %d tools.", len(self._specs))
 
-    # ... (the rest of the file remains the same) ...
     def _register_tool(self, tool_instance: BaseTool):
-        """Registers a single tool instance."""
-        if tool_instance.name in self.tools:
+        """Registers a single, already constructed tool instance."""
+        if tool_instance.name in self._instances:
             raise ValueError(f"Tool with name '{tool_instance.name}' is already registered.")
-        self.tools[tool_instance.name] = tool_instance
+        self._instances[tool_instance.name] = self._apply_time_budget(tool_instance)
+        self._manifest_text = None
         logging.info("  - Registered tool: '%s'", tool_instance.name)
 
+    @property
+    def tool_names(self):
+        return sorted(set(self._specs) | set(self._instances))
+
+    @property
+    def tools(self) -> Dict[str, BaseTool]:
+        """Every tool, instantiated. Prefer get_tool(), which only loads the tool asked for."""
+        for name in self.tool_names:
+            self.get_tool(name)
+        return self._instances
+
     def get_tool(self, tool_name: str) -> Optional[BaseTool]:
-        """Retrieves a tool instance by its name."""
-        return self.tools.get(tool_name)
+        """
+        Retrieves a tool instance by its name, importing and instantiating it on first use.
+        A tool that fails to load is logged and dropped, and None is returned for it.
+        """
+        tool = self._instances.get(tool_name)
+        if tool is None and tool_name in self._specs:
+            spec = self._specs[tool_name]
+            try:
+                tool = self._apply_time_budget(instantiate_tool(tool_name, spec))
+            except Exception as e:
+                logging.error("Could not load tool '%s' (%s): %s", tool_name, spec, e)
+                del self._specs[tool_name]
+                return None
+            self._instances[tool_name] = tool
+            logging.info("  - Loaded tool: '%s'", tool_name)
+        return tool
+
+    def _apply_time_budget(self, tool: BaseTool) -> BaseTool:
+        if tool.name in self.time_budgets:
+            tool.time_budget_seconds = self.time_budgets[tool.name]
+            logging.info("  - Time budget for '%s': %ss", tool.name, tool.time_budget_seconds)
+        return tool
+
+    def execute_tool(self, tool: BaseTool, tool_input: str) -> ToolResult:
+        """Executes a tool, serving a cached result when an identical request ran recently."""
+        if self.result_cache is None:
+            return ToolResult(*tool.execute(tool_input))
+        return self.result_cache.get_or_execute(tool, tool_input, lambda: tool.execute(tool_input))
 
     def get_tool_manifest(self) -> str:
         """
         Generates a formatted string of all available tools and their
         descriptions for the AI's system prompt.
         """
+        if self._manifest_text is not None:
+            return self._manifest_text
+        descriptions = dict(load_manifest(self._specs, self._manifest_cache))
+        descriptions.update((name, tool.description) for name, tool in self._instances.items())
         manifest = []
         # Sort tools by name for a consistent prompt
-        for tool_name in sorted(self.tools.keys()):
-            tool = self.tools[tool_name]
-            manifest.append(f'- `{tool.name}`: {tool.description}')
+        for tool_name in sorted(descriptions):
+            manifest.append(f'- `{tool_name}`: {descriptions[tool_name]}')
 
         manifest.append(
             '- `finish_mission`: Use this tool when all tasks are complete. The '
             'tool_input should be a final, detailed summary of all findings.'
         )
-        return "\n".join(manifest)
\ No newline at end of file
+        self._manifest_text = "\n".join(manifest)
+        return self._manifest_text
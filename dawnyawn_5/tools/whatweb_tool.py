@@ -1,7 +1,33 @@
 # dawnyawn/tools/whatweb_tool.py
-from tools.base_tool import BaseTool
+import re
+from typing import List, Optional
+from tools.base_tool import BaseTool, normalize_url
+from models.observation import Observation, TechnologyFinding
+
+_ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+# e.g. "http://example.com [200 OK] Apache[2.4.7], Country[UNITED STATES][US], Title[Home]"
+_RESULT_LINE = re.compile(r"^(?P<target>\S+) \[(?P<status>\d{3})[^\]]*\]\s*(?P<plugins>.*)$")
+_VERSION = re.compile(r"^v?\d+(\.\d+)*[\w.\-]*$")
+
+
+def _split_plugins(plugins: str) -> List[str]:
+    """Splits on ', ' outside brackets, since plugin values may themselves contain commas."""
+    parts, depth, current = [], 0, ""
+    for i, char in enumerate(plugins):
+        depth += {"[": 1, "]": -1}.get(char, 0)
+        if char == "," and depth == 0 and plugins[i + 1:i + 2] == " ":
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
 
 class WhatWebTool(BaseTool):
+    cache_ttl_seconds = 1800
+    time_budget_seconds = 300
+
     @property
     def name(self) -> str:
         return "whatweb_scan"
@@ -14,4 +40,27 @@ class WhatWebTool(BaseTool):
         )
 
     def _construct_command(self, tool_input: str) -> str:
-        return f"whatweb '{tool_input}'"
\ No newline at end of file
+        return f"whatweb '{tool_input}'"
+
+    def parse_output(self, raw_output: str) -> Optional[Observation]:
+        findings = []
+        for line in _ANSI_ESCAPE.sub("", raw_output).splitlines():
+            match = _RESULT_LINE.match(line.strip())
+            if not match:
+                continue
+            for plugin in _split_plugins(match.group("plugins")):
+                name = plugin.split("[", 1)[0].strip()
+                values = re.findall(r"\[([^\]]*)\]", plugin)
+                version = values[0] if values and _VERSION.match(values[0]) else None
+                detail = ", ".join(v for v in values if v != version) or None
+                findings.append(TechnologyFinding(target=match.group("target"), name=name,
+                                                  version=version, detail=detail))
+        if not findings:
+            return None
+        targets = sorted({f.target for f in findings})
+        return Observation(status="SUCCESS",
+                           key_finding=f"{len(findings)} technology indicator(s) identified on {', '.join(targets)}.",
+                           findings=findings)
+
+    def normalize_input(self, tool_input: str) -> str:
+        return normalize_url(tool_input)
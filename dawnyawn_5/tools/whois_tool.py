@@ -1,7 +1,10 @@
 # dawnyawn/tools/whois_tool.py
-from tools.base_tool import BaseTool
+from tools.base_tool import BaseTool, normalize_host
 
 class WhoisTool(BaseTool):
+    cache_ttl_seconds = 3600
+    time_budget_seconds = 60
+
     @property
     def name(self) -> str:
         return "whois_lookup"
@@ -14,4 +17,7 @@ class WhoisTool(BaseTool):
         )
 
     def _construct_command(self, tool_input: str) -> str:
-        return f"whois {tool_input}"
\ No newline at end of file
+        return f"whois {tool_input}"
+
+    def normalize_input(self, tool_input: str) -> str:
+        return normalize_host(tool_input)